@@ -174,10 +174,8 @@ const EnhancedDocumentUpload = ({
     
     const eventSource = new EventSource(`${backendUrl}/api/upload/logs/${docId}`)
     
-    eventSource.onmessage = (event) => {
+    const handleLogEntry = (logData) => {
       try {
-        const logData = JSON.parse(event.data)
-        
         if (logData.keepalive) return // Ignore keepalive messages
         
         console.log(`📝 Processing Log [${docId}]:`, logData.message)
@@ -258,6 +256,17 @@ const EnhancedDocumentUpload = ({
           console.error(`❌ Processing failed for document ${docId}:`, logData.message)
         }
         
+      } catch (error) {
+        console.error('Error handling log entry:', error)
+      }
+    }
+    
+    eventSource.onmessage = (event) => {
+      try {
+        // Bursts of log lines arrive coalesced as {"batch": [...]}
+        const logData = JSON.parse(event.data)
+        const entries = Array.isArray(logData.batch) ? logData.batch : [logData]
+        entries.forEach(handleLogEntry)
       } catch (error) {
         console.error('Error parsing log data:', error)
       }
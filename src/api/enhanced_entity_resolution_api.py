@@ -8,7 +8,6 @@ from pydantic import BaseModel
 from rapidfuzz import fuzz, process
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import asyncio
 
 class CanonicalEntity(BaseModel):
@@ -91,11 +90,11 @@ class EnhancedEntityResolution:
                 combined_text = f"{name}. {context}" if context else name
                 texts.append(combined_text)
             
-            # Generate embeddings
-            embeddings = self.embedding_model.encode(texts)
+            # Generate unit-length embeddings so cosine similarity is a plain dot product
+            embeddings = self.embedding_model.encode(texts, normalize_embeddings=True)
             
             # Calculate cosine similarity matrix
-            similarity_matrix = cosine_similarity(embeddings)
+            similarity_matrix = embeddings @ embeddings.T
             
             return similarity_matrix
             
@@ -10,6 +10,55 @@ from neo4j import GraphDatabase
 import networkx as nx
 import numpy as np
 from collections import defaultdict
+from functools import lru_cache
+
+# Rows sent per UNWIND query when creating a document's graph
+WRITE_BATCH_SIZE = 1000
+
+CREATE_ENTITIES_QUERY = """
+UNWIND $rows AS row
+CREATE (n:Entity {
+    entity_id: row.entity_id,
+    name: row.name,
+    type: row.type,
+    normalized: row.normalized,
+    source_doc_id: $doc_id,
+    confidence: row.confidence,
+    sentence_context: row.sentence_context,
+    attributes: row.attributes
+})
+RETURN row.entity_id as entity_id, id(n) as neo4j_id
+"""
+
+CREATE_RELATIONS_QUERY = """
+UNWIND $rows AS row
+MATCH (source) WHERE id(source) = row.source_neo4j_id
+MATCH (target) WHERE id(target) = row.target_neo4j_id
+CREATE (source)-[r:RELATES {
+    relation_id: row.relation_id,
+    relation_type: row.relation_type,
+    strength: row.strength,
+    confidence: row.confidence,
+    sentence_context: row.sentence_context,
+    source_doc_id: $doc_id
+}]->(target)
+"""
+
+@lru_cache(maxsize=4096)
+def _dumps_items(items: Tuple[Tuple[str, type, Any], ...]) -> str:
+    return json.dumps({key: value for key, _, value in items})
+
+
+def _dumps_attributes(attributes: Dict[str, Any]) -> str:
+    """``json.dumps(attributes)``, memoized for attribute dicts that recur across entities.
+    
+    Value types are part of the key so that e.g. ``1`` and ``True`` aren't confused;
+    dicts with unhashable values are serialized directly.
+    """
+    try:
+        return _dumps_items(tuple((key, type(value), value) for key, value in attributes.items()))
+    except TypeError:
+        return json.dumps(attributes)
 
 class GraphNode(BaseModel):
     id: str
@@ -118,65 +167,56 @@ class EnhancedGraphConstructor:
                     doc_id=doc_id
                 )
                 
-                # Create entity nodes
+                # Create entity nodes, a batch per query; each batch returns its
+                # entities' Neo4j ids in the same round trip
+                entity_rows = [
+                    {
+                        "entity_id": entity["id"],
+                        "name": entity["name"],
+                        "type": entity_type,
+                        "normalized": entity.get("normalized", entity["name"].lower()),
+                        "confidence": entity.get("confidence", 0.8),
+                        "sentence_context": entity.get("sentence_context", ""),
+                        "attributes": _dumps_attributes(entity.get("attributes", {}))
+                    }
+                    for entity_type, type_data in entities.items()
+                    for entity in type_data.get("items", [])
+                ]
                 entity_id_map = {}
-                for entity_type, type_data in entities.items():
-                    for entity in type_data.get("items", []):
-                        neo4j_result = session.run(
-                            """
-                            CREATE (n:Entity {
-                                entity_id: $entity_id,
-                                name: $name,
-                                type: $type,
-                                normalized: $normalized,
-                                source_doc_id: $doc_id,
-                                confidence: $confidence,
-                                sentence_context: $sentence_context,
-                                attributes: $attributes
-                            })
-                            RETURN id(n) as neo4j_id
-                            """,
-                            entity_id=entity["id"],
-                            name=entity["name"],
-                            type=entity_type,
-                            normalized=entity.get("normalized", entity["name"].lower()),
-                            doc_id=doc_id,
-                            confidence=entity.get("confidence", 0.8),
-                            sentence_context=entity.get("sentence_context", ""),
-                            attributes=json.dumps(entity.get("attributes", {}))
-                        )
-                        
-                        neo4j_id = neo4j_result.single()["neo4j_id"]
-                        entity_id_map[entity["id"]] = neo4j_id
+                nodes_created = 0
+                for start in range(0, len(entity_rows), WRITE_BATCH_SIZE):
+                    result = session.run(
+                        CREATE_ENTITIES_QUERY,
+                        rows=entity_rows[start:start + WRITE_BATCH_SIZE],
+                        doc_id=doc_id
+                    )
+                    for record in result:
+                        entity_id_map[record["entity_id"]] = record["neo4j_id"]
+                    nodes_created += result.consume().counters.nodes_created
                 
                 # Create relationships
-                for relation in relations:
-                    source_id = relation.get("source_entity_id")
-                    target_id = relation.get("target_entity_id")
-                    
-                    if source_id in entity_id_map and target_id in entity_id_map:
-                        session.run(
-                            """
-                            MATCH (source) WHERE id(source) = $source_neo4j_id
-                            MATCH (target) WHERE id(target) = $target_neo4j_id
-                            CREATE (source)-[r:RELATES {
-                                relation_id: $relation_id,
-                                relation_type: $relation_type,
-                                strength: $strength,
-                                confidence: $confidence,
-                                sentence_context: $sentence_context,
-                                source_doc_id: $doc_id
-                            }]->(target)
-                            """,
-                            source_neo4j_id=entity_id_map[source_id],
-                            target_neo4j_id=entity_id_map[target_id],
-                            relation_id=relation["id"],
-                            relation_type=relation["relation_type"],
-                            strength=relation.get("strength", 0.7),
-                            confidence=relation.get("confidence", 0.8),
-                            sentence_context=relation.get("sentence_context", ""),
-                            doc_id=doc_id
-                        )
+                relation_rows = [
+                    {
+                        "source_neo4j_id": entity_id_map[relation.get("source_entity_id")],
+                        "target_neo4j_id": entity_id_map[relation.get("target_entity_id")],
+                        "relation_id": relation["id"],
+                        "relation_type": relation["relation_type"],
+                        "strength": relation.get("strength", 0.7),
+                        "confidence": relation.get("confidence", 0.8),
+                        "sentence_context": relation.get("sentence_context", "")
+                    }
+                    for relation in relations
+                    if relation.get("source_entity_id") in entity_id_map
+                    and relation.get("target_entity_id") in entity_id_map
+                ]
+                relationships_created = 0
+                for start in range(0, len(relation_rows), WRITE_BATCH_SIZE):
+                    summary = session.run(
+                        CREATE_RELATIONS_QUERY,
+                        rows=relation_rows[start:start + WRITE_BATCH_SIZE],
+                        doc_id=doc_id
+                    ).consume()
+                    relationships_created += summary.counters.relationships_created
             
             processing_time = int((time.time() - start_time) * 1000)
             
@@ -185,8 +225,8 @@ class EnhancedGraphConstructor:
                 status_code=200,
                 processing_ms=processing_time,
                 data={
-                    "nodes_created": sum(len(type_data.get("items", [])) for type_data in entities.values()),
-                    "relationships_created": len(relations),
+                    "nodes_created": nodes_created,
+                    "relationships_created": relationships_created,
                     "doc_id": doc_id,
                     "entity_id_map": entity_id_map
                 }
@@ -393,22 +433,24 @@ class EnhancedGraphConstructor:
             total_nodes = len(nodes)
             total_edges = len(edges)
             
-            # Entity type distribution
+            # Entity type distribution and degree sum in one pass over the nodes
             entity_type_counts = defaultdict(int)
+            degree_sum = 0
             for node in nodes:
                 entity_type_counts[node.type] += 1
+                degree_sum += node.metadata.get("degree", 0)
             
-            # Relation type distribution
+            # Relation type distribution and weight sum in one pass over the edges
             relation_type_counts = defaultdict(int)
+            weight_sum = 0
             for edge in edges:
                 relation_type_counts[edge.relation_type] += 1
+                weight_sum += edge.weight
             
             # Calculate average degree
-            degree_sum = sum(node.metadata.get("degree", 0) for node in nodes)
             avg_degree = degree_sum / total_nodes if total_nodes > 0 else 0
             
             # Calculate average edge weight
-            weight_sum = sum(edge.weight for edge in edges)
             avg_weight = weight_sum / total_edges if total_edges > 0 else 0
             
             return {
@@ -6,6 +6,7 @@ import uuid
 import json
 import time
 import asyncio
+import shutil
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
@@ -15,6 +16,11 @@ import aiofiles
 import magic
 from datetime import datetime
 
+# Uploads are copied to disk in chunks of this size instead of being read whole
+UPLOAD_CHUNK_SIZE = 1 << 16
+# libmagic only needs the start of a file to identify its type
+MIME_SNIFF_BYTES = 2048
+
 class UploadResponse(BaseModel):
     success: bool
     status_code: int
@@ -58,10 +64,13 @@ class EnhancedUploadHandler:
             "metadata": {}
         }
         
-        # Check file size
-        file_size = 0
-        content = await file.read()
-        file_size = len(content)
+        # Check file size from the spooled upload rather than reading it into memory
+        file_size = file.size
+        if file_size is None:
+            file.file.seek(0, os.SEEK_END)
+            file_size = file.file.tell()
+            file.file.seek(0)
+        head = await file.read(MIME_SNIFF_BYTES)
         await file.seek(0)  # Reset file pointer
         
         if file_size > self.max_file_size:
@@ -71,7 +80,7 @@ class EnhancedUploadHandler:
         
         # Check content type
         try:
-            mime_type = magic.from_buffer(content, mime=True)
+            mime_type = magic.from_buffer(head, mime=True)
             if mime_type not in self.allowed_types:
                 validation_result["warnings"].append(f"Detected MIME type {mime_type} may not be fully supported")
         except Exception as e:
@@ -86,6 +95,12 @@ class EnhancedUploadHandler:
         
         return validation_result
     
+    @staticmethod
+    def _copy_upload(file: UploadFile, file_path: Path):
+        file.file.seek(0)
+        with open(file_path, 'wb') as out:
+            shutil.copyfileobj(file.file, out, UPLOAD_CHUNK_SIZE)
+    
     async def extract_text_content(self, file_path: Path, content_type: str) -> Dict[str, Any]:
         """Extract text content from various file types"""
         try:
@@ -170,10 +185,8 @@ class EnhancedUploadHandler:
             safe_filename = f"{doc_id}{file_extension}"
             file_path = self.upload_dir / safe_filename
             
-            # Save file to disk
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
+            # Save file to disk, one chunk in memory at a time
+            await asyncio.to_thread(self._copy_upload, file, file_path)
             
             # Extract text content
             content_type = validation["metadata"]["detected_mime"]
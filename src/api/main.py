@@ -10,7 +10,7 @@ from typing import AsyncGenerator
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import structlog
 
 import sys
@@ -48,10 +48,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         config = ConfigLoader()
         logger.info("Configuration loaded successfully")
 
-        # Initialize Ollama client
-        from ollama import Client
+        # Initialize Ollama client; one async client with a keep-alive connection
+        # pool is shared by every request instead of reconnecting per call
+        import httpx
+        from ollama import AsyncClient
         try:
-            ollama_client = Client(host=config.ollama_base_url)
+            ollama_client = AsyncClient(
+                host=config.ollama_base_url,
+                timeout=120,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
             logger.info("Ollama client initialized", base_url=config.ollama_base_url)
         except Exception as e:
             logger.warning("Ollama not available, continuing without it", error=str(e))
@@ -95,6 +101,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         logger.info("Shutting down Agentic Graph RAG API server...")
         if hasattr(app.state, 'neo4j_driver'):
             app.state.neo4j_driver.close()
+        # The Ollama client has no close method of its own; release its httpx pool
+        ollama_http = getattr(getattr(app.state, 'ollama_client', None), '_client', None)
+        if ollama_http is not None:
+            await ollama_http.aclose()
+        await simple_upload_routes.upload_store.close()
         logger.info("Connections closed")
 
 
@@ -106,6 +117,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -261,11 +273,23 @@ if __name__ == "__main__":
     # Get configuration
     config = ConfigLoader()
 
+    # Job progress lives in process memory unless it is shared through Redis,
+    # so several workers are only safe with REDIS_URL set
+    workers = config.api_workers
+    if workers > 1 and not config.redis_url:
+        logger.warning("API_WORKERS > 1 requires REDIS_URL for shared job progress, using 1 worker",
+                       requested_workers=workers)
+        workers = 1
+
     uvicorn.run(
         "src.api.main:app",
         host=config.api_host,
         port=config.api_port,
-        reload=config.debug,
+        workers=workers,
+        reload=config.debug and workers == 1,
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         log_level=config.log_level.lower(),
         access_log=True
     )
@@ -3,14 +3,15 @@ Comprehensive API routes integrating all enhanced components
 Provides unified endpoints for the complete Agentic Graph RAG system
 """
 
+import asyncio
 import uuid
 import time
-import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request, Depends
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse
 from pydantic import BaseModel, Field
+import orjson
 import structlog
 
 from src.ingestion.enhanced_ontology_generator import EnhancedOntologyGenerator
@@ -19,11 +20,14 @@ from src.ingestion.enhanced_chromadb_integration import EnhancedChromaDBIntegrat
 from src.ingestion.enhanced_graph_constructor import EnhancedGraphConstructor
 from src.retrieval.enhanced_agentic_retrieval import EnhancedAgenticRetrieval, RetrievalStrategy
 from src.retrieval.enhanced_reasoning_stream import EnhancedReasoningStream
+from src.utils.config_loader import ConfigLoader
 from src.utils.logger import get_logger
 
 logger = get_logger("comprehensive_api_routes")
 
-router = APIRouter()
+config = ConfigLoader()
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Response wrapper for consistent API responses
 class APIResponse(BaseModel):
@@ -37,6 +41,21 @@ class APIResponse(BaseModel):
     job_id: Optional[str] = None
 
 
+# APIResponse documents the envelope in OpenAPI without validating every payload
+API_RESPONSE_DOCS = {200: {"model": APIResponse}}
+
+
+# How long a /system/status snapshot is reused before the backends are probed again
+STATUS_CACHE_TTL_SECONDS = 2.0
+_status_cache: Dict[str, Any] = {"data": None, "expires_at": 0.0}
+
+# Reasoning SSE events are buffered up to this size / idle interval before being written
+SSE_FLUSH_BYTES = 4096
+SSE_FLUSH_INTERVAL_S = 0.01
+SSE_DATA_PREFIX = b"data: "
+SSE_FRAME_END = b"\n\n"
+
+
 # Request models
 class OntologyGenerationRequest(BaseModel):
     """Request model for ontology generation."""
@@ -91,14 +110,23 @@ async def get_ontology_generator(request: Request) -> EnhancedOntologyGenerator:
 
 
 async def get_entity_resolver(request: Request) -> EnhancedEntityResolution:
-    """Get entity resolution instance."""
-    return EnhancedEntityResolution()
+    """Get the shared entity resolution instance, creating it on first use.
+    
+    Sharing it keeps the sentence transformer loaded and its name-embedding cache warm.
+    """
+    state = request.app.state
+    entity_resolver = getattr(state, '_entity_resolver', None)
+    if entity_resolver is None:
+        entity_resolver = EnhancedEntityResolution()
+        state._entity_resolver = entity_resolver
+    return entity_resolver
 
 
 async def get_chromadb_integration(request: Request) -> EnhancedChromaDBIntegration:
     """Get ChromaDB integration instance."""
     return EnhancedChromaDBIntegration(
-        chroma_client=getattr(request.app.state, 'chroma_client', None)
+        chroma_client=getattr(request.app.state, 'chroma_client', None),
+        quantize_embeddings=config.chroma_quantize_embeddings
     )
 
 
@@ -110,21 +138,30 @@ async def get_graph_constructor(request: Request) -> EnhancedGraphConstructor:
 
 
 async def get_agentic_retrieval(request: Request) -> EnhancedAgenticRetrieval:
-    """Get agentic retrieval instance."""
-    return EnhancedAgenticRetrieval(
-        chroma_client=getattr(request.app.state, 'chroma_client', None),
-        neo4j_driver=getattr(request.app.state, 'neo4j_driver', None)
-    )
+    """Get the shared agentic retrieval instance, creating it on first use."""
+    state = request.app.state
+    agentic_retrieval = getattr(state, '_agentic_retrieval', None)
+    if agentic_retrieval is None:
+        agentic_retrieval = EnhancedAgenticRetrieval(
+            chroma_client=getattr(state, 'chroma_client', None),
+            neo4j_driver=getattr(state, 'neo4j_driver', None)
+        )
+        state._agentic_retrieval = agentic_retrieval
+    return agentic_retrieval
 
 
 async def get_reasoning_stream(request: Request) -> EnhancedReasoningStream:
-    """Get reasoning stream instance."""
-    retrieval_system = await get_agentic_retrieval(request)
-    return EnhancedReasoningStream(
-        retrieval_system=retrieval_system,
-        llm_client=getattr(request.app.state, 'openai_client', None) or 
-                   getattr(request.app.state, 'ollama_client', None)
-    )
+    """Get the shared reasoning stream instance, creating it on first use."""
+    state = request.app.state
+    reasoning_stream = getattr(state, '_reasoning_stream', None)
+    if reasoning_stream is None:
+        reasoning_stream = EnhancedReasoningStream(
+            retrieval_system=await get_agentic_retrieval(request),
+            llm_client=getattr(state, 'openai_client', None) or 
+                       getattr(state, 'ollama_client', None)
+        )
+        state._reasoning_stream = reasoning_stream
+    return reasoning_stream
 
 
 def create_api_response(success: bool, 
@@ -132,25 +169,30 @@ def create_api_response(success: bool,
                        error: Optional[str] = None,
                        processing_time_ms: float = 0.0,
                        warnings: List[str] = None,
-                       job_id: Optional[str] = None) -> APIResponse:
-    """Create standardized API response."""
-    return APIResponse(
-        success=success,
-        status_code=200 if success else 500,
-        processing_time_ms=processing_time_ms,
-        data=data,
-        error=error,
-        warnings=warnings or [],
-        job_id=job_id
-    )
+                       job_id: Optional[str] = None) -> Dict[str, Any]:
+    """Create standardized API response.
+    
+    Returns a plain dict shaped like ``APIResponse`` so the payload is
+    serialized once by the response class instead of being validated into a
+    model first.
+    """
+    return {
+        "success": success,
+        "status_code": 200 if success else 500,
+        "processing_time_ms": processing_time_ms,
+        "data": data,
+        "error": error,
+        "warnings": warnings or [],
+        "job_id": job_id
+    }
 
 
 # ONTOLOGY GENERATION ENDPOINTS
-@router.post("/ontology/generate", response_model=APIResponse)
+@router.post("/ontology/generate", response_model=None, responses=API_RESPONSE_DOCS)
 async def generate_ontology(
     request: OntologyGenerationRequest,
     ontology_generator: EnhancedOntologyGenerator = Depends(get_ontology_generator)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Generate hierarchical ontology from text."""
     
     start_time = time.time()
@@ -179,7 +221,7 @@ async def generate_ontology(
         )
         
     except Exception as e:
-        logger.error(f"Ontology generation failed: {e}")
+        logger.exception("ontology_generation_failed", error=str(e), doc_id=request.doc_id)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -190,20 +232,20 @@ async def generate_ontology(
 
 
 # ENTITY RESOLUTION ENDPOINTS
-@router.post("/entity-resolution/detect-duplicates", response_model=APIResponse)
+@router.post("/entity-resolution/detect-duplicates", response_model=None, responses=API_RESPONSE_DOCS)
 async def detect_duplicate_entities(
     request: EntityResolutionRequest,
     entity_resolver: EnhancedEntityResolution = Depends(get_entity_resolver)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Detect and resolve duplicate entities."""
     
     start_time = time.time()
     
     try:
-        # Update similarity threshold if provided
-        entity_resolver.similarity_threshold = request.similarity_threshold
-        
-        resolution_result = await entity_resolver.detect_duplicates(request.entities)
+        resolution_result = await entity_resolver.detect_duplicates(
+            request.entities,
+            threshold=request.similarity_threshold
+        )
         
         # Get resolution statistics
         statistics = entity_resolver.get_resolution_statistics(resolution_result)
@@ -220,7 +262,7 @@ async def detect_duplicate_entities(
         )
         
     except Exception as e:
-        logger.error(f"Entity resolution failed: {e}")
+        logger.exception("entity_resolution_failed", error=str(e), entity_count=len(request.entities))
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -231,11 +273,11 @@ async def detect_duplicate_entities(
 
 
 # EMBEDDING GENERATION ENDPOINTS
-@router.post("/embeddings/store", response_model=APIResponse)
+@router.post("/embeddings/store", response_model=None, responses=API_RESPONSE_DOCS)
 async def store_embeddings(
     request: EmbeddingRequest,
     chromadb_integration: EnhancedChromaDBIntegration = Depends(get_chromadb_integration)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Generate and store embeddings for text."""
     
     start_time = time.time()
@@ -263,7 +305,7 @@ async def store_embeddings(
         )
         
     except Exception as e:
-        logger.error(f"Embedding storage failed: {e}")
+        logger.exception("embedding_storage_failed", error=str(e), doc_id=request.doc_id)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -273,11 +315,11 @@ async def store_embeddings(
         )
 
 
-@router.post("/embeddings/search", response_model=APIResponse)
+@router.post("/embeddings/search", response_model=None, responses=API_RESPONSE_DOCS)
 async def semantic_search(
     request: SemanticSearchRequest,
     chromadb_integration: EnhancedChromaDBIntegration = Depends(get_chromadb_integration)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Perform semantic search using embeddings."""
     
     start_time = time.time()
@@ -299,7 +341,7 @@ async def semantic_search(
         )
         
     except Exception as e:
-        logger.error(f"Semantic search failed: {e}")
+        logger.exception("semantic_search_failed", error=str(e))
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -310,11 +352,11 @@ async def semantic_search(
 
 
 # GRAPH CONSTRUCTION ENDPOINTS
-@router.post("/graph/build-from-ontology", response_model=APIResponse)
+@router.post("/graph/build-from-ontology", response_model=None, responses=API_RESPONSE_DOCS)
 async def build_graph_from_ontology(
     ontology: Dict[str, Any],
     graph_constructor: EnhancedGraphConstructor = Depends(get_graph_constructor)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Build knowledge graph from ontology."""
     
     start_time = time.time()
@@ -337,7 +379,7 @@ async def build_graph_from_ontology(
         )
         
     except Exception as e:
-        logger.error(f"Graph construction failed: {e}")
+        logger.exception("graph_construction_failed", error=str(e))
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -347,11 +389,11 @@ async def build_graph_from_ontology(
         )
 
 
-@router.get("/graph/neo4j-visualization", response_model=APIResponse)
+@router.get("/graph/neo4j-visualization", response_model=None, responses=API_RESPONSE_DOCS)
 async def get_neo4j_visualization(
     limit: int = 100,
     graph_constructor: EnhancedGraphConstructor = Depends(get_graph_constructor)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Get graph visualization data from Neo4j."""
     
     start_time = time.time()
@@ -368,7 +410,7 @@ async def get_neo4j_visualization(
         )
         
     except Exception as e:
-        logger.error(f"Neo4j visualization failed: {e}")
+        logger.exception("neo4j_visualization_failed", error=str(e), limit=limit)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -378,12 +420,12 @@ async def get_neo4j_visualization(
         )
 
 
-@router.get("/graph/subgraph/{entity_id}", response_model=APIResponse)
+@router.get("/graph/subgraph/{entity_id}", response_model=None, responses=API_RESPONSE_DOCS)
 async def get_entity_subgraph(
     entity_id: str,
     depth: int = 2,
     graph_constructor: EnhancedGraphConstructor = Depends(get_graph_constructor)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Get subgraph centered on specific entity."""
     
     start_time = time.time()
@@ -400,7 +442,7 @@ async def get_entity_subgraph(
         )
         
     except Exception as e:
-        logger.error(f"Subgraph retrieval failed: {e}")
+        logger.exception("subgraph_retrieval_failed", error=str(e), entity_id=entity_id, depth=depth)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -411,11 +453,11 @@ async def get_entity_subgraph(
 
 
 # AGENTIC RETRIEVAL ENDPOINTS
-@router.post("/retrieval/query", response_model=APIResponse)
+@router.post("/retrieval/query", response_model=None, responses=API_RESPONSE_DOCS)
 async def agentic_retrieval_query(
     request: RetrievalRequest,
     agentic_retrieval: EnhancedAgenticRetrieval = Depends(get_agentic_retrieval)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Perform agentic retrieval with intelligent routing."""
     
     start_time = time.time()
@@ -468,7 +510,7 @@ async def agentic_retrieval_query(
         )
         
     except Exception as e:
-        logger.error(f"Agentic retrieval failed: {e}")
+        logger.exception("agentic_retrieval_failed", error=str(e), strategy=request.strategy)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -479,11 +521,11 @@ async def agentic_retrieval_query(
 
 
 # REASONING STREAM ENDPOINTS
-@router.post("/reasoning/query", response_model=APIResponse)
+@router.post("/reasoning/query", response_model=None, responses=API_RESPONSE_DOCS)
 async def reasoning_stream_query(
     request: ReasoningRequest,
     reasoning_stream: EnhancedReasoningStream = Depends(get_reasoning_stream)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Process query through reasoning stream."""
     
     start_time = time.time()
@@ -524,7 +566,7 @@ async def reasoning_stream_query(
         )
         
     except Exception as e:
-        logger.error(f"Reasoning stream failed: {e}")
+        logger.exception("reasoning_stream_failed", error=str(e), conversation_id=request.conversation_id)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -543,11 +585,47 @@ async def stream_reasoning_response(
     """Stream reasoning response in real-time."""
     
     async def generate_stream():
+        # Coalesce small events into one write: flush once the buffer reaches
+        # SSE_FLUSH_BYTES or no new chunk has arrived within SSE_FLUSH_INTERVAL_S
+        chunks = reasoning_stream.stream_response(query, conversation_id).__aiter__()
+        buffer = bytearray()
+        pending = None
+        
         try:
-            async for chunk in reasoning_stream.stream_response(query, conversation_id):
-                yield f"data: {json.dumps(chunk)}\n\n"
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(chunks.__anext__())
+                
+                done, _ = await asyncio.wait(
+                    {pending}, timeout=SSE_FLUSH_INTERVAL_S if buffer else None
+                )
+                if not done:
+                    yield bytes(buffer)
+                    buffer.clear()
+                    continue
+                
+                finished, pending = pending, None
+                try:
+                    chunk = finished.result()
+                except StopAsyncIteration:
+                    break
+                
+                buffer += SSE_DATA_PREFIX
+                buffer += orjson.dumps(chunk)
+                buffer += SSE_FRAME_END
+                if len(buffer) >= SSE_FLUSH_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            buffer += SSE_DATA_PREFIX
+            buffer += orjson.dumps({'type': 'error', 'message': str(e)})
+            buffer += SSE_FRAME_END
+        finally:
+            if pending is not None:
+                pending.cancel()
+        
+        if buffer:
+            yield bytes(buffer)
     
     return StreamingResponse(
         generate_stream(),
@@ -559,11 +637,11 @@ async def stream_reasoning_response(
     )
 
 
-@router.get("/reasoning/conversation/{conversation_id}", response_model=APIResponse)
+@router.get("/reasoning/conversation/{conversation_id}", response_model=None, responses=API_RESPONSE_DOCS)
 async def get_conversation_history(
     conversation_id: str,
     reasoning_stream: EnhancedReasoningStream = Depends(get_reasoning_stream)
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Get conversation history and summary."""
     
     start_time = time.time()
@@ -580,7 +658,7 @@ async def get_conversation_history(
         )
         
     except Exception as e:
-        logger.error(f"Failed to get conversation history: {e}")
+        logger.exception("conversation_history_failed", error=str(e), conversation_id=conversation_id)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -591,12 +669,12 @@ async def get_conversation_history(
 
 
 # COMPREHENSIVE PIPELINE ENDPOINT
-@router.post("/pipeline/process-document", response_model=APIResponse)
+@router.post("/pipeline/process-document", response_model=None, responses=API_RESPONSE_DOCS)
 async def process_document_pipeline(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = None,
     request: Request = None
-) -> APIResponse:
+) -> Dict[str, Any]:
     """Process document through complete pipeline."""
     
     start_time = time.time()
@@ -655,7 +733,7 @@ async def process_document_pipeline(
         )
         
     except Exception as e:
-        logger.error(f"Document pipeline failed: {e}")
+        logger.exception("document_pipeline_failed", error=str(e), job_id=job_id, filename=file.filename)
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -667,31 +745,53 @@ async def process_document_pipeline(
 
 
 # SYSTEM STATUS ENDPOINTS
-@router.get("/system/status", response_model=APIResponse)
-async def get_system_status(request: Request) -> APIResponse:
+@router.get("/system/status", response_model=None, responses=API_RESPONSE_DOCS)
+async def get_system_status(request: Request) -> Dict[str, Any]:
     """Get comprehensive system status."""
     
     start_time = time.time()
     
+    # Serve the cached snapshot while it is fresh; orchestrators poll this endpoint often
+    if _status_cache["data"] is not None and start_time < _status_cache["expires_at"]:
+        return create_api_response(
+            success=True,
+            data=_status_cache["data"],
+            processing_time_ms=(time.time() - start_time) * 1000
+        )
+    
     try:
         # Check component availability
+        state = request.app.state
         status = {
-            "neo4j_available": hasattr(request.app.state, 'neo4j_driver') and request.app.state.neo4j_driver is not None,
-            "chromadb_available": hasattr(request.app.state, 'chroma_client') and request.app.state.chroma_client is not None,
-            "openai_available": hasattr(request.app.state, 'openai_client') and request.app.state.openai_client is not None,
-            "ollama_available": hasattr(request.app.state, 'ollama_client') and request.app.state.ollama_client is not None,
+            "neo4j_available": getattr(state, 'neo4j_driver', None) is not None,
+            "chromadb_available": getattr(state, 'chroma_client', None) is not None,
+            "openai_available": getattr(state, 'openai_client', None) is not None,
+            "ollama_available": getattr(state, 'ollama_client', None) is not None,
             "system_time": datetime.now().isoformat(),
             "uptime": "N/A"  # Would need to track startup time
         }
         
-        # Get component statistics if available
+        # Get component statistics if available; the backends are independent so
+        # their (blocking) stats calls run concurrently in the default executor
+        loop = asyncio.get_running_loop()
+        stats_keys = []
+        stats_calls = []
+        
         if status["chromadb_available"]:
             chromadb_integration = await get_chromadb_integration(request)
-            status["chromadb_stats"] = chromadb_integration.get_collection_stats()
+            stats_keys.append("chromadb_stats")
+            stats_calls.append(loop.run_in_executor(None, chromadb_integration.get_collection_stats))
         
         if status["neo4j_available"]:
             graph_constructor = await get_graph_constructor(request)
-            status["graph_stats"] = graph_constructor.get_graph_statistics()
+            stats_keys.append("graph_stats")
+            stats_calls.append(loop.run_in_executor(None, graph_constructor.get_graph_statistics))
+        
+        if stats_calls:
+            status.update(zip(stats_keys, await asyncio.gather(*stats_calls)))
+        
+        _status_cache["data"] = status
+        _status_cache["expires_at"] = time.time() + STATUS_CACHE_TTL_SECONDS
         
         processing_time = (time.time() - start_time) * 1000
         
@@ -702,7 +802,7 @@ async def get_system_status(request: Request) -> APIResponse:
         )
         
     except Exception as e:
-        logger.error(f"System status check failed: {e}")
+        logger.exception("system_status_failed", error=str(e))
         processing_time = (time.time() - start_time) * 1000
         
         return create_api_response(
@@ -2,17 +2,28 @@
 Ingestion routes for document upload and processing
 """
 
+import uuid
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel, Field
+import aiofiles
 import structlog
 
+from src.api.routes.progress_streaming import update_progress, complete_job, fail_job
 from src.utils.logger import get_logger
 
 logger = get_logger("ingestion_routes")
 
 router = APIRouter()
 
+# Upload directory
+UPLOAD_DIR = Path("uploads")
+UPLOAD_DIR.mkdir(exist_ok=True)
+
+# Uploads are copied to disk in chunks of this size so memory stays bounded per request
+UPLOAD_CHUNK_SIZE = 1 << 20
+
 
 class DocumentIngestionRequest(BaseModel):
     """Request model for document ingestion."""
@@ -50,7 +61,10 @@ async def ingest_documents(
         # TODO: Implement actual ingestion pipeline
         # For now, return a placeholder response
 
-        ingestion_id = "ingestion_123"  # Generate unique ID
+        ingestion_id = uuid.uuid4().hex
+
+        # Register in the shared job store so /api/v2/jobs/{id} can track it right away
+        update_progress(ingestion_id, "queued", 0, "Queued")
 
         # Add background task for processing
         background_tasks.add_task(
@@ -102,11 +116,19 @@ async def upload_documents(
     logger.info("Received document upload", file_count=len(files))
 
     try:
-        # Save uploaded files temporarily
+        # Stream uploaded files to the upload directory
         saved_paths = []
         for file in files:
-            # TODO: Save file to upload directory
-            saved_paths.append(f"/tmp/{file.filename}")
+            file_path = UPLOAD_DIR / f"{uuid.uuid4().hex}_{Path(file.filename).name}"
+            
+            async with aiofiles.open(file_path, 'wb') as f:
+                while True:
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    await f.write(chunk)
+            
+            saved_paths.append(str(file_path))
 
         # Trigger ingestion
         ingestion_request = DocumentIngestionRequest(documents=saved_paths)
@@ -144,6 +166,8 @@ async def process_documents_background(
         document_count=len(document_paths)
     )
 
+    # Every exit path finishes the job registered by ingest_documents, so it never
+    # stays queued in the shared job store
     try:
         # TODO: Implement the actual ingestion pipeline
         # This would involve:
@@ -153,12 +177,19 @@ async def process_documents_background(
         # 4. Graph construction in Neo4j
         # 5. Embedding generation and storage in ChromaDB
 
+        complete_job(ingestion_id, {
+            "document_count": len(document_paths),
+            "documents": document_paths,
+            "metadata": metadata
+        })
+
         logger.info(
             "Document processing completed",
             ingestion_id=ingestion_id
         )
 
     except Exception as e:
+        fail_job(ingestion_id, str(e))
         logger.error(
             "Background document processing failed",
             ingestion_id=ingestion_id,
@@ -2,17 +2,35 @@
 Ontology routes for knowledge graph management and visualization
 """
 
+import hashlib
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel, Field
+import orjson
 import structlog
 
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
 from src.utils.logger import get_logger
 
 logger = get_logger("ontology_routes")
 
 router = APIRouter()
 
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Columns of each table served as its own Arrow IPC stream
+ARROW_TABLE_COLUMNS = {
+    "nodes": ("id", "label", "type"),
+    "edges": ("source", "target", "type", "weight"),
+}
+
+# Clients revalidate with If-None-Match and get a 304 while the ontology is unchanged
+ONTOLOGY_CACHE_CONTROL = "private, max-age=5"
+
 
 class OntologyNode(BaseModel):
     """Model for ontology nodes."""
@@ -44,45 +62,161 @@ class OntologyUpdateRequest(BaseModel):
     llm_assistance: bool = Field(False, description="Use LLM for assistance in updates")
 
 
+class OntologySnapshot:
+    """Columnar copy of the ontology, encoded once per update and shared by every read.
+
+    Nodes and edges are stored as parallel column lists rather than one object
+    per row, and each response body is serialized the first time it is asked
+    for, together with a content-hash ETag.
+    """
+
+    def __init__(self, nodes: Dict[str, List[Any]], edges: Dict[str, List[Any]]):
+        self.nodes = nodes
+        self.edges = edges
+        self._encoded: Dict[str, bytes] = {}
+        self._etags: Dict[str, str] = {}
+
+    def _cached(self, key: str, build) -> bytes:
+        if key not in self._encoded:
+            body = build()
+            self._encoded[key] = body
+            self._etags[key] = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        return self._encoded[key]
+
+    def etag(self, key: str) -> str:
+        """ETag of an already encoded body (``ontology``, ``visualization``, ``columns``,
+        ``arrow_nodes``, ``arrow_edges``)."""
+        return self._etags[key]
+
+    def ontology_json(self) -> bytes:
+        """Body matching ``OntologyResponse``."""
+        nodes, edges = self.nodes, self.edges
+        return self._cached("ontology", lambda: orjson.dumps({
+            "nodes": [
+                {"id": i, "label": l, "type": t, "properties": p}
+                for i, l, t, p in zip(nodes["id"], nodes["label"], nodes["type"], nodes["properties"])
+            ],
+            "edges": [
+                {"source": s, "target": t, "type": ty, "properties": p}
+                for s, t, ty, p in zip(edges["source"], edges["target"], edges["type"], edges["properties"])
+            ],
+            "metadata": {"total_nodes": len(nodes["id"]), "total_edges": len(edges["source"])}
+        }))
+
+    def visualization_json(self) -> bytes:
+        """Node/link body used by the D3.js/React views."""
+        nodes, edges = self.nodes, self.edges
+        return self._cached("visualization", lambda: orjson.dumps({
+            "nodes": [
+                {"id": i, "label": l, "group": t}
+                for i, l, t in zip(nodes["id"], nodes["label"], nodes["type"])
+            ],
+            "links": [
+                {"source": s, "target": t, "value": w}
+                for s, t, w in zip(edges["source"], edges["target"], edges["weight"])
+            ]
+        }))
+
+    def columns_json(self) -> bytes:
+        """Column-oriented body: one array per field instead of one object per row."""
+        return self._cached("columns", lambda: orjson.dumps({
+            "nodes": {k: self.nodes[k] for k in ("id", "label", "type")},
+            "links": {k: self.edges[k] for k in ("source", "target", "type", "weight")}
+        }))
+
+    def arrow_stream(self, table: str) -> bytes:
+        """Arrow IPC stream of one table, ``nodes`` or ``edges``.
+
+        Each table is its own stream: readers stop at the first end-of-stream
+        marker, so two streams in one body would hide the second table.
+        """
+        columns = self.nodes if table == "nodes" else self.edges
+
+        def build() -> bytes:
+            arrow_table = pa.table({k: columns[k] for k in ARROW_TABLE_COLUMNS[table]})
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+            return sink.getvalue().to_pybytes()
+        return self._cached(f"arrow_{table}", build)
+
+
+def _load_ontology_snapshot() -> OntologySnapshot:
+    """Build the ontology snapshot."""
+    # TODO: Implement actual ontology retrieval from Neo4j
+    # For now, return placeholder data
+    return OntologySnapshot(
+        nodes={
+            "id": ["entity_1", "entity_2"],
+            "label": ["Sample Entity", "Related Entity"],
+            "type": ["concept", "concept"],
+            "properties": [
+                {"description": "A sample entity in the knowledge graph"},
+                {"description": "Another entity with relationships"}
+            ]
+        },
+        edges={
+            "source": ["entity_1"],
+            "target": ["entity_2"],
+            "type": ["RELATED_TO"],
+            "weight": [1.0],
+            "properties": [{"strength": 0.8}]
+        }
+    )
+
+
+_ontology_snapshot: Optional[OntologySnapshot] = None
+
+
+def get_ontology_snapshot() -> OntologySnapshot:
+    """Return the cached snapshot, rebuilding it after an invalidation."""
+    global _ontology_snapshot
+    if _ontology_snapshot is None:
+        _ontology_snapshot = _load_ontology_snapshot()
+    return _ontology_snapshot
+
+
+def invalidate_ontology_snapshot():
+    """Drop the cached snapshot so the next read reflects ontology updates."""
+    global _ontology_snapshot
+    _ontology_snapshot = None
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        (tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates
+    )
+
+
+def _cacheable_response(request: Optional[Request],
+                        body: bytes,
+                        etag: str,
+                        media_type: str) -> Response:
+    """Return ``body`` with its ETag, or an empty 304 if the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": ONTOLOGY_CACHE_CONTROL}
+    if request is not None and _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _ontology_response(request: Optional[Request]) -> Response:
+    snapshot = get_ontology_snapshot()
+    body = snapshot.ontology_json()
+    return _cacheable_response(request, body, snapshot.etag("ontology"), "application/json")
+
+
 @router.get("/", response_model=OntologyResponse)
-async def get_ontology(request: Request) -> OntologyResponse:
+async def get_ontology(request: Request) -> Response:
     """Retrieve the current knowledge graph ontology."""
 
     logger.info("Retrieving current ontology")
 
     try:
-        # TODO: Implement actual ontology retrieval from Neo4j
-        # For now, return placeholder data
-
-        nodes = [
-            OntologyNode(
-                id="entity_1",
-                label="Sample Entity",
-                type="concept",
-                properties={"description": "A sample entity in the knowledge graph"}
-            ),
-            OntologyNode(
-                id="entity_2",
-                label="Related Entity",
-                type="concept",
-                properties={"description": "Another entity with relationships"}
-            )
-        ]
-
-        edges = [
-            OntologyEdge(
-                source="entity_1",
-                target="entity_2",
-                type="RELATED_TO",
-                properties={"strength": 0.8}
-            )
-        ]
-
-        return OntologyResponse(
-            nodes=nodes,
-            edges=edges,
-            metadata={"total_nodes": 2, "total_edges": 1}
-        )
+        # Pre-encoded body; bypasses per-row model validation
+        return _ontology_response(request)
 
     except Exception as e:
         logger.error("Failed to retrieve ontology", error=str(e))
@@ -96,7 +230,7 @@ async def get_ontology(request: Request) -> OntologyResponse:
 async def update_ontology(
     request: OntologyUpdateRequest,
     req: Request
-) -> OntologyResponse:
+) -> Response:
     """Update the knowledge graph ontology with optional LLM assistance."""
 
     logger.info(
@@ -117,8 +251,10 @@ async def update_ontology(
             # TODO: Implement LLM-assisted ontology refinement
             pass
 
-        # Return updated ontology
-        return await get_ontology(req)
+        invalidate_ontology_snapshot()
+
+        # Return updated ontology; always the full body, never a 304
+        return _ontology_response(None)
 
     except Exception as e:
         logger.error("Failed to update ontology", error=str(e))
@@ -129,26 +265,35 @@ async def update_ontology(
 
 
 @router.get("/visualize")
-async def visualize_ontology() -> Dict[str, Any]:
-    """Get ontology data formatted for visualization (D3.js/React)."""
+async def visualize_ontology(request: Request, format: str = "json", table: str = "nodes") -> Response:
+    """
+    Get ontology data formatted for visualization (D3.js/React).
+
+    ``format`` selects the body: ``json`` (node/link objects), ``columns``
+    (one array per field) or ``arrow`` (Arrow IPC stream, requires pyarrow).
+    Arrow streams carry one table each; ``table`` picks ``nodes`` or ``edges``.
+    """
+
+    logger.info("Retrieving ontology for visualization", format=format)
 
-    logger.info("Retrieving ontology for visualization")
+    if format not in ("json", "columns", "arrow"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if format == "arrow" and pa is None:
+        raise HTTPException(status_code=501, detail="Arrow output requires pyarrow")
+    if format == "arrow" and table not in ARROW_TABLE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unsupported table: {table}")
 
     try:
-        # TODO: Implement visualization data formatting
-        # For now, return placeholder visualization data
+        snapshot = get_ontology_snapshot()
 
-        visualization_data = {
-            "nodes": [
-                {"id": "entity_1", "label": "Sample Entity", "group": "concept"},
-                {"id": "entity_2", "label": "Related Entity", "group": "concept"}
-            ],
-            "links": [
-                {"source": "entity_1", "target": "entity_2", "value": 1}
-            ]
-        }
+        if format == "arrow":
+            body, key, media_type = snapshot.arrow_stream(table), f"arrow_{table}", ARROW_STREAM_MEDIA_TYPE
+        elif format == "columns":
+            body, key, media_type = snapshot.columns_json(), "columns", "application/json"
+        else:
+            body, key, media_type = snapshot.visualization_json(), "visualization", "application/json"
 
-        return visualization_data
+        return _cacheable_response(request, body, snapshot.etag(key), media_type)
 
     except Exception as e:
         logger.error("Failed to get visualization data", error=str(e))
@@ -4,40 +4,147 @@ Supports Server-Sent Events (SSE) for frontend progress tracking
 """
 
 import uuid
-import json
+import time
+import codecs
 import asyncio
-from typing import Dict, List, Any, Optional, AsyncGenerator
-from datetime import datetime
-from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Set, Any, Optional, AsyncGenerator, TypedDict
+from datetime import datetime, timezone
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import aiofiles
+from cachetools import TTLCache
+import orjson
+import redis.asyncio as aioredis
 import structlog
 
+from src.utils.config_loader import ConfigLoader
 from src.utils.logger import get_logger
 
 logger = get_logger("progress_streaming")
 
 router = APIRouter()
 
-# In-memory storage for progress tracking (use Redis in production)
-PROGRESS_STORE: Dict[str, Dict[str, Any]] = {}
-RESULTS_STORE: Dict[str, Dict[str, Any]] = {}
-
-
-@dataclass
-class ProgressUpdate:
-    """Represents a progress update."""
+# In-memory storage for progress tracking; mirrored to Redis when REDIS_URL is set.
+# Both stores are bounded and expire entries on their own, so finished jobs do not
+# accumulate. Results outlive progress entries, so lookups must not assume both exist.
+PROGRESS_STORE_MAX_JOBS = 10_000
+PROGRESS_TTL_SECONDS = 60 * 60
+RESULTS_TTL_SECONDS = 2 * 60 * 60
+
+PROGRESS_STORE: Dict[str, "ProgressUpdate"] = TTLCache(PROGRESS_STORE_MAX_JOBS, PROGRESS_TTL_SECONDS)
+RESULTS_STORE: Dict[str, Dict[str, Any]] = TTLCache(PROGRESS_STORE_MAX_JOBS, RESULTS_TTL_SECONDS)
+
+# Ids of unfinished jobs by status, kept current by update_progress so /jobs/active
+# does not scan the whole store; finished jobs leave the index. Each status maps ids
+# to None with the same bound and TTL as PROGRESS_STORE, so jobs that never finish
+# expire from the index together with their progress entry
+JOBS_BY_STATUS: Dict[str, Dict[str, None]] = {
+    status: TTLCache(PROGRESS_STORE_MAX_JOBS, PROGRESS_TTL_SECONDS)
+    for status in ("queued", "running")
+}
+
+# One-shot change notifications for in-process SSE streams, one event per waiting
+# stream; update_progress sets and drops them so each stream wakes once per update.
+# Streams remove their own event when they end, so only watched jobs have entries
+PROGRESS_EVENTS: Dict[str, Set[asyncio.Event]] = {}
+
+# Redis job hashes expire on their own, so cleanup_job is optional there
+JOB_KEY_TTL_SECONDS = 2 * 60 * 60
+
+# Documents are processed from disk rather than from in-memory request bodies
+UPLOAD_DIR = Path("uploads")
+UPLOAD_DIR.mkdir(exist_ok=True)
+TEXT_DECODE_CHUNK_SIZE = 1 << 20
+
+# Document jobs run on a fixed pool of workers fed by a bounded queue, so a burst of
+# uploads cannot fan out into an unbounded number of concurrent pipelines
+DOCUMENT_WORKERS = 4
+DOCUMENT_QUEUE_SIZE = 1024
+
+class ProgressUpdate(TypedDict):
+    """Represents a progress update as stored in PROGRESS_STORE."""
     job_id: str
     step: str
     progress: int  # 0-100
     message: str
-    details: Optional[Dict[str, Any]] = None
-    timestamp: datetime = None
+    details: Optional[Dict[str, Any]]
+    timestamp_ns: int  # time.time_ns(); formatted only when sent to a client
+
+
+class ProgressBackend:
+    """Redis-backed job state shared by every API worker.
+    
+    Each job is stored as a hash ``job:{job_id}`` with ``progress`` and
+    ``result`` fields. Every write is also published on a channel of the same
+    name, so SSE streams are pushed updates instead of polling.
+    """
+    
+    def __init__(self, redis_url: str):
+        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+        self._outbox: Optional[asyncio.Queue] = None
+    
+    @staticmethod
+    def job_key(job_id: str) -> str:
+        return f"job:{job_id}"
     
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now()
+    def publish(self, job_id: str, field: str, data: Dict[str, Any]):
+        """Queue a job write; a single writer task applies writes in order."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("No running event loop, progress not mirrored to Redis", job_id=job_id)
+            return
+        
+        if self._outbox is None:
+            self._outbox = asyncio.Queue()
+            loop.create_task(self._drain_outbox())
+        
+        self._outbox.put_nowait((job_id, field, data))
+    
+    async def write(self, job_id: str, field: str, data: Dict[str, Any]):
+        """Apply a job write now, bypassing the queue."""
+        key = self.job_key(job_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, field, orjson.dumps(data, default=str))
+            pipe.expire(key, JOB_KEY_TTL_SECONDS)
+            pipe.publish(key, orjson.dumps({"field": field, "data": data}, default=str))
+            await pipe.execute()
+    
+    async def _drain_outbox(self):
+        while True:
+            job_id, field, data = await self._outbox.get()
+            try:
+                await self.write(job_id, field, data)
+            except Exception as e:
+                logger.error("Failed to mirror job state to Redis", job_id=job_id, error=str(e))
+            finally:
+                self._outbox.task_done()
+    
+    async def flush(self):
+        """Wait until every queued write has been applied."""
+        if self._outbox is not None:
+            await self._outbox.join()
+    
+    async def snapshot(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return the stored ``progress``/``result`` fields for a job."""
+        raw = await self.redis.hgetall(self.job_key(job_id))
+        return {field: orjson.loads(value) for field, value in raw.items()}
+    
+    async def delete(self, job_id: str) -> bool:
+        return bool(await self.redis.delete(self.job_key(job_id)))
+
+
+_config = ConfigLoader()
+progress_backend: Optional[ProgressBackend] = ProgressBackend(_config.redis_url) if _config.redis_url else None
+
+# Jobs run on Celery workers when enabled; their progress only reaches the API through Redis
+USE_CELERY = _config.celery_enabled and progress_backend is not None
+if _config.celery_enabled and progress_backend is None:
+    logger.warning("CELERY_ENABLED requires REDIS_URL, running jobs in-process")
+if USE_CELERY:
+    from src.api.tasks import process_document_task, process_ontology_task
 
 
 class JobRequest(BaseModel):
@@ -65,15 +172,14 @@ def update_progress(job_id: str,
                    details: Optional[Dict[str, Any]] = None):
     """Update progress for a job."""
     
-    progress_update = ProgressUpdate(
-        job_id=job_id,
-        step=step,
-        progress=progress,
-        message=message,
-        details=details
-    )
+    progress_update = _progress_record(job_id, step, progress, message, details)
     
-    PROGRESS_STORE[job_id] = asdict(progress_update)
+    PROGRESS_STORE[job_id] = progress_update
+    _index_job(job_id, None if step in ("completed", "failed") else "queued" if progress == 0 else "running")
+    _notify_job_changed(job_id)
+    
+    if progress_backend is not None:
+        progress_backend.publish(job_id, "progress", progress_update)
     
     logger.info(f"Progress update", 
                job_id=job_id, 
@@ -82,17 +188,74 @@ def update_progress(job_id: str,
                message=message)
 
 
+def _progress_record(job_id: str,
+                     step: str,
+                     progress: int,
+                     message: str,
+                     details: Optional[Dict[str, Any]] = None) -> ProgressUpdate:
+    # Plain dict literal on the hot path: no dataclass construction or asdict() deep copy
+    return {
+        "job_id": job_id,
+        "step": step,
+        "progress": progress,
+        "message": message,
+        "details": details,
+        "timestamp_ns": time.time_ns()
+    }
+
+
+async def record_queued(job_id: str, message: str):
+    """Record a new job as queued before its id is returned to the client.
+    
+    Celery jobs are only visible through the shared backend, so that write is
+    awaited instead of queued; otherwise a status or stream request sent right
+    after the response could find no job.
+    """
+    if USE_CELERY:
+        await progress_backend.write(job_id, "progress", _progress_record(job_id, "queued", 0, message))
+        logger.info("Progress update", job_id=job_id, step="queued", progress=0, message=message)
+    else:
+        update_progress(job_id, "queued", 0, message)
+
+
+def _index_job(job_id: str, status: Optional[str]):
+    """Move a job to the ``status`` index of JOBS_BY_STATUS, or drop it when ``None``."""
+    for job_ids in JOBS_BY_STATUS.values():
+        job_ids.pop(job_id, None)
+    if status is not None:
+        JOBS_BY_STATUS[status][job_id] = None
+
+
+def _notify_job_changed(job_id: str):
+    """Wake every stream waiting on this job."""
+    for event in PROGRESS_EVENTS.pop(job_id, ()):
+        event.set()
+
+
+def _discard_waiter(job_id: str, event: Optional[asyncio.Event]):
+    """Drop a stream's change event, and the job's entry once nobody waits on it."""
+    waiters = PROGRESS_EVENTS.get(job_id)
+    if waiters is None or event is None:
+        return
+    waiters.discard(event)
+    if not waiters:
+        del PROGRESS_EVENTS[job_id]
+
+
 def complete_job(job_id: str, result: Dict[str, Any]):
     """Mark job as completed with result."""
     
     RESULTS_STORE[job_id] = {
         "status": "completed",
         "result": result,
-        "completed_at": datetime.now().isoformat()
+        "completed_at_ns": time.time_ns()
     }
     
     update_progress(job_id, "completed", 100, "Job completed successfully")
     
+    if progress_backend is not None:
+        progress_backend.publish(job_id, "result", RESULTS_STORE[job_id])
+    
     logger.info(f"Job completed", job_id=job_id)
 
 
@@ -102,28 +265,44 @@ def fail_job(job_id: str, error: str):
     RESULTS_STORE[job_id] = {
         "status": "failed",
         "error": error,
-        "completed_at": datetime.now().isoformat()
+        "completed_at_ns": time.time_ns()
     }
     
     update_progress(job_id, "failed", 0, f"Job failed: {error}")
     
+    if progress_backend is not None:
+        progress_backend.publish(job_id, "result", RESULTS_STORE[job_id])
+    
     logger.error(f"Job failed", job_id=job_id, error=error)
 
 
 async def process_document_with_progress(job_id: str, 
-                                       file_content: bytes, 
-                                       filename: str):
-    """Process document with progress updates."""
+                                       file_path: str, 
+                                       filename: str,
+                                       delete_file: bool = False):
+    """Process document with progress updates.
+
+    ``delete_file`` removes ``file_path`` once the job finishes, for temporary
+    files written from inline content.
+    """
     
     try:
         update_progress(job_id, "starting", 5, "Initializing document processing")
         
-        # Simulate text extraction
-        await asyncio.sleep(0.5)
-        text = file_content.decode('utf-8', errors='ignore')
+        # Decode fixed-size binary chunks incrementally; only a running count is kept,
+        # so neither the raw bytes nor the decoded text is held in memory
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        char_count = 0
+        async with aiofiles.open(file_path, 'rb') as f:
+            while True:
+                chunk = await f.read(TEXT_DECODE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                char_count += len(decoder.decode(chunk))
+        char_count += len(decoder.decode(b'', final=True))
         doc_id = str(uuid.uuid4())
         
-        update_progress(job_id, "text_extraction", 15, f"Extracted {len(text)} characters")
+        update_progress(job_id, "text_extraction", 15, f"Extracted {char_count} characters")
         
         # Simulate ontology generation
         await asyncio.sleep(1.0)
@@ -149,7 +328,7 @@ async def process_document_with_progress(job_id: str,
         result = {
             "doc_id": doc_id,
             "filename": filename,
-            "char_count": len(text),
+            "char_count": char_count,
             "entities_extracted": 25,  # Mock data
             "relationships_found": 18,
             "embeddings_stored": 12,
@@ -162,6 +341,9 @@ async def process_document_with_progress(job_id: str,
         
     except Exception as e:
         fail_job(job_id, str(e))
+    finally:
+        if delete_file:
+            Path(file_path).unlink(missing_ok=True)
 
 
 async def process_ontology_with_progress(job_id: str, 
@@ -211,29 +393,96 @@ async def process_ontology_with_progress(job_id: str,
         fail_job(job_id, str(e))
 
 
+class DocumentWorkerPool:
+    """Fixed set of worker tasks draining a bounded queue of document jobs.
+    
+    Workers are started on the first submission so they bind to the running
+    event loop.
+    """
+    
+    def __init__(self, workers: int, maxsize: int):
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+    
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+    
+    def submit(self, **job: Any):
+        """Queue a ``process_document_with_progress`` call without waiting for it."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._worker(i)) for i in range(self.workers)]
+        
+        self._queue.put_nowait(job)
+    
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await process_document_with_progress(**job)
+            except Exception as e:
+                logger.error("Document worker failed", worker_id=worker_id,
+                             job_id=job.get("job_id"), error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+document_workers = DocumentWorkerPool(DOCUMENT_WORKERS, DOCUMENT_QUEUE_SIZE)
+
+
+def _resolve_upload_path(file_path: str) -> str:
+    """Resolve a client-supplied path, rejecting anything outside UPLOAD_DIR."""
+    path = Path(file_path).resolve()
+    if not path.is_relative_to(UPLOAD_DIR.resolve()) or not path.is_file():
+        raise HTTPException(status_code=400, detail="file_path must name a file in the uploads directory")
+    return str(path)
+
+
 @router.post("/jobs/start-document-processing")
 async def start_document_processing(
-    request: JobRequest,
-    background_tasks: BackgroundTasks
+    request: JobRequest
 ) -> Dict[str, Any]:
     """Start document processing job."""
     
-    job_id = str(uuid.uuid4())
-    
-    # Initialize progress
-    update_progress(job_id, "queued", 0, "Job queued for processing")
+    if not USE_CELERY and document_workers.full():
+        raise HTTPException(status_code=503, detail="Document processing queue is full, retry later")
     
     # Extract parameters
-    file_content = request.parameters.get("file_content", b"")
     filename = request.parameters.get("filename", "unknown.txt")
+    file_path = request.parameters.get("file_path")
+    if file_path is not None:
+        file_path = _resolve_upload_path(file_path)
     
-    # Start background processing
-    background_tasks.add_task(
-        process_document_with_progress,
-        job_id,
-        file_content,
-        filename
-    )
+    job_id = str(uuid.uuid4())
+    
+    # Initialize progress
+    await record_queued(job_id, "Job queued for processing")
+    
+    delete_file = file_path is None
+    if delete_file:
+        # Inline content is written to disk once so processing can stream it
+        file_content = request.parameters.get("file_content", "")
+        if isinstance(file_content, str):
+            file_content = file_content.encode('utf-8')
+        
+        file_path = str(UPLOAD_DIR / f"{job_id}_{Path(filename).name}")
+        async with aiofiles.open(file_path, 'wb') as f:
+            await f.write(file_content)
+    
+    # Hand off to the Celery workers or the in-process worker pool
+    if USE_CELERY:
+        # Publishing to the broker is blocking I/O; keep it off the event loop
+        await asyncio.to_thread(process_document_task.delay, job_id, file_path, filename, delete_file)
+    else:
+        document_workers.submit(
+            job_id=job_id,
+            file_path=file_path,
+            filename=filename,
+            delete_file=delete_file
+        )
     
     return {
         "success": True,
@@ -253,19 +502,22 @@ async def start_ontology_generation(
     job_id = str(uuid.uuid4())
     
     # Initialize progress
-    update_progress(job_id, "queued", 0, "Ontology generation queued")
+    await record_queued(job_id, "Ontology generation queued")
     
     # Extract parameters
     text = request.parameters.get("text", "")
     doc_id = request.parameters.get("doc_id", str(uuid.uuid4()))
     
     # Start background processing
-    background_tasks.add_task(
-        process_ontology_with_progress,
-        job_id,
-        text,
-        doc_id
-    )
+    if USE_CELERY:
+        await asyncio.to_thread(process_ontology_task.delay, job_id, text, doc_id)
+    else:
+        background_tasks.add_task(
+            process_ontology_with_progress,
+            job_id,
+            text,
+            doc_id
+        )
     
     return {
         "success": True,
@@ -275,15 +527,65 @@ async def start_ontology_generation(
     }
 
 
+async def _load_job(job_id: str):
+    """Return ``(progress_data, result_data)`` from this worker or the shared backend."""
+    
+    progress_data = PROGRESS_STORE.get(job_id)
+    result_data = RESULTS_STORE.get(job_id)
+    
+    if progress_data is None and result_data is None and progress_backend is not None:
+        snapshot = await progress_backend.snapshot(job_id)
+        progress_data = snapshot.get("progress")
+        result_data = snapshot.get("result")
+    
+    return progress_data, result_data
+
+
+def _sse(payload: Dict[str, Any]) -> bytes:
+    """Encode one Server-Sent Events frame as raw bytes."""
+    return b"data: " + orjson.dumps(payload, default=str) + b"\n\n"
+
+
+def _format_ns(timestamp_ns: Optional[int]) -> Optional[str]:
+    """Convert a stored ``time.time_ns()`` value to an ISO-8601 UTC string."""
+    if timestamp_ns is None:
+        return None
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat()
+
+
+def _progress_event(job_id: str, progress_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "progress": progress_data.get("progress", 0),
+        "step": progress_data.get("step", ""),
+        "message": progress_data.get("message", ""),
+        "details": progress_data.get("details"),
+        "timestamp": _format_ns(progress_data.get("timestamp_ns"))
+    }
+
+
+def _final_event(job_id: str, result_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "status": result_data.get("status"),
+        "result": result_data.get("result"),
+        "error": result_data.get("error"),
+        "completed_at": _format_ns(result_data.get("completed_at_ns"))
+    }
+
+
 @router.get("/jobs/{job_id}/status")
 async def get_job_status(job_id: str) -> JobStatus:
     """Get current job status."""
     
-    if job_id not in PROGRESS_STORE:
+    progress_data, result_data = await _load_job(job_id)
+    
+    if progress_data is None and result_data is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    progress_data = PROGRESS_STORE[job_id]
-    result_data = RESULTS_STORE.get(job_id, {})
+    # A result can outlive its expired progress entry
+    progress_data = progress_data or {"progress": 100 if result_data.get("status") == "completed" else 0}
+    result_data = result_data or {}
     
     status = "running"
     if result_data.get("status") == "completed":
@@ -298,13 +600,57 @@ async def get_job_status(job_id: str) -> JobStatus:
         status=status,
         progress=progress_data.get("progress", 0),
         message=progress_data.get("message", ""),
-        started_at=progress_data.get("timestamp"),
-        completed_at=result_data.get("completed_at"),
+        started_at=_format_ns(progress_data.get("timestamp_ns")),
+        completed_at=_format_ns(result_data.get("completed_at_ns")),
         result=result_data.get("result"),
         error=result_data.get("error")
     )
 
 
+async def _generate_backend_stream(job_id: str, max_wait_time: float) -> AsyncGenerator[bytes, None]:
+    """Generate SSE frames for a job from Redis pub/sub notifications."""
+    
+    pubsub = progress_backend.redis.pubsub()
+    await pubsub.subscribe(ProgressBackend.job_key(job_id))
+    
+    try:
+        # Read the current state only after subscribing so no update is missed
+        snapshot = await progress_backend.snapshot(job_id)
+        if "progress" not in snapshot:
+            yield _sse({'error': 'Job not found'})
+            return
+        
+        pending = [{"field": field, "data": snapshot[field]}
+                   for field in ("progress", "result") if field in snapshot]
+        last_progress = -1
+        deadline = asyncio.get_running_loop().time() + max_wait_time
+        
+        while True:
+            for message in pending:
+                if message["field"] == "result":
+                    final_event = _final_event(job_id, message["data"])
+                    yield _sse(final_event)
+                    return
+                
+                progress_data = message["data"]
+                if progress_data.get("progress", 0) != last_progress:
+                    event_data = _progress_event(job_id, progress_data)
+                    yield _sse(event_data)
+                    last_progress = progress_data.get("progress", 0)
+            
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                yield _sse({'error': 'Stream timeout'})
+                return
+            
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            pending = [orjson.loads(message["data"])] if message else []
+    
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.close()
+
+
 @router.get("/jobs/{job_id}/stream")
 async def stream_job_progress(job_id: str):
     """Stream job progress via Server-Sent Events."""
@@ -314,52 +660,65 @@ async def stream_job_progress(job_id: str):
         
         last_progress = -1
         max_wait_time = 300  # 5 minutes max wait
-        wait_time = 0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait_time
         
-        while wait_time < max_wait_time:
-            # Check if job exists
-            if job_id not in PROGRESS_STORE:
-                yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
-                break
-            
-            progress_data = PROGRESS_STORE[job_id]
-            current_progress = progress_data.get("progress", 0)
-            
-            # Send update if progress changed
-            if current_progress != last_progress:
-                event_data = {
-                    "job_id": job_id,
-                    "progress": current_progress,
-                    "step": progress_data.get("step", ""),
-                    "message": progress_data.get("message", ""),
-                    "details": progress_data.get("details"),
-                    "timestamp": progress_data.get("timestamp")
-                }
+        if progress_backend is not None and job_id not in PROGRESS_STORE and job_id not in RESULTS_STORE:
+            # Job is owned by another worker; follow it through Redis pub/sub
+            async for frame in _generate_backend_stream(job_id, max_wait_time):
+                yield frame
+            return
+        
+        event: Optional[asyncio.Event] = None
+        try:
+            while True:
+                # Register the change event before reading state so an update that
+                # lands while a frame is being sent still wakes the wait below.
+                # Unknown jobs get no event; the lookup below ends their stream
+                _discard_waiter(job_id, event)
+                event = None
+                if job_id in PROGRESS_STORE or job_id in RESULTS_STORE:
+                    event = asyncio.Event()
+                    PROGRESS_EVENTS.setdefault(job_id, set()).add(event)
                 
-                yield f"data: {json.dumps(event_data, default=str)}\n\n"
-                last_progress = current_progress
-            
-            # Check if job is completed
-            if job_id in RESULTS_STORE:
-                result_data = RESULTS_STORE[job_id]
-                final_event = {
-                    "job_id": job_id,
-                    "status": result_data.get("status"),
-                    "result": result_data.get("result"),
-                    "error": result_data.get("error"),
-                    "completed_at": result_data.get("completed_at")
-                }
+                # Single lookups: entries can expire between a membership test and a read
+                progress_data = PROGRESS_STORE.get(job_id)
+                result_data = RESULTS_STORE.get(job_id)
                 
-                yield f"data: {json.dumps(final_event, default=str)}\n\n"
-                break
-            
-            # Wait before next check
-            await asyncio.sleep(0.5)
-            wait_time += 0.5
-        
-        # Send timeout if job didn't complete
-        if wait_time >= max_wait_time:
-            yield f"data: {json.dumps({'error': 'Stream timeout'})}\n\n"
+                # Check if job exists
+                if progress_data is None and result_data is None:
+                    yield _sse({'error': 'Job not found'})
+                    break
+                
+                current_progress = progress_data.get("progress", 0) if progress_data else last_progress
+                
+                # Send update if progress changed
+                if current_progress != last_progress:
+                    event_data = _progress_event(job_id, progress_data)
+                    
+                    yield _sse(event_data)
+                    last_progress = current_progress
+                
+                # Check if job is completed
+                if result_data is not None:
+                    final_event = _final_event(job_id, result_data)
+                    
+                    yield _sse(final_event)
+                    break
+                
+                # Sleep until the job changes instead of polling
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    yield _sse({'error': 'Stream timeout'})
+                    break
+                
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Runs on normal exit and when the client disconnects mid-stream
+            _discard_waiter(job_id, event)
     
     return StreamingResponse(
         generate_progress_stream(),
@@ -377,10 +736,10 @@ async def stream_job_progress(job_id: str):
 async def get_job_result(job_id: str) -> Dict[str, Any]:
     """Get final job result."""
     
-    if job_id not in RESULTS_STORE:
-        raise HTTPException(status_code=404, detail="Job result not found")
+    _, result_data = await _load_job(job_id)
     
-    result_data = RESULTS_STORE[job_id]
+    if result_data is None:
+        raise HTTPException(status_code=404, detail="Job result not found")
     
     return {
         "success": result_data.get("status") == "completed",
@@ -388,7 +747,7 @@ async def get_job_result(job_id: str) -> Dict[str, Any]:
         "status": result_data.get("status"),
         "result": result_data.get("result"),
         "error": result_data.get("error"),
-        "completed_at": result_data.get("completed_at")
+        "completed_at": _format_ns(result_data.get("completed_at_ns"))
     }
 
 
@@ -396,13 +755,12 @@ async def get_job_result(job_id: str) -> Dict[str, Any]:
 async def cleanup_job(job_id: str) -> Dict[str, Any]:
     """Clean up job data."""
     
-    removed_progress = job_id in PROGRESS_STORE
-    removed_result = job_id in RESULTS_STORE
-    
-    if removed_progress:
-        del PROGRESS_STORE[job_id]
-    if removed_result:
-        del RESULTS_STORE[job_id]
+    removed_progress = PROGRESS_STORE.pop(job_id, None) is not None
+    removed_result = RESULTS_STORE.pop(job_id, None) is not None
+    _index_job(job_id, None)
+    _notify_job_changed(job_id)
+    if progress_backend is not None:
+        removed_result = await progress_backend.delete(job_id) or removed_result
     
     return {
         "success": removed_progress or removed_result,
@@ -413,29 +771,27 @@ async def cleanup_job(job_id: str) -> Dict[str, Any]:
 
 @router.get("/jobs/active")
 async def get_active_jobs() -> Dict[str, Any]:
-    """Get list of active jobs."""
+    """Get list of queued and running jobs."""
     
     active_jobs = []
     
-    for job_id, progress_data in PROGRESS_STORE.items():
-        result_data = RESULTS_STORE.get(job_id, {})
-        
-        status = "running"
-        if result_data.get("status") == "completed":
-            status = "completed"
-        elif result_data.get("status") == "failed":
-            status = "failed"
-        elif progress_data.get("progress", 0) == 0:
-            status = "queued"
-        
-        active_jobs.append({
-            "job_id": job_id,
-            "status": status,
-            "progress": progress_data.get("progress", 0),
-            "step": progress_data.get("step", ""),
-            "message": progress_data.get("message", ""),
-            "timestamp": progress_data.get("timestamp")
-        })
+    # Walk only the unfinished-job index; copy the keys since entries are pruned below
+    for status, job_ids in JOBS_BY_STATUS.items():
+        for job_id in list(job_ids):
+            progress_data = PROGRESS_STORE.get(job_id)
+            if progress_data is None:
+                # Progress entry was evicted before its index entry expired
+                job_ids.pop(job_id, None)
+                continue
+            
+            active_jobs.append({
+                "job_id": job_id,
+                "status": status,
+                "progress": progress_data.get("progress", 0),
+                "step": progress_data.get("step", ""),
+                "message": progress_data.get("message", ""),
+                "timestamp": _format_ns(progress_data.get("timestamp_ns"))
+            })
     
     return {
         "success": True,
@@ -2,11 +2,14 @@
 Retrieval routes for hybrid RAG queries and responses
 """
 
-from typing import Dict, Any, Optional, AsyncGenerator
-from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.responses import StreamingResponse
+import asyncio
+import hashlib
+from typing import Dict, Any, Optional, AsyncGenerator, Union
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from pydantic import BaseModel, Field
-import json
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
+from cachetools import TTLCache
+import orjson
 import structlog
 
 from src.utils.logger import get_logger
@@ -16,6 +19,36 @@ logger = get_logger("retrieval_routes")
 router = APIRouter()
 
 
+# Interval between keepalive pings on SSE streams
+SSE_PING_SECONDS = 15
+
+
+def _sse(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Build one ``step`` Server-Sent Event for EventSourceResponse."""
+    return {"event": "step", "data": orjson.dumps(payload).decode()}
+
+
+# Intermediate reasoning steps are identical for every query, so their SSE frames
+# are encoded once here; EventSourceResponse sends pre-encoded bytes unchanged
+_STAGE_MESSAGES = [
+    ('analysis', 'Analyzing query intent...'),
+    ('routing', 'Selecting retrieval tools (vector + graph + filter)...'),
+    ('vector_search', 'Performing semantic similarity search...'),
+    ('graph_traversal', 'Traversing knowledge graph relationships...'),
+    ('logical_filter', 'Applying attribute and metadata filters...'),
+    ('synthesis', 'Synthesizing final response...'),
+]
+_STAGE_FRAMES = [
+    ServerSentEvent(
+        event="step",
+        data=orjson.dumps({'step': step, 'message': message}).decode()
+    ).encode()
+    for step, message in _STAGE_MESSAGES
+]
+# Simulated processing time after each step
+_STAGE_SLEEPS = [0.5, 0.5, 1, 1, 0.5, 0.5]
+
+
 class QueryRequest(BaseModel):
     """Request model for queries."""
     query: str = Field(..., description="Natural language query")
@@ -32,10 +65,26 @@ class QueryResponse(BaseModel):
     confidence: Optional[float] = None
 
 
+# Answers to repeated queries are reused for an hour, keyed by _query_cache_key
+QUERY_CACHE_MAX_ENTRIES = 10_000
+QUERY_CACHE_TTL_SECONDS = 3600
+QUERY_CACHE: "TTLCache[str, QueryResponse]" = TTLCache(maxsize=QUERY_CACHE_MAX_ENTRIES, ttl=QUERY_CACHE_TTL_SECONDS)
+
+
+def _query_cache_key(request: QueryRequest) -> str:
+    """Hash of the case- and whitespace-normalized query with its context and result limit."""
+    normalized = " ".join(request.query.lower().split())
+    context = orjson.dumps(request.context or {}, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(
+        normalized.encode() + b"|" + str(request.max_results).encode() + b"|" + context
+    ).hexdigest()
+
+
 @router.post("/", response_model=QueryResponse)
 async def submit_query(
     request: QueryRequest,
-    req: Request
+    req: Request,
+    response: Response
 ) -> QueryResponse:
     """
     Submit a natural language query for hybrid RAG processing.
@@ -49,19 +98,28 @@ async def submit_query(
         max_results=request.max_results
     )
 
+    cache_key = _query_cache_key(request)
+    cached = QUERY_CACHE.get(cache_key)
+    if cached is not None:
+        response.headers["X-Cache"] = "HIT"
+        return cached
+
     try:
         # TODO: Implement actual query processing
         # For now, return a placeholder response
 
         query_id = "query_123"  # Generate unique ID
 
-        return QueryResponse(
+        result = QueryResponse(
             query_id=query_id,
             response="This is a placeholder response. The agentic retrieval system will process your query using vector search, graph traversal, and logical filtering.",
             reasoning="Query routed through hybrid retrieval pipeline",
             sources=["placeholder_source"],
             confidence=0.85
         )
+        QUERY_CACHE[cache_key] = result
+        response.headers["X-Cache"] = "MISS"
+        return result
 
     except Exception as e:
         logger.error("Failed to process query", error=str(e))
@@ -72,7 +130,7 @@ async def submit_query(
 
 
 @router.get("/stream/{query_id}")
-async def stream_query_results(query_id: str) -> StreamingResponse:
+async def stream_query_results(query_id: str) -> EventSourceResponse:
     """
     Stream real-time query results and reasoning chains.
 
@@ -81,35 +139,13 @@ async def stream_query_results(query_id: str) -> StreamingResponse:
 
     logger.info("Starting query stream", query_id=query_id)
 
-    async def generate_stream() -> AsyncGenerator[str, None]:
+    async def generate_stream() -> AsyncGenerator[Union[bytes, Dict[str, str]], None]:
         """Generate streaming response with reasoning steps."""
 
         try:
-            # Step 1: Query analysis
-            yield f"data: {json.dumps({'step': 'analysis', 'message': 'Analyzing query intent...'})}\n\n"
-            # Simulate processing time
-            import asyncio
-            await asyncio.sleep(0.5)
-
-            # Step 2: Tool selection
-            yield f"data: {json.dumps({'step': 'routing', 'message': 'Selecting retrieval tools (vector + graph + filter)...'})}\n\n"
-            await asyncio.sleep(0.5)
-
-            # Step 3: Vector search
-            yield f"data: {json.dumps({'step': 'vector_search', 'message': 'Performing semantic similarity search...'})}\n\n"
-            await asyncio.sleep(1)
-
-            # Step 4: Graph traversal
-            yield f"data: {json.dumps({'step': 'graph_traversal', 'message': 'Traversing knowledge graph relationships...'})}\n\n"
-            await asyncio.sleep(1)
-
-            # Step 5: Logical filtering
-            yield f"data: {json.dumps({'step': 'logical_filter', 'message': 'Applying attribute and metadata filters...'})}\n\n"
-            await asyncio.sleep(0.5)
-
-            # Step 6: Response synthesis
-            yield f"data: {json.dumps({'step': 'synthesis', 'message': 'Synthesizing final response...'})}\n\n"
-            await asyncio.sleep(0.5)
+            for frame, delay in zip(_STAGE_FRAMES, _STAGE_SLEEPS):
+                yield frame
+                await asyncio.sleep(delay)
 
             # Final result
             final_response = {
@@ -119,7 +155,7 @@ async def stream_query_results(query_id: str) -> StreamingResponse:
                 'reasoning': 'Used hybrid approach: vector similarity + graph relationships + logical filtering',
                 'confidence': 0.87
             }
-            yield f"data: {json.dumps(final_response)}\n\n"
+            yield _sse(final_response)
 
         except Exception as e:
             logger.error("Streaming query failed", query_id=query_id, error=str(e))
@@ -127,17 +163,10 @@ async def stream_query_results(query_id: str) -> StreamingResponse:
                 'step': 'error',
                 'error': str(e)
             }
-            yield f"data: {json.dumps(error_response)}\n\n"
-
-    return StreamingResponse(
-        generate_stream(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream"
-        }
-    )
+            yield _sse(error_response)
+
+    # Sets the SSE headers, pings idle clients and stops the generator on disconnect
+    return EventSourceResponse(generate_stream(), ping=SSE_PING_SECONDS)
 
 
 @router.get("/{query_id}", response_model=QueryResponse)
@@ -4,36 +4,124 @@ Simple upload routes for document processing
 
 import os
 import uuid
+import hashlib
 import time
 from pathlib import Path
-from typing import Optional, Dict, Any
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional, Dict, Any, List, Set, Deque, Tuple, AsyncGenerator
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import aiofiles
+from sse_starlette.sse import EventSourceResponse
 import asyncio
-import json
-from typing import Dict, List
-from collections import defaultdict
+import orjson
+from collections import defaultdict, deque
+from itertools import islice
+
+from src.api.upload_store import UploadStore
+from src.utils.logger import get_logger
+
+logger = get_logger("simple_upload_routes")
 
 router = APIRouter()
 
+# Per-document log history is a bounded ring buffer, dropped a while after processing ends
+MAX_LOGS_PER_DOCUMENT = 512
+LOG_RETENTION_SECONDS = 15 * 60
+
+
+class DocumentLog:
+    """Append-only processing log for one document, shared by every SSE reader.
+
+    Each entry is kept with its JSON encoding so it is serialized once no matter how
+    many clients read it. Readers remember the ``version`` they have seen and wait on
+    ``changed`` for newer entries instead of each holding a queue of copies.
+    """
+
+    def __init__(self):
+        self.entries: Deque[Tuple[Dict[str, Any], str]] = deque(maxlen=MAX_LOGS_PER_DOCUMENT)
+        self.version = 0
+        self.changed = asyncio.Condition()
+
+    async def append(self, entry: Dict[str, Any], payload: str):
+        async with self.changed:
+            self.entries.append((entry, payload))
+            self.version += 1
+            self.changed.notify_all()
+
+    def payloads_since(self, version: int) -> List[str]:
+        """Encoded entries appended after ``version``, minus any the ring buffer already dropped."""
+        skip = max(0, len(self.entries) - (self.version - version))
+        return [payload for _, payload in islice(self.entries, skip, None)]
+
+    def frame_since(self, version: int) -> str:
+        """One SSE data payload for the entries after ``version``.
+
+        A single entry is sent as-is; several are wrapped as ``{"batch": [...]}`` by
+        splicing their existing encodings rather than serializing them again.
+        """
+        return _batch_frame(self.payloads_since(version))
+
+
+def _batch_frame(payloads: List[str]) -> str:
+    """Send one encoded entry as-is, or splice several into ``{"batch": [...]}``."""
+    if len(payloads) == 1:
+        return payloads[0]
+    return '{"batch":[' + ','.join(payloads) + ']}'
+
+
 # Global storage for processing logs
-processing_logs: Dict[str, List[str]] = defaultdict(list)
-active_connections: Dict[str, List] = defaultdict(list)
+processing_logs: Dict[str, DocumentLog] = defaultdict(DocumentLog)
 
 # Upload directory
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Durable upload records (looked up by sha256, so re-uploading the same file returns
+# the existing document instead of reprocessing) and log history for status after restarts
+upload_store = UploadStore(UPLOAD_DIR / "uploads.db")
+
+# Largest accepted upload (10MB), plus slack for the multipart boundary and part
+# headers when judging a request by its Content-Length
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Uploads are copied to disk in chunks of this size, so at most one chunk per request is in memory
+UPLOAD_CHUNK_SIZE = 1 << 16
+
+# Interval between keepalive pings on SSE streams
+SSE_PING_SECONDS = 15
+
+# Log lines arriving within this window of each other go out as one SSE frame
+LOG_BATCH_WINDOW_SECONDS = 0.02
+
+# Streams of documents processed outside this process re-read the stored log at this interval
+STORED_LOG_POLL_SECONDS = 1.0
+
+# Accepted upload extensions, lowercase and without the leading dot
+ALLOWED_EXTENSIONS = frozenset({'pdf', 'doc', 'docx', 'txt', 'md', 'rtf', 'odt'})
+_ALLOWED_TYPES_MESSAGE = f"Allowed types: {', '.join('.' + ext for ext in sorted(ALLOWED_EXTENSIONS))}"
+
+
 class UploadResponse(BaseModel):
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+def _file_too_large() -> JSONResponse:
+    return JSONResponse(
+        status_code=413,
+        content=UploadResponse(
+            success=False,
+            message="File too large",
+            error="Maximum file size is 10MB"
+        ).dict()
+    )
+
 @router.post("/upload", response_model=UploadResponse)
 async def upload_document(
+    request: Request,
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = None
 ) -> JSONResponse:
@@ -45,61 +133,89 @@ async def upload_document(
     
     try:
         # Validate file type
-        allowed_extensions = {'.pdf', '.doc', '.docx', '.txt', '.md', '.rtf', '.odt'}
-        file_extension = Path(file.filename).suffix.lower()
+        _, dot, file_extension = (file.filename or '').rpartition('.')
         
-        if file_extension not in allowed_extensions:
+        if not dot or file_extension.lower() not in ALLOWED_EXTENSIONS:
             return JSONResponse(
                 status_code=400,
                 content=UploadResponse(
                     success=False,
                     message="File type not supported",
-                    error=f"Allowed types: {', '.join(allowed_extensions)}"
+                    error=_ALLOWED_TYPES_MESSAGE
                 ).dict()
             )
         
-        # Validate file size (10MB limit)
-        max_size = 10 * 1024 * 1024  # 10MB
-        content = await file.read()
-        
-        if len(content) > max_size:
-            return JSONResponse(
-                status_code=400,
-                content=UploadResponse(
-                    success=False,
-                    message="File too large",
-                    error="Maximum file size is 10MB"
-                ).dict()
-            )
+        # Validate file size (10MB limit) from the declared sizes before touching the bytes
+        try:
+            declared_length = int(request.headers.get("content-length", 0))
+        except ValueError:
+            declared_length = 0
+        if declared_length > MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD or (file.size or 0) > MAX_UPLOAD_SIZE:
+            return _file_too_large()
         
         # Generate unique document ID
         doc_id = str(uuid.uuid4())
         
-        # Initialize processing logs
-        processing_logs[doc_id] = []
-        
-        # Save file
+        # Save file, counting bytes as they arrive and stopping as soon as the limit is passed
         file_path = UPLOAD_DIR / f"{doc_id}_{file.filename}"
+        file_size = 0
+        content_hash = hashlib.sha256()
         
         async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                file_size += len(chunk)
+                if file_size > MAX_UPLOAD_SIZE:
+                    break
+                content_hash.update(chunk)
+                await f.write(chunk)
+        
+        # Backstop for uploads whose size was not declared
+        if file_size > MAX_UPLOAD_SIZE:
+            os.remove(file_path)
+            return _file_too_large()
+        
+        # Same content already processed: drop the new copy and return the existing
+        # document. Uploads that failed or never finished are processed again.
+        digest = content_hash.hexdigest()
+        existing = await upload_store.find_by_sha256(digest)
+        if (existing is not None and existing["status"] == "completed"
+                and Path(existing["file_path"]).exists()):
+            os.remove(file_path)
+            return JSONResponse(
+                status_code=200,
+                content=UploadResponse(
+                    success=True,
+                    message="File already uploaded",
+                    data={**existing, "filename": file.filename, "deduplicated": True}
+                ).dict()
+            )
+        
+        # Initialize processing logs
+        processing_logs[doc_id] = DocumentLog()
         
         # Start processing in background
         if background_tasks:
             background_tasks.add_task(process_document_with_streaming, doc_id, str(file_path))
         
+        upload_data = {
+            "doc_id": doc_id,
+            "filename": file.filename,
+            "file_size": file_size,
+            "file_path": str(file_path),
+            "sha256": digest,
+            "upload_timestamp": time.time()
+        }
+        await upload_store.add_document(upload_data)
+        
         return JSONResponse(
             status_code=200,
             content=UploadResponse(
                 success=True,
                 message="File uploaded successfully",
-                data={
-                    "doc_id": doc_id,
-                    "filename": file.filename,
-                    "file_size": len(content),
-                    "file_path": str(file_path),
-                    "upload_timestamp": time.time()
-                }
+                data={**upload_data, "deduplicated": False}
             ).dict()
         )
         
@@ -122,58 +238,162 @@ async def add_processing_log(doc_id: str, message: str, step: int = None, total_
         "total_steps": total_steps,
         "doc_id": doc_id
     }
-    processing_logs[doc_id].append(log_entry)
-    
-    # Notify connected clients
-    if doc_id in active_connections:
-        for connection in active_connections[doc_id]:
-            try:
-                await connection.put(json.dumps(log_entry))
-            except:
-                # Remove dead connections
-                active_connections[doc_id].remove(connection)
+    payload = orjson.dumps(log_entry).decode()
+    # Wakes every connected stream; each reads the new entries from the shared log
+    await processing_logs[doc_id].append(log_entry, payload)
+    try:
+        await upload_store.add_log(log_entry)
+    except Exception as e:
+        logger.warning("Failed to persist processing log", doc_id=doc_id, error=str(e))
+
+
+async def _set_upload_status(doc_id: str, status: str):
+    try:
+        await upload_store.set_status(doc_id, status)
+    except Exception as e:
+        logger.warning("Failed to persist upload status", doc_id=doc_id, status=status, error=str(e))
+
+
+async def _upload_status(doc_id: str, logs: List[Dict[str, Any]]) -> str:
+    """Processing status persisted for a document, read from its log if the record was replaced."""
+    status = await upload_store.get_status(doc_id)
+    if status is not None:
+        return status
+    # A later upload of the same content replaced the record; the summary line
+    # follows the completion line, so look past the last entry
+    messages = [entry["message"] for entry in logs]
+    if any("completed successfully" in message for message in messages):
+        return "completed"
+    if any("❌" in message for message in messages):
+        return "error"
+    return "processing"
+
+
+def schedule_log_cleanup(doc_id: str):
+    """Free a finished document's logs once late status/stream readers have had time to fetch them."""
+    asyncio.get_running_loop().call_later(LOG_RETENTION_SECONDS, processing_logs.pop, doc_id, None)
+
+PIPELINE_STEPS = 6
+
+# Entities leave the ontology stage in batches, so resolution, embedding and graph
+# construction start on the first batch instead of waiting for the whole document
+ENTITY_BATCHES = 3
+_END_OF_STAGE = None
+
+
+class _StageTracker:
+    """Reports the highest pipeline step currently in flight."""
+
+    def __init__(self, doc_id: str):
+        self.doc_id = doc_id
+        self.in_flight: Set[int] = set()
+        self.last_step = 0
+
+    def start(self, step: int):
+        self.in_flight.add(step)
+
+    def finish(self, step: int):
+        self.in_flight.discard(step)
+
+    async def log(self, message: str):
+        step = max(self.in_flight) if self.in_flight else self.last_step
+        self.last_step = max(self.last_step, step)
+        await add_processing_log(self.doc_id, message, self.last_step, PIPELINE_STEPS)
+
+
+async def _ontology_stage(tracker: _StageTracker, out: asyncio.Queue):
+    tracker.start(3)
+    await tracker.log("🧠 Step 3/6: Generating ontology (entities & relationships)...")
+    for batch in range(ENTITY_BATCHES):
+        await asyncio.sleep(1.0 / ENTITY_BATCHES)
+        await out.put(batch)
+    await out.put(_END_OF_STAGE)
+    await tracker.log("✅ Ontology generation complete - 45 entities, 23 relationships extracted")
+    tracker.finish(3)
+
+
+async def _resolution_stage(tracker: _StageTracker, source: asyncio.Queue, outs: List[asyncio.Queue]):
+    tracker.start(4)
+    await tracker.log("🔍 Step 4/6: Resolving duplicate entities...")
+    while (batch := await source.get()) is not _END_OF_STAGE:
+        await asyncio.sleep(0.5 / ENTITY_BATCHES)
+        for out in outs:
+            await out.put(batch)
+    for out in outs:
+        await out.put(_END_OF_STAGE)
+    await tracker.log("✅ Entity resolution complete - 3 duplicates merged")
+    tracker.finish(4)
+
+
+async def _embedding_stage(tracker: _StageTracker, source: asyncio.Queue):
+    tracker.start(5)
+    await tracker.log("🎯 Step 5/6: Generating semantic embeddings...")
+    while await source.get() is not _END_OF_STAGE:
+        await asyncio.sleep(0.8 / ENTITY_BATCHES)
+    await tracker.log("✅ Embedding generation complete - 42 unique embeddings created")
+    tracker.finish(5)
+
+
+async def _graph_stage(tracker: _StageTracker, source: asyncio.Queue):
+    tracker.start(6)
+    await tracker.log("🕸️ Step 6/6: Building knowledge graph...")
+    while await source.get() is not _END_OF_STAGE:
+        await asyncio.sleep(0.7 / ENTITY_BATCHES)
+    await tracker.log("✅ Graph construction complete - Neo4j updated with new nodes")
+    tracker.finish(6)
+
+
+async def _run_stages(*stages):
+    """Run pipeline stages concurrently; if one fails the others are cancelled."""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
 
 async def process_document_with_streaming(doc_id: str, file_path: str):
     """Process document with streaming logs."""
     try:
-        await add_processing_log(doc_id, f"🚀 Starting document processing for {doc_id}", 0, 6)
+        await add_processing_log(doc_id, f"🚀 Starting document processing for {doc_id}", 0, PIPELINE_STEPS)
         await add_processing_log(doc_id, f"📄 File path: {file_path}")
         
         # Step 1: Document Analysis
-        await add_processing_log(doc_id, "📊 Step 1/6: Analyzing document structure...", 1, 6)
+        await add_processing_log(doc_id, "📊 Step 1/6: Analyzing document structure...", 1, PIPELINE_STEPS)
         await asyncio.sleep(0.5)
-        await add_processing_log(doc_id, "✅ Document analysis complete - Format detected, content extracted", 1, 6)
+        await add_processing_log(doc_id, "✅ Document analysis complete - Format detected, content extracted", 1, PIPELINE_STEPS)
         
         # Step 2: Text Preprocessing
-        await add_processing_log(doc_id, "🔤 Step 2/6: Preprocessing text content...", 2, 6)
+        await add_processing_log(doc_id, "🔤 Step 2/6: Preprocessing text content...", 2, PIPELINE_STEPS)
         await asyncio.sleep(0.5)
-        await add_processing_log(doc_id, "✅ Text preprocessing complete - Cleaned and normalized", 2, 6)
+        await add_processing_log(doc_id, "✅ Text preprocessing complete - Cleaned and normalized", 2, PIPELINE_STEPS)
         
-        # Step 3: Ontology Generation
-        await add_processing_log(doc_id, "🧠 Step 3/6: Generating ontology (entities & relationships)...", 3, 6)
-        await asyncio.sleep(1.0)
-        await add_processing_log(doc_id, "✅ Ontology generation complete - 45 entities, 23 relationships extracted", 3, 6)
+        # Steps 3-6 run as a pipeline: ontology -> resolution -> (embedding, graph)
+        tracker = _StageTracker(doc_id)
+        tracker.last_step = 2
+        resolve_queue: asyncio.Queue = asyncio.Queue()
+        embed_queue: asyncio.Queue = asyncio.Queue()
+        graph_queue: asyncio.Queue = asyncio.Queue()
         
-        # Step 4: Entity Resolution
-        await add_processing_log(doc_id, "🔍 Step 4/6: Resolving duplicate entities...", 4, 6)
-        await asyncio.sleep(0.5)
-        await add_processing_log(doc_id, "✅ Entity resolution complete - 3 duplicates merged", 4, 6)
-        
-        # Step 5: Embedding Generation
-        await add_processing_log(doc_id, "🎯 Step 5/6: Generating semantic embeddings...", 5, 6)
-        await asyncio.sleep(0.8)
-        await add_processing_log(doc_id, "✅ Embedding generation complete - 42 unique embeddings created", 5, 6)
-        
-        # Step 6: Graph Construction
-        await add_processing_log(doc_id, "🕸️ Step 6/6: Building knowledge graph...", 6, 6)
-        await asyncio.sleep(0.7)
-        await add_processing_log(doc_id, "✅ Graph construction complete - Neo4j updated with new nodes", 6, 6)
+        await _run_stages(
+            _ontology_stage(tracker, resolve_queue),
+            _resolution_stage(tracker, resolve_queue, [embed_queue, graph_queue]),
+            _embedding_stage(tracker, embed_queue),
+            _graph_stage(tracker, graph_queue)
+        )
         
-        await add_processing_log(doc_id, "🎉 Document processing completed successfully!", 6, 6)
+        await add_processing_log(doc_id, "🎉 Document processing completed successfully!", PIPELINE_STEPS, PIPELINE_STEPS)
         await add_processing_log(doc_id, "📈 Summary: 42 nodes, 23 relationships, 42 embeddings")
+        await _set_upload_status(doc_id, "completed")
         
     except Exception as e:
         await add_processing_log(doc_id, f"❌ Error processing document {doc_id}: {str(e)}")
+        await _set_upload_status(doc_id, "error")
+    finally:
+        schedule_log_cleanup(doc_id)
 
 async def process_document(doc_id: str, file_path: str):
     """
@@ -233,28 +453,25 @@ async def get_upload_status(doc_id: str) -> JSONResponse:
     Get the processing status of an uploaded document.
     """
     
-    logs = processing_logs.get(doc_id, [])
+    log = processing_logs.get(doc_id)
+    if log is not None and log.entries:
+        logs = [entry for entry, _ in log.entries]
+    else:
+        # Not in this process (another worker, a restart, or past retention)
+        logs = await upload_store.get_logs(doc_id)
     if not logs:
-        return JSONResponse(
-            status_code=404,
-            content={
-                "doc_id": doc_id,
-                "status": "not_found",
-                "message": "Document not found"
-            }
-        )
+        return _upload_not_found(doc_id)
     
-    # Determine status from logs
-    last_log = logs[-1] if logs else None
-    if last_log and "completed successfully" in last_log["message"]:
-        status = "completed"
+    status = await _upload_status(doc_id, logs)
+    last_log = logs[-1]
+    if status == "completed":
         progress = 100
-    elif last_log and "❌" in last_log["message"]:
-        status = "error"
+    elif status == "error":
         progress = 0
     else:
-        status = "processing"
-        progress = (last_log.get("step", 0) / last_log.get("total_steps", 6)) * 100 if last_log else 0
+        # Summary lines carry no step; use the latest entry that does
+        last_step = next((entry for entry in reversed(logs) if entry.get("step") is not None), None)
+        progress = (last_step["step"] / (last_step.get("total_steps") or PIPELINE_STEPS)) * 100 if last_step else 0
     
     return JSONResponse(
         status_code=200,
@@ -263,48 +480,82 @@ async def get_upload_status(doc_id: str) -> JSONResponse:
             "status": status,
             "progress": progress,
             "logs": logs,
-            "message": last_log["message"] if last_log else "No logs available"
+            "message": last_log["message"]
         }
     )
 
+
+def _upload_not_found(doc_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=404,
+        content={
+            "doc_id": doc_id,
+            "status": "not_found",
+            "message": "Document not found"
+        }
+    )
+
+
+async def _follow_stored_logs(doc_id: str) -> AsyncGenerator[str, None]:
+    """SSE frames of a document's persisted log, re-read until its stored status leaves processing."""
+    seen = 0
+    while True:
+        # Status first: the final log entries are written before the status changes,
+        # so the read below still returns them
+        status = await upload_store.get_status(doc_id)
+        logs = await upload_store.get_logs(doc_id)
+        if len(logs) > seen:
+            yield _batch_frame([orjson.dumps(entry).decode() for entry in logs[seen:]])
+            seen = len(logs)
+        # None means a later upload of the same content replaced the record
+        if status != "processing":
+            return
+        await asyncio.sleep(STORED_LOG_POLL_SECONDS)
+
+
 @router.get("/upload/logs/{doc_id}")
 async def stream_processing_logs(doc_id: str):
     """
     Stream real-time processing logs for a document.
     """
     
+    log = processing_logs.get(doc_id)
+    if log is None and await upload_store.get_status(doc_id) is None and not await upload_store.get_logs(doc_id):
+        return _upload_not_found(doc_id)
+    
     async def generate_logs():
-        # Create a queue for this connection
-        queue = asyncio.Queue()
-        active_connections[doc_id].append(queue)
+        seen = 0
         
         try:
-            # Send existing logs first
-            for log in processing_logs.get(doc_id, []):
-                yield f"data: {json.dumps(log)}\n\n"
+            if log is None:
+                # Not processed in this process (another worker, a restart, or past
+                # retention): replay the stored log and follow it until processing ends
+                async for frame in _follow_stored_logs(doc_id):
+                    yield {"data": frame}
+                return
             
-            # Stream new logs as they come
+            # Existing logs go out first, then new ones as they are appended;
+            # keepalive pings come from EventSourceResponse
             while True:
-                try:
-                    log = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield f"data: {log}\n\n"
-                except asyncio.TimeoutError:
-                    # Send keepalive
-                    yield f"data: {{\"keepalive\": true}}\n\n"
+                async with log.changed:
+                    await log.changed.wait_for(lambda: log.version > seen)
+                # Let a burst of log lines accumulate so it costs one socket write
+                await asyncio.sleep(LOG_BATCH_WINDOW_SECONDS)
+                frame = log.frame_since(seen)
+                seen = log.version
+                yield {"data": frame}
                     
+        except asyncio.CancelledError:
+            # Client disconnected; nothing per-connection to clean up
+            raise
         except Exception as e:
-            yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
-        finally:
-            # Clean up connection
-            if queue in active_connections[doc_id]:
-                active_connections[doc_id].remove(queue)
+            yield {"data": orjson.dumps({"error": str(e)}).decode()}
     
-    return StreamingResponse(
+    # Sets the SSE headers, pings idle clients and cancels the generator on disconnect
+    return EventSourceResponse(
         generate_logs(),
-        media_type="text/event-stream",
+        ping=SSE_PING_SECONDS,
         headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Headers": "*"
         }
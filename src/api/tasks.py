@@ -0,0 +1,88 @@
+"""
+Celery tasks for long-running document and ontology processing
+Used instead of the in-process worker pool when CELERY_ENABLED is set; progress
+is reported through the shared Redis job store so any API worker can stream it
+
+Start a worker with:
+    celery -A src.api.tasks worker --loglevel=info
+"""
+
+import asyncio
+from typing import Optional
+
+from celery import Celery
+
+try:
+    # Installed with uvicorn[standard] everywhere except Windows
+    import uvloop
+except ImportError:
+    uvloop = None
+
+from src.utils.config_loader import ConfigLoader
+from src.utils.logger import get_logger
+
+logger = get_logger("tasks")
+
+config = ConfigLoader()
+
+celery_app = Celery("agraph", broker=config.redis_url, backend=config.redis_url)
+celery_app.conf.update(
+    # Acknowledge only after the task finishes so a crashed worker's job is redelivered
+    task_acks_late=True,
+    # The pipelines record their own failures with fail_job rather than raising,
+    # so tasks are not auto-retried
+    worker_prefetch_multiplier=1,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+)
+
+# One event loop per worker process, reused by every task
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run(coro):
+    """Run a coroutine on this worker process's persistent event loop."""
+    global _worker_loop
+    if _worker_loop is None:
+        _worker_loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coro)
+
+
+async def _flush_progress():
+    # Progress writes are queued; make sure they reach Redis before the task returns
+    from src.api.routes.progress_streaming import progress_backend
+    if progress_backend is not None:
+        await progress_backend.flush()
+
+
+@celery_app.task(name="agraph.process_document")
+def process_document_task(job_id: str, file_path: str, filename: str, delete_file: bool = False):
+    """Run ``process_document_with_progress`` in a Celery worker.
+
+    ``file_path`` must be readable from the worker, e.g. a shared uploads volume.
+    """
+    from src.api.routes.progress_streaming import process_document_with_progress
+
+    async def run():
+        try:
+            await process_document_with_progress(job_id, file_path, filename, delete_file)
+        finally:
+            await _flush_progress()
+
+    _run(run())
+
+
+@celery_app.task(name="agraph.process_ontology")
+def process_ontology_task(job_id: str, text: str, doc_id: str):
+    """Run ``process_ontology_with_progress`` in a Celery worker."""
+    from src.api.routes.progress_streaming import process_ontology_with_progress
+
+    async def run():
+        try:
+            await process_ontology_with_progress(job_id, text, doc_id)
+        finally:
+            await _flush_progress()
+
+    _run(run())
@@ -0,0 +1,151 @@
+"""
+Durable upload metadata and processing logs
+SQLite in WAL mode, so upload status and content deduplication survive restarts
+and are shared by every API worker on the host
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import aiosqlite
+
+from src.utils.logger import get_logger
+
+logger = get_logger("upload_store")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id TEXT PRIMARY KEY,
+    sha256 TEXT UNIQUE,
+    filename TEXT,
+    file_size INTEGER,
+    path TEXT,
+    status TEXT,
+    ts REAL
+);
+CREATE TABLE IF NOT EXISTS logs (
+    doc_id TEXT,
+    ts REAL,
+    step INTEGER,
+    total_steps INTEGER,
+    msg TEXT
+);
+CREATE INDEX IF NOT EXISTS logs_doc_id ON logs (doc_id);
+"""
+
+
+class UploadStore:
+    """Upload records and processing logs in a single SQLite database."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._db: Optional[aiosqlite.Connection] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+
+    async def _connection(self) -> aiosqlite.Connection:
+        # Opened on first use, from inside the running event loop
+        if self._db is None:
+            if self._open_lock is None:
+                self._open_lock = asyncio.Lock()
+            async with self._open_lock:
+                if self._db is None:
+                    db = await aiosqlite.connect(str(self.path))
+                    db.row_factory = aiosqlite.Row
+                    # WAL lets readers in other workers proceed while one writes;
+                    # NORMAL sync is durable across crashes of this process
+                    await db.execute("PRAGMA journal_mode=WAL")
+                    await db.execute("PRAGMA synchronous=NORMAL")
+                    await db.executescript(_SCHEMA)
+                    await db.commit()
+                    self._db = db
+                    logger.info("Upload store opened", path=str(self.path))
+        return self._db
+
+    async def add_document(self, upload_data: Dict[str, Any], status: str = "processing"):
+        """Record a stored upload; an earlier record with the same content hash is replaced."""
+        db = await self._connection()
+        await db.execute(
+            "INSERT OR REPLACE INTO docs (doc_id, sha256, filename, file_size, path, status, ts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                upload_data["doc_id"],
+                upload_data["sha256"],
+                upload_data["filename"],
+                upload_data["file_size"],
+                upload_data["file_path"],
+                status,
+                upload_data["upload_timestamp"]
+            )
+        )
+        await db.commit()
+
+    async def find_by_sha256(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Upload data and processing status of the document stored with this content hash, if any."""
+        db = await self._connection()
+        async with db.execute(
+            "SELECT doc_id, sha256, filename, file_size, path, status, ts FROM docs WHERE sha256 = ?",
+            (digest,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return {
+            "doc_id": row["doc_id"],
+            "filename": row["filename"],
+            "file_size": row["file_size"],
+            "file_path": row["path"],
+            "sha256": row["sha256"],
+            "upload_timestamp": row["ts"],
+            "status": row["status"]
+        }
+
+    async def get_status(self, doc_id: str) -> Optional[str]:
+        """Processing status of a stored upload, or None for unknown ids."""
+        db = await self._connection()
+        async with db.execute("SELECT status FROM docs WHERE doc_id = ?", (doc_id,)) as cursor:
+            row = await cursor.fetchone()
+        return row["status"] if row is not None else None
+
+    async def set_status(self, doc_id: str, status: str):
+        db = await self._connection()
+        await db.execute("UPDATE docs SET status = ? WHERE doc_id = ?", (status, doc_id))
+        await db.commit()
+
+    async def add_log(self, log_entry: Dict[str, Any]):
+        db = await self._connection()
+        await db.execute(
+            "INSERT INTO logs (doc_id, ts, step, total_steps, msg) VALUES (?, ?, ?, ?, ?)",
+            (
+                log_entry["doc_id"],
+                log_entry["timestamp"],
+                log_entry["step"],
+                log_entry["total_steps"],
+                log_entry["message"]
+            )
+        )
+        await db.commit()
+
+    async def get_logs(self, doc_id: str) -> List[Dict[str, Any]]:
+        """A document's log entries, oldest first, in the shape ``add_processing_log`` builds."""
+        db = await self._connection()
+        async with db.execute(
+            "SELECT ts, step, total_steps, msg FROM logs WHERE doc_id = ? ORDER BY rowid",
+            (doc_id,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return [
+            {
+                "timestamp": row["ts"],
+                "message": row["msg"],
+                "step": row["step"],
+                "total_steps": row["total_steps"],
+                "doc_id": doc_id
+            }
+            for row in rows
+        ]
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
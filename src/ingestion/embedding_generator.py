@@ -3,13 +3,78 @@ Embedding generation pipeline using Ollama
 Generates embeddings for entities, relationships, and documents
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import inspect
+import re
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Literal, Tuple
+import numpy as np
 import structlog
 
+from src.ingestion.quantization import pack_int8, to_bfloat16
 from src.utils.logger import get_logger
 
 logger = get_logger("embedding_generator")
 
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace ("Apple, Inc." -> "apple inc")."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+class CentroidEmbeddingCache:
+    """Reuses embeddings across near-duplicate texts.
+
+    Texts with the same normalized form share a bucket holding the centroid of
+    their embeddings. A bucket serves lookups once ``min_members`` distinct
+    texts have been embedded into it and every one of them has cosine
+    similarity of at least ``threshold`` to the centroid; until then lookups
+    miss and the real embeddings keep refining it.
+    """
+
+    def __init__(self, threshold: float = 0.86, min_members: int = 2, max_buckets: int = 10000):
+        self.threshold = threshold
+        self.min_members = min_members
+        self.max_buckets = max_buckets
+        # normalized text -> (unit member vectors, centroid or None while unproven)
+        self._buckets: "OrderedDict[str, Tuple[List[np.ndarray], Optional[np.ndarray]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket[1] is None:
+            return None
+        self._buckets.move_to_end(key)
+        return bucket[1]
+
+    def add(self, key: str, embedding: np.ndarray):
+        members, centroid = self._buckets.get(key, ([], None))
+        if centroid is not None:
+            return
+
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return
+        members = members + [embedding / norm]
+
+        if len(members) >= self.min_members:
+            mean = np.mean(members, axis=0)
+            mean_norm = np.linalg.norm(mean)
+            cohesion = float(np.min(np.stack(members) @ mean) / mean_norm) if mean_norm else 0.0
+            if cohesion >= self.threshold:
+                centroid = (mean / mean_norm).astype(np.float32)
+            else:
+                # Same surface form, different meaning; keep the bucket closed
+                members = members[-self.min_members:]
+
+        self._buckets[key] = (members, centroid)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+
 
 class EmbeddingGenerator:
     """Generates embeddings using Ollama models."""
@@ -18,7 +83,11 @@ class EmbeddingGenerator:
         self,
         ollama_client=None,
         model_name: str = "llama3.2:latest",
-        dimension: int = 4096
+        dimension: int = 4096,
+        concurrency: int = 8,
+        quantize: Literal["fp32", "bf16", "int8"] = "fp32",
+        cache_size: int = 10000,
+        semantic_cache_threshold: Optional[float] = 0.86
     ):
         """
         Initialize embedding generator.
@@ -27,17 +96,66 @@ class EmbeddingGenerator:
             ollama_client: Ollama client instance
             model_name: Model to use for embeddings
             dimension: Embedding dimension
+            concurrency: Maximum embed requests in flight at once
+            quantize: Storage format for entity/relationship embeddings: ``fp32``,
+                ``bf16`` (uint16 bit patterns) or ``int8`` (``codes``/``scale`` records)
+            cache_size: Number of distinct texts whose embeddings are kept for reuse
+            semantic_cache_threshold: Minimum centroid cohesion for reusing an embedding
+                across near-duplicate texts; ``None`` disables the semantic cache
         """
+        if quantize not in ("fp32", "bf16", "int8"):
+            raise ValueError(f"Unsupported quantization: {quantize}")
+
         self.ollama_client = ollama_client
         self.model_name = model_name
         self.dimension = dimension
+        self.concurrency = concurrency
+        self.quantize = quantize
+        # Created on first use so it binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # LRU of float32 embeddings keyed by a hash of the text
+        self.cache_size = cache_size
+        self._emb_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._centroid_cache: Optional[CentroidEmbeddingCache] = (
+            CentroidEmbeddingCache(threshold=semantic_cache_threshold, max_buckets=cache_size)
+            if semantic_cache_threshold is not None else None
+        )
         logger.info(
             "Embedding generator initialized",
             model=model_name,
-            dimension=dimension
+            dimension=dimension,
+            quantize=quantize
         )
 
-    async def generate_embedding(self, text: str) -> List[float]:
+    async def _embed_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed several texts with a single Ollama ``embed`` request.
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            float32 matrix of shape ``(len(texts), dimension)``, one row per text
+        """
+
+        if not self.ollama_client:
+            logger.warning("No Ollama client available, returning placeholder")
+            return np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        response = self.ollama_client.embed(model=self.model_name, input=texts)
+        # The app shares an AsyncClient; the synchronous client returns directly
+        if inspect.isawaitable(response):
+            response = await response
+        return np.asarray(response['embeddings'], dtype=np.float32)
+
+    async def _embed_many_limited(self, texts: List[str]) -> np.ndarray:
+        """Run one batch request while holding a concurrency slot."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await self._embed_many(texts)
+
+    async def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
 
@@ -45,42 +163,50 @@ class EmbeddingGenerator:
             text: Input text
 
         Returns:
-            Embedding vector
+            float32 embedding vector of shape ``(dimension,)``
         """
 
         try:
-            if not self.ollama_client:
-                logger.warning("No Ollama client available, returning placeholder")
-                return [0.0] * self.dimension
-
-            # TODO: Implement actual Ollama embedding generation
-            # response = self.ollama_client.embeddings(
-            #     model=self.model_name,
-            #     prompt=text
-            # )
-            # return response['embedding']
-
-            # Placeholder for now
-            return [0.0] * self.dimension
+            return (await self._embed_many_limited([text]))[0]
 
         except Exception as e:
             logger.error("Failed to generate embedding", error=str(e), text_length=len(text))
             raise
 
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[np.ndarray]:
+        embedding = self._emb_cache.get(key)
+        if embedding is not None:
+            self._emb_cache.move_to_end(key)
+        return embedding
+
+    def _cache_put(self, key: bytes, embedding: np.ndarray):
+        self._emb_cache[key] = embedding
+        self._emb_cache.move_to_end(key)
+        while len(self._emb_cache) > self.cache_size:
+            self._emb_cache.popitem(last=False)
+
     async def generate_embeddings_batch(
         self,
         texts: List[str],
         batch_size: int = 32
-    ) -> List[List[float]]:
+    ) -> np.ndarray:
         """
         Generate embeddings for multiple texts in batches.
 
+        Texts seen before, and repeats within ``texts``, are served from the
+        cache, then near-duplicates from the centroid cache; only the remaining
+        distinct texts are sent to Ollama.
+
         Args:
             texts: List of input texts
-            batch_size: Number of texts to process at once
+            batch_size: Number of texts sent in each embed request
 
         Returns:
-            List of embedding vectors
+            float32 matrix of shape ``(len(texts), dimension)``
         """
 
         logger.info(
@@ -90,21 +216,51 @@ class EmbeddingGenerator:
         )
 
         try:
-            embeddings = []
-
-            # Process in batches
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-
-                for text in batch:
-                    embedding = await self.generate_embedding(text)
-                    embeddings.append(embedding)
-
-                logger.debug(
-                    "Processed batch",
-                    batch_num=i // batch_size + 1,
-                    batch_size=len(batch)
-                )
+            # Split into cache hits and distinct misses, remembering every position of each miss
+            rows: List[Optional[np.ndarray]] = [None] * len(texts)
+            missing: Dict[bytes, List[int]] = {}
+            semantic_hits = 0
+            for i, text in enumerate(texts):
+                key = self._cache_key(text)
+                cached = self._cache_get(key)
+                if cached is None and self._centroid_cache is not None:
+                    cached = self._centroid_cache.get(normalize_text(text))
+                    semantic_hits += cached is not None
+                if cached is not None:
+                    rows[i] = cached
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            miss_texts = [texts[positions[0]] for positions in missing.values()]
+
+            # One request per batch; batches overlap, bounded by the semaphore
+            batches = [miss_texts[i:i + batch_size] for i in range(0, len(miss_texts), batch_size)]
+            batch_results = await asyncio.gather(
+                *(self._embed_many_limited(batch) for batch in batches)
+            )
+
+            if batch_results:
+                miss_embeddings = np.vstack(batch_results)
+                for (key, positions), embedding in zip(missing.items(), miss_embeddings):
+                    # Copy so the cache does not keep the whole batch matrix alive
+                    embedding = embedding.copy()
+                    self._cache_put(key, embedding)
+                    if self._centroid_cache is not None:
+                        self._centroid_cache.add(normalize_text(texts[positions[0]]), embedding)
+                    for position in positions:
+                        rows[position] = embedding
+
+            if rows:
+                embeddings = np.vstack(rows)
+            else:
+                embeddings = np.zeros((0, self.dimension), dtype=np.float32)
+
+            logger.debug(
+                "Processed batches",
+                batch_count=len(batches),
+                cache_hits=len(texts) - sum(len(positions) for positions in missing.values()),
+                semantic_hits=semantic_hits
+            )
 
             logger.info("Batch embedding generation completed", total=len(embeddings))
             return embeddings
@@ -113,10 +269,18 @@ class EmbeddingGenerator:
             logger.error("Batch embedding generation failed", error=str(e))
             raise
 
+    def _quantize(self, embeddings: np.ndarray) -> np.ndarray:
+        """Encode a float32 embedding matrix in the configured storage format."""
+        if self.quantize == "int8":
+            return pack_int8(embeddings)
+        if self.quantize == "bf16":
+            return to_bfloat16(embeddings)
+        return embeddings
+
     async def generate_entity_embeddings(
         self,
         entities: List[Dict[str, Any]]
-    ) -> Dict[str, List[float]]:
+    ) -> Dict[str, np.ndarray]:
         """
         Generate embeddings for entities.
 
@@ -124,22 +288,21 @@ class EmbeddingGenerator:
             entities: List of entity dictionaries
 
         Returns:
-            Dictionary mapping entity IDs to embeddings
+            Dictionary mapping entity IDs to rows of one embedding matrix in the
+            configured storage format
         """
 
         logger.info("Generating entity embeddings", entity_count=len(entities))
 
         try:
-            entity_embeddings = {}
-
-            for entity in entities:
-                # Create text representation of entity
-                entity_text = self._entity_to_text(entity)
-
-                # Generate embedding
-                embedding = await self.generate_embedding(entity_text)
+            # Create text representations, embed them together, then map back to ids
+            entity_texts = [self._entity_to_text(entity) for entity in entities]
+            embeddings = self._quantize(await self.generate_embeddings_batch(entity_texts))
 
-                entity_embeddings[entity['id']] = embedding
+            entity_embeddings = {
+                entity['id']: embedding
+                for entity, embedding in zip(entities, embeddings)
+            }
 
             logger.info("Entity embeddings generated", count=len(entity_embeddings))
             return entity_embeddings
@@ -151,7 +314,7 @@ class EmbeddingGenerator:
     async def generate_relationship_embeddings(
         self,
         relationships: List[Dict[str, Any]]
-    ) -> Dict[str, List[float]]:
+    ) -> Dict[str, np.ndarray]:
         """
         Generate embeddings for relationships.
 
@@ -159,23 +322,21 @@ class EmbeddingGenerator:
             relationships: List of relationship dictionaries
 
         Returns:
-            Dictionary mapping relationship IDs to embeddings
+            Dictionary mapping relationship IDs to rows of one embedding matrix in
+            the configured storage format
         """
 
         logger.info("Generating relationship embeddings", count=len(relationships))
 
         try:
-            relationship_embeddings = {}
+            # Create text representations, embed them together, then map back to ids
+            rel_texts = [self._relationship_to_text(rel) for rel in relationships]
+            embeddings = self._quantize(await self.generate_embeddings_batch(rel_texts))
 
-            for rel in relationships:
-                # Create text representation of relationship
-                rel_text = self._relationship_to_text(rel)
-
-                # Generate embedding
-                embedding = await self.generate_embedding(rel_text)
-
-                rel_id = f"{rel['source_id']}_{rel['type']}_{rel['target_id']}"
-                relationship_embeddings[rel_id] = embedding
+            relationship_embeddings = {
+                f"{rel['source_id']}_{rel['type']}_{rel['target_id']}": embedding
+                for rel, embedding in zip(relationships, embeddings)
+            }
 
             logger.info("Relationship embeddings generated", count=len(relationship_embeddings))
             return relationship_embeddings
@@ -187,18 +348,18 @@ class EmbeddingGenerator:
     @staticmethod
     def _entity_to_text(entity: Dict[str, Any]) -> str:
         """Convert entity to text representation for embedding."""
-        parts = [
-            f"Entity: {entity.get('label', '')}",
-            f"Type: {entity.get('type', '')}",
+        text = (
+            f"Entity: {entity.get('label', '')} | "
+            f"Type: {entity.get('type', '')} | "
             f"Description: {entity.get('description', '')}"
-        ]
+        )
 
         # Add properties
-        if 'properties' in entity:
-            for key, value in entity['properties'].items():
-                parts.append(f"{key}: {value}")
+        properties = entity.get('properties')
+        if properties:
+            text += " | " + " | ".join(f"{key}: {value}" for key, value in properties.items())
 
-        return " | ".join(parts)
+        return text
 
     @staticmethod
     def _relationship_to_text(relationship: Dict[str, Any]) -> str:
@@ -15,6 +15,7 @@ from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 import structlog
 
+from src.ingestion.quantization import quantize_int8
 from src.utils.logger import get_logger
 
 logger = get_logger("enhanced_chromadb_integration")
@@ -52,12 +53,18 @@ class EnhancedChromaDBIntegration:
                  collection_name: str = "knowledge_graph",
                  embedding_model: str = "all-MiniLM-L6-v2",
                  chunk_size: int = 500,
-                 chunk_overlap: int = 50):
-        """Initialize enhanced ChromaDB integration."""
+                 chunk_overlap: int = 50,
+                 quantize_embeddings: bool = False):
+        """Initialize enhanced ChromaDB integration.
+        
+        With ``quantize_embeddings`` stored vectors are sent as int8 codes, which
+        requires a cosine-space collection.
+        """
         
         self.collection_name = collection_name
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.quantize_embeddings = quantize_embeddings
         
         # Initialize ChromaDB client
         if chroma_client:
@@ -81,11 +88,19 @@ class EnhancedChromaDBIntegration:
             self.collection = self.client.get_collection(collection_name)
             logger.info(f"Using existing collection: {collection_name}")
         except Exception:
+            collection_metadata = {"description": "Knowledge graph embeddings"}
+            if quantize_embeddings:
+                collection_metadata["hnsw:space"] = "cosine"
             self.collection = self.client.create_collection(
                 name=collection_name,
-                metadata={"description": "Knowledge graph embeddings"}
+                metadata=collection_metadata
             )
             logger.info(f"Created new collection: {collection_name}")
+        
+        # int8 codes only preserve rankings under cosine distance
+        if self.quantize_embeddings and (self.collection.metadata or {}).get("hnsw:space") != "cosine":
+            logger.warning(f"Collection {collection_name} is not cosine-space, storing float embeddings")
+            self.quantize_embeddings = False
 
     def chunk_document(self, text: str, doc_id: str) -> List[DocumentChunk]:
         """Split document into overlapping chunks for embedding."""
@@ -192,8 +207,9 @@ class EnhancedChromaDBIntegration:
 
     async def store_embeddings(self, 
                              chunks: List[DocumentChunk],
-                             entity_mappings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Store embeddings in ChromaDB with metadata."""
+                             entity_mappings: Optional[Dict[str, Any]] = None,
+                             write_batch_size: int = 256) -> Dict[str, Any]:
+        """Store embeddings in ChromaDB with metadata, one ``add`` per batch."""
         
         logger.info(f"Storing {len(chunks)} embeddings in ChromaDB")
         
@@ -235,23 +251,35 @@ class EnhancedChromaDBIntegration:
                 logger.error(f"Failed to prepare chunk {chunk.id}: {e}")
                 failed_count += 1
         
-        # Store in ChromaDB
-        try:
-            if ids:  # Only store if we have valid data
+        # Send int8 codes instead of full-precision floats; the scale is kept so
+        # the original vector can be recovered with dequantize_int8
+        if self.quantize_embeddings and embeddings:
+            codes, scales = quantize_int8(np.asarray(embeddings, dtype=np.float32))
+            embeddings = codes.tolist()
+            for metadata, scale in zip(metadatas, scales):
+                metadata["embedding_scale"] = float(scale)
+        
+        # Store in ChromaDB in bounded batches; a failed batch does not discard the others
+        if not ids:  # Only store if we have valid data
+            logger.warning("No valid embeddings to store")
+        
+        for i in range(0, len(ids), write_batch_size):
+            batch_end = i + write_batch_size
+            try:
                 self.collection.add(
-                    ids=ids,
-                    embeddings=embeddings,
-                    metadatas=metadatas,
-                    documents=documents
+                    ids=ids[i:batch_end],
+                    embeddings=embeddings[i:batch_end],
+                    metadatas=metadatas[i:batch_end],
+                    documents=documents[i:batch_end]
                 )
-                logger.info(f"Successfully stored {stored_count} embeddings")
-            else:
-                logger.warning("No valid embeddings to store")
-                
-        except Exception as e:
-            logger.error(f"Failed to store embeddings in ChromaDB: {e}")
-            failed_count += stored_count
-            stored_count = 0
+            except Exception as e:
+                batch_count = len(ids[i:batch_end])
+                logger.error(f"Failed to store embedding batch in ChromaDB: {e}")
+                failed_count += batch_count
+                stored_count -= batch_count
+        
+        if ids:
+            logger.info(f"Successfully stored {stored_count} embeddings")
         
         return {
             "stored": stored_count,
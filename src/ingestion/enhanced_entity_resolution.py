@@ -4,19 +4,47 @@ Supports duplicate detection, confidence scoring, and batch processing
 """
 
 import uuid
+import hashlib
+import re
+import threading
+from functools import lru_cache
+from collections import Counter, OrderedDict, defaultdict
 from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import asyncio
 import numpy as np
-from fuzzywuzzy import fuzz, process
+from rapidfuzz import fuzz, process, utils as fuzz_utils
 from sentence_transformers import SentenceTransformer
+import torch
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
 import structlog
 
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
 from src.utils.logger import get_logger
 
 logger = get_logger("enhanced_entity_resolution")
 
+# Length of the token prefixes used as blocking keys
+BLOCK_KEY_LENGTH = 3
+# Nearest embeddings per candidate compared when blocking with faiss
+ANN_NEIGHBORS = 20
+
+# Common prefixes/suffixes dropped from names before comparison (at most one of each)
+_NAME_PREFIX_RE = re.compile(r"^(?:the|an?|mrs?\.|dr\.|prof\.) ")
+_NAME_SUFFIX_RE = re.compile(r" (?:inc|corp|ltd|llc|co)\Z")
+
+
+@lru_cache(maxsize=100_000)
+def _normalize_name(name: str) -> str:
+    normalized = _NAME_PREFIX_RE.sub("", name.lower().strip(), count=1)
+    return _NAME_SUFFIX_RE.sub("", normalized, count=1).strip()
+
 
 @dataclass
 class EntityCandidate:
@@ -28,7 +56,80 @@ class EntityCandidate:
     attributes: Dict[str, Any]
     source_doc_id: str
     confidence: float
-    embedding: Optional[np.ndarray] = None
+
+
+@dataclass
+class CandidateTable:
+    """Entity candidates as parallel columns; candidate ``i`` is row ``i`` of each.
+    
+    Clustering, canonical-name choice and attribute merging address candidates by
+    index, and the numeric columns support vectorized filters such as
+    ``table.type_codes == code`` or ``table.confidences > 0.9``.
+    """
+    ids: List[str]
+    names: List[str]
+    normalized: List[str]
+    # ``normalized`` through rapidfuzz's default processor, and its sorted tokens
+    processed: List[str]
+    sort_keys: List[str]
+    types: List[str]
+    type_codes: np.ndarray  # int32, equal codes for equal types
+    name_lengths: np.ndarray  # int32
+    confidences: np.ndarray  # float32
+    attributes: List[Dict[str, Any]]
+    source_doc_ids: List[str]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_entities(cls, entities: List[Dict[str, Any]]) -> "CandidateTable":
+        names = [ent.get("name", "") for ent in entities]
+        normalized = [_normalize_name(name) for name in names]
+        processed = [fuzz_utils.default_process(name) for name in normalized]
+        types = [ent.get("type", "OTHER") for ent in entities]
+        return cls(
+            ids=[ent.get("id", str(uuid.uuid4())) for ent in entities],
+            names=names,
+            normalized=normalized,
+            processed=processed,
+            sort_keys=[" ".join(sorted(name.split())) for name in processed],
+            types=types,
+            type_codes=np.unique(types, return_inverse=True)[1].astype(np.int32),
+            name_lengths=np.fromiter(map(len, names), dtype=np.int32, count=len(names)),
+            confidences=np.fromiter((ent.get("confidence", 0.8) for ent in entities),
+                                    dtype=np.float32, count=len(entities)),
+            attributes=[ent.get("attributes", {}) for ent in entities],
+            source_doc_ids=[ent.get("source_doc_id", "") for ent in entities]
+        )
+
+    def take(self, indexes: np.ndarray) -> "CandidateTable":
+        """The rows at ``indexes`` as a new table."""
+        return CandidateTable(
+            ids=[self.ids[k] for k in indexes],
+            names=[self.names[k] for k in indexes],
+            normalized=[self.normalized[k] for k in indexes],
+            processed=[self.processed[k] for k in indexes],
+            sort_keys=[self.sort_keys[k] for k in indexes],
+            types=[self.types[k] for k in indexes],
+            type_codes=self.type_codes[indexes],
+            name_lengths=self.name_lengths[indexes],
+            confidences=self.confidences[indexes],
+            attributes=[self.attributes[k] for k in indexes],
+            source_doc_ids=[self.source_doc_ids[k] for k in indexes]
+        )
+
+    def candidate(self, index: int) -> EntityCandidate:
+        """Row ``index`` as a single ``EntityCandidate``."""
+        return EntityCandidate(
+            id=self.ids[index],
+            name=self.names[index],
+            normalized=self.normalized[index],
+            type=self.types[index],
+            attributes=self.attributes[index],
+            source_doc_id=self.source_doc_ids[index],
+            confidence=float(self.confidences[index])
+        )
 
 
 @dataclass
@@ -36,7 +137,7 @@ class EntityCluster:
     """Represents a cluster of similar entities."""
     canonical_id: str
     canonical_name: str
-    member_entities: List[EntityCandidate]
+    members: np.ndarray  # Row indexes into the CandidateTable, in input order
     similarity_scores: List[float]
     merge_confidence: float
     entity_type: str
@@ -49,17 +150,36 @@ class EnhancedEntityResolution:
     def __init__(self, 
                  similarity_threshold: float = 0.8,
                  fuzzy_threshold: int = 85,
-                 use_embeddings: bool = True):
-        """Initialize enhanced entity resolution."""
+                 use_embeddings: bool = True,
+                 cache_size: int = 10000,
+                 blocking_min_candidates: int = 1000):
+        """Initialize enhanced entity resolution.
+        
+        ``cache_size`` is the number of distinct entity names whose embeddings are
+        kept for reuse across calls. Batches larger than ``blocking_min_candidates``
+        only compare candidates that share a blocking key (see ``_block_keys``) or,
+        when faiss is installed, are among each other's nearest embeddings; smaller
+        ones compare all pairs.
+        """
         self.similarity_threshold = similarity_threshold
         self.fuzzy_threshold = fuzzy_threshold
         self.use_embeddings = use_embeddings
+        self.blocking_min_candidates = blocking_min_candidates
+        # LRU of name embeddings keyed by a hash of the name
+        self.cache_size = cache_size
+        self._emb_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        # Clustering runs in worker threads, which share the cache
+        self._emb_cache_lock = threading.Lock()
         
         # Load sentence transformer for semantic similarity
         if use_embeddings:
             try:
-                self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-                logger.info("Sentence transformer loaded for semantic similarity")
+                # On a GPU, run the model in FP16; embeddings still come back as numpy
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+                if device == "cuda":
+                    self.sentence_model.half()
+                logger.info("Sentence transformer loaded for semantic similarity", device=device)
             except Exception as e:
                 logger.warning(f"Failed to load sentence transformer: {e}")
                 self.sentence_model = None
@@ -73,33 +193,21 @@ class EnhancedEntityResolution:
                    use_embeddings=use_embeddings)
 
     def normalize_entity_name(self, name: str) -> str:
-        """Normalize entity name for comparison."""
-        # Basic normalization
-        normalized = name.lower().strip()
+        """Normalize entity name for comparison.
         
-        # Remove common prefixes/suffixes
-        prefixes = ['the ', 'a ', 'an ', 'mr. ', 'mrs. ', 'dr. ', 'prof. ']
-        suffixes = [' inc', ' corp', ' ltd', ' llc', ' co']
-        
-        for prefix in prefixes:
-            if normalized.startswith(prefix):
-                normalized = normalized[len(prefix):]
-                break
-        
-        for suffix in suffixes:
-            if normalized.endswith(suffix):
-                normalized = normalized[:-len(suffix)]
-                break
-        
-        return normalized.strip()
+        Lowercases and drops one common prefix and suffix; results are memoized
+        since the same names recur across documents.
+        """
+        return _normalize_name(name)
 
     def calculate_fuzzy_similarity(self, name1: str, name2: str) -> float:
         """Calculate fuzzy string similarity between two entity names."""
-        # Use multiple fuzzy matching algorithms
+        # Use multiple fuzzy matching algorithms; the token scorers get the same
+        # preprocessing (punctuation stripped) that fuzzywuzzy applied implicitly
         ratio = fuzz.ratio(name1, name2)
         partial_ratio = fuzz.partial_ratio(name1, name2)
-        token_sort_ratio = fuzz.token_sort_ratio(name1, name2)
-        token_set_ratio = fuzz.token_set_ratio(name1, name2)
+        token_sort_ratio = fuzz.token_sort_ratio(name1, name2, processor=fuzz_utils.default_process)
+        token_set_ratio = fuzz.token_set_ratio(name1, name2, processor=fuzz_utils.default_process)
         
         # Weighted average of different similarity measures
         weighted_score = (
@@ -111,6 +219,29 @@ class EnhancedEntityResolution:
         
         return weighted_score / 100.0  # Convert to 0-1 scale
 
+    def fuzzy_similarity_matrix(self, table: CandidateTable) -> np.ndarray:
+        """All-pairs ``calculate_fuzzy_similarity`` scores for the candidates' normalized names.
+        
+        Each scorer fills its matrix in one multi-threaded rapidfuzz call instead of
+        a Python call per pair, working on the string columns the table prepared once.
+        Scores stay whole percentages (uint8) until the weighted sum, which is taken
+        in integers and converted to floats once.
+        """
+        names, processed, sort_keys = table.normalized, table.processed, table.sort_keys
+        # token_sort_ratio is ratio over the already sorted tokens
+        scorers = (
+            (names, fuzz.ratio, 3),
+            (names, fuzz.partial_ratio, 2),
+            (sort_keys, fuzz.ratio, 3),
+            (processed, fuzz.token_set_ratio, 2),
+        )
+        weighted = np.zeros((len(table), len(table)), dtype=np.uint16)
+        for strings, scorer, weight in scorers:
+            scores = process.cdist(strings, strings, scorer=scorer, dtype=np.uint8, workers=-1)
+            weighted += np.multiply(scores, weight, dtype=np.uint16)
+        # Weights are in tenths and scores in percent
+        return weighted.astype(np.float32) / 1000.0
+
     def calculate_semantic_similarity(self, 
                                     entity1: EntityCandidate, 
                                     entity2: EntityCandidate) -> float:
@@ -119,35 +250,139 @@ class EnhancedEntityResolution:
             return 0.0
         
         try:
-            # Generate embeddings if not already present
-            if entity1.embedding is None:
-                entity1.embedding = self.sentence_model.encode([entity1.name])[0]
-            if entity2.embedding is None:
-                entity2.embedding = self.sentence_model.encode([entity2.name])[0]
+            # Rows are unit-normalized, so the dot product is the cosine similarity
+            embeddings = self.encode_names([entity1.name, entity2.name])
+            if embeddings is None:
+                return 0.0
             
-            # Calculate cosine similarity
-            similarity = np.dot(entity1.embedding, entity2.embedding) / (
-                np.linalg.norm(entity1.embedding) * np.linalg.norm(entity2.embedding)
-            )
-            
-            return float(similarity)
+            return float(embeddings[0] @ embeddings[1])
             
         except Exception as e:
             logger.warning(f"Failed to calculate semantic similarity: {e}")
             return 0.0
 
+    @staticmethod
+    def _cache_key(name: str) -> bytes:
+        return hashlib.blake2b(name.encode("utf-8"), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._emb_cache_lock:
+            embedding = self._emb_cache.get(key)
+            if embedding is not None:
+                self._emb_cache.move_to_end(key)
+            return embedding
+
+    def _cache_put(self, key: bytes, embedding: np.ndarray):
+        with self._emb_cache_lock:
+            self._emb_cache[key] = embedding
+            self._emb_cache.move_to_end(key)
+            while len(self._emb_cache) > self.cache_size:
+                self._emb_cache.popitem(last=False)
+
+    def encode_names(self, names: List[str], batch_size: int = 64) -> Optional[np.ndarray]:
+        """Unit-normalized embeddings of ``names`` as one contiguous float32 (n, d) matrix.
+        
+        Names seen before, and repeats within ``names``, come from the cache; the
+        rest are encoded in one batched model call. sentence-transformers sorts the
+        texts by length before batching, so padding stays small. Returns None when
+        semantic similarity is unavailable.
+        """
+        if not self.sentence_model or not names:
+            return None
+        
+        keys = [self._cache_key(name) for name in names]
+        rows: List[Optional[np.ndarray]] = [self._cache_get(key) for key in keys]
+        
+        # Positions of each distinct uncached name, so it is encoded once
+        missing: Dict[bytes, List[int]] = {}
+        for index, (key, row) in enumerate(zip(keys, rows)):
+            if row is None:
+                missing.setdefault(key, []).append(index)
+        
+        if missing:
+            try:
+                encoded = self.sentence_model.encode(
+                    [names[positions[0]] for positions in missing.values()],
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+            except Exception as e:
+                logger.warning(f"Failed to encode entity names: {e}")
+                return None
+            
+            # FP16 output from a GPU model is widened so every cached row is float32
+            encoded = encoded.astype(np.float32, copy=False)
+            for (key, positions), embedding in zip(missing.items(), encoded):
+                self._cache_put(key, embedding)
+                for index in positions:
+                    rows[index] = embedding
+        
+        return np.stack(rows)
+
+    @staticmethod
+    def _block_keys(normalized: str) -> Set[str]:
+        """Cheap keys for blocking: the prefix of each word of the normalized name.
+        
+        Short words ("of", "&") are skipped unless the name has nothing else, so they
+        don't pull unrelated names into one block.
+        """
+        tokens = normalized.split()
+        keys = {token[:BLOCK_KEY_LENGTH] for token in tokens if len(token) >= BLOCK_KEY_LENGTH}
+        return keys or {token[:BLOCK_KEY_LENGTH] for token in tokens} or {""}
+
+    def _build_blocks(self,
+                      table: CandidateTable,
+                      embeddings: Optional[np.ndarray] = None) -> List[List[int]]:
+        """Groups of candidate indexes to compare; a candidate may be in several blocks."""
+        if len(table) <= self.blocking_min_candidates:
+            return [list(range(len(table)))]
+        
+        key_blocks: Dict[str, List[int]] = defaultdict(list)
+        for index, normalized in enumerate(table.normalized):
+            for key in self._block_keys(normalized):
+                key_blocks[key].append(index)
+        blocks = list(key_blocks.values())
+        
+        # Semantic neighbors also catch matches that share no words
+        # ("IBM" / "International Business Machines")
+        if faiss is not None and embeddings is not None:
+            blocks.extend(self._neighbor_blocks(embeddings))
+        return blocks
+
+    @staticmethod
+    def _neighbor_blocks(embeddings: np.ndarray) -> List[List[int]]:
+        """Each candidate with its approximate nearest neighbors by cosine similarity (HNSW)."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        index = faiss.IndexHNSWFlat(embeddings.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+        index.add(embeddings)
+        _, neighbors = index.search(embeddings, min(ANN_NEIGHBORS + 1, len(embeddings)))
+        return [
+            sorted({i}.union(int(j) for j in row if j >= 0))
+            for i, row in enumerate(neighbors)
+        ]
+
     def calculate_combined_similarity(self, 
                                     entity1: EntityCandidate, 
-                                    entity2: EntityCandidate) -> Tuple[float, Dict[str, float]]:
-        """Calculate combined similarity score with breakdown."""
+                                    entity2: EntityCandidate,
+                                    fuzzy_score: Optional[float] = None,
+                                    semantic_score: Optional[float] = None) -> Tuple[float, Dict[str, float]]:
+        """Calculate combined similarity score with breakdown.
+        
+        ``fuzzy_score`` and ``semantic_score`` may be passed in when already computed,
+        e.g. from ``fuzzy_similarity_matrix`` and the embedding matrix product.
+        """
         
         # Fuzzy string similarity
-        fuzzy_score = self.calculate_fuzzy_similarity(
-            entity1.normalized, entity2.normalized
-        )
+        if fuzzy_score is None:
+            fuzzy_score = self.calculate_fuzzy_similarity(
+                entity1.normalized, entity2.normalized
+            )
         
         # Semantic similarity
-        semantic_score = self.calculate_semantic_similarity(entity1, entity2)
+        if semantic_score is None:
+            semantic_score = self.calculate_semantic_similarity(entity1, entity2)
         
         # Type similarity (exact match or compatible types)
         type_score = 1.0 if entity1.type == entity2.type else 0.0
@@ -201,27 +436,26 @@ class EnhancedEntityResolution:
         return matches / len(common_keys)
 
     async def detect_duplicates(self, 
-                              entities: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Detect duplicate entities and group them into clusters."""
+                              entities: List[Dict[str, Any]],
+                              threshold: Optional[float] = None,
+                              embeddings: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Detect duplicate entities and group them into clusters.
+        
+        ``threshold`` overrides ``similarity_threshold`` for this call only, so a
+        shared resolver can serve concurrent requests with different thresholds.
+        ``embeddings`` may hold the entities' name embeddings, already encoded.
+        """
+        
+        if threshold is None:
+            threshold = self.similarity_threshold
         
         logger.info(f"Starting duplicate detection for {len(entities)} entities")
         
-        # Convert to EntityCandidate objects
-        candidates = []
-        for ent in entities:
-            candidate = EntityCandidate(
-                id=ent.get("id", str(uuid.uuid4())),
-                name=ent.get("name", ""),
-                normalized=self.normalize_entity_name(ent.get("name", "")),
-                type=ent.get("type", "OTHER"),
-                attributes=ent.get("attributes", {}),
-                source_doc_id=ent.get("source_doc_id", ""),
-                confidence=ent.get("confidence", 0.8)
-            )
-            candidates.append(candidate)
+        # One column per field, shared by clustering and the per-cluster steps below
+        table = CandidateTable.from_entities(entities)
         
         # Find duplicate clusters
-        clusters = await self.cluster_similar_entities(candidates)
+        clusters = await self.cluster_similar_entities(table, threshold=threshold, embeddings=embeddings)
         
         # Create canonical entities
         canonical_entities = []
@@ -229,25 +463,26 @@ class EnhancedEntityResolution:
         
         for cluster in clusters:
             # Choose canonical name (most frequent or highest confidence)
-            canonical_name = self.choose_canonical_name(cluster.member_entities)
+            canonical_name = self.choose_canonical_name(table, cluster.members)
+            member_names = [table.names[k] for k in cluster.members]
             
             canonical_entity = {
                 "canonical_id": cluster.canonical_id,
                 "canonical_name": canonical_name,
-                "member_names": [ent.name for ent in cluster.member_entities],
+                "member_names": member_names,
                 "occurrence_count": cluster.occurrence_count,
                 "similarity_scores": cluster.similarity_scores,
                 "entity_type": cluster.entity_type,
                 "merge_confidence": cluster.merge_confidence,
-                "attributes": self.merge_attributes(cluster.member_entities)
+                "attributes": self.merge_attributes(table, cluster.members)
             }
             canonical_entities.append(canonical_entity)
             
             # Create table row for UI display
-            if len(cluster.member_entities) > 1:  # Only include actual duplicates
+            if cluster.occurrence_count > 1:  # Only include actual duplicates
                 duplicates_table.append({
                     "canonical_name": canonical_name,
-                    "duplicates": ", ".join([ent.name for ent in cluster.member_entities[1:]]),
+                    "duplicates": ", ".join(member_names[1:]),
                     "count": cluster.occurrence_count,
                     "confidence": round(cluster.merge_confidence, 3),
                     "type": cluster.entity_type
@@ -255,8 +490,8 @@ class EnhancedEntityResolution:
         
         # Calculate metrics
         total_entities = len(entities)
-        total_duplicates = sum(len(cluster.member_entities) - 1 
-                             for cluster in clusters if len(cluster.member_entities) > 1)
+        total_duplicates = sum(cluster.occurrence_count - 1 
+                             for cluster in clusters if cluster.occurrence_count > 1)
         unique_entities = len(clusters)
         duplication_percentage = (total_duplicates / total_entities * 100) if total_entities > 0 else 0
         
@@ -278,106 +513,231 @@ class EnhancedEntityResolution:
         return result
 
     async def cluster_similar_entities(self, 
-                                     candidates: List[EntityCandidate]) -> List[EntityCluster]:
-        """Cluster similar entities using similarity thresholds."""
+                                     table: CandidateTable,
+                                     threshold: Optional[float] = None,
+                                     embeddings: Optional[np.ndarray] = None) -> List[EntityCluster]:
+        """Cluster similar entities using similarity thresholds.
+        
+        ``embeddings`` holds one unit-normalized row per table row (see
+        ``encode_names``); when omitted, all names are encoded here in one batch.
+        The work runs in a worker thread so the event loop stays free.
+        """
+        
+        if threshold is None:
+            threshold = self.similarity_threshold
+        return await asyncio.to_thread(self._cluster_sync, table, threshold, embeddings)
+
+    def _attribute_similarity_matrix(self, table: CandidateTable) -> np.ndarray:
+        """``calculate_attribute_similarity`` for every pair of candidates as one matrix.
+        
+        Attribute keys and (key, value) items are one-hot encoded per candidate, so
+        the shared keys and the equal values of every pair are two sparse matrix
+        products. Unhashable values fall back to comparing pairs one by one.
+        """
+        n = len(table)
+        key_ids: Dict[Any, int] = {}
+        item_ids: Dict[Tuple[Any, Any], int] = {}
+        rows, key_cols, item_cols = [], [], []
+        try:
+            for i, attributes in enumerate(table.attributes):
+                for key, value in attributes.items():
+                    rows.append(i)
+                    key_cols.append(key_ids.setdefault(key, len(key_ids)))
+                    item_cols.append(item_ids.setdefault((key, value), len(item_ids)))
+        except TypeError:
+            return self._attribute_similarity_matrix_pairwise(table)
+        
+        if not rows:
+            return np.zeros((n, n), dtype=np.float32)
+        
+        ones = np.ones(len(rows), dtype=np.float32)
+        keys = csr_matrix((ones, (rows, key_cols)), shape=(n, len(key_ids)))
+        items = csr_matrix((ones, (rows, item_cols)), shape=(n, len(item_ids)))
+        common = (keys @ keys.T).toarray()
+        matches = (items @ items.T).toarray()
+        return np.divide(matches, common, out=np.zeros_like(common), where=common > 0)
+
+    def _attribute_similarity_matrix_pairwise(self, table: CandidateTable) -> np.ndarray:
+        n = len(table)
+        matrix = np.zeros((n, n), dtype=np.float32)
+        with_attributes = [i for i, attributes in enumerate(table.attributes) if attributes]
+        for position, i in enumerate(with_attributes):
+            for j in with_attributes[position + 1:]:
+                matrix[i, j] = matrix[j, i] = self.calculate_attribute_similarity(
+                    table.attributes[i], table.attributes[j]
+                )
+        return matrix
+
+    def combined_similarity_matrix(self,
+                                   table: CandidateTable,
+                                   embeddings: Optional[np.ndarray] = None) -> np.ndarray:
+        """``calculate_combined_similarity`` scores for every pair of candidates as one matrix.
+        
+        ``embeddings`` holds one unit-normalized row per table row; without it the
+        semantic term is left out, as for pairs whose semantic score is not positive.
+        """
+        fuzzy = self.fuzzy_similarity_matrix(table)
+        type_codes = table.type_codes
+        type_sim = (type_codes[:, None] == type_codes[None, :]).astype(np.float32)
+        attr_sim = self._attribute_similarity_matrix(table)
+        
+        without_semantic = fuzzy * 0.7 + type_sim * 0.2 + attr_sim * 0.1
+        if embeddings is None or not self.use_embeddings:
+            return without_semantic
+        
+        semantic = embeddings @ embeddings.T
+        with_semantic = fuzzy * 0.4 + semantic * 0.4 + type_sim * 0.1 + attr_sim * 0.1
+        return np.where(semantic > 0, with_semantic, without_semantic)
+
+    def _cluster_sync(self,
+                      table: CandidateTable,
+                      threshold: float,
+                      embeddings: Optional[np.ndarray]) -> List[EntityCluster]:
+        """Blocking body of ``cluster_similar_entities``.
+        
+        Pairs scoring at least ``threshold`` become edges of a sparse graph and each
+        connected component is one cluster, so the result doesn't depend on input
+        order. A member's similarity score is its best edge inside the cluster.
+        """
+        n = len(table)
+        if n == 0:
+            return []
+        if embeddings is None and self.use_embeddings:
+            embeddings = self.encode_names(table.names)
+        
+        # Edges above the threshold, scored block by block; for small batches the
+        # single block holds every candidate
+        rows, cols, scores = [], [], []
+        for members in self._build_blocks(table, embeddings):
+            if len(members) < 2:
+                continue
+            members = np.asarray(members)
+            combined = self.combined_similarity_matrix(
+                table.take(members),
+                embeddings[members] if embeddings is not None else None
+            )
+            bi, bj = np.nonzero(np.triu(combined >= threshold, k=1))
+            rows.append(members[bi])
+            cols.append(members[bj])
+            scores.append(combined[bi, bj])
         
-        clusters = []
-        processed = set()
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.intp)
+        scores = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
         
-        for i, candidate in enumerate(candidates):
-            if candidate.id in processed:
-                continue
-            
-            # Start new cluster with this candidate
-            cluster_members = [candidate]
-            similarity_scores = [1.0]  # Self-similarity
-            processed.add(candidate.id)
-            
-            # Find similar entities
-            for j, other_candidate in enumerate(candidates[i+1:], i+1):
-                if other_candidate.id in processed:
-                    continue
-                
-                # Calculate similarity
-                combined_score, breakdown = self.calculate_combined_similarity(
-                    candidate, other_candidate
-                )
-                
-                # Add to cluster if above threshold
-                if combined_score >= self.similarity_threshold:
-                    cluster_members.append(other_candidate)
-                    similarity_scores.append(combined_score)
-                    processed.add(other_candidate.id)
-            
-            # Create cluster
+        graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n)).tocsr()
+        _, labels = connected_components(graph, directed=False)
+        
+        best_scores = np.zeros(n, dtype=np.float32)
+        np.maximum.at(best_scores, rows, scores)
+        np.maximum.at(best_scores, cols, scores)
+        
+        # Components in order of their first candidate, members in input order
+        groups: Dict[int, List[int]] = {}
+        for index, label in enumerate(labels):
+            groups.setdefault(label, []).append(index)
+        
+        clusters = []
+        for group in groups.values():
+            first = group[0]
+            similarity_scores = [1.0] + [float(best_scores[k]) for k in group[1:]]  # Self-similarity first
             cluster = EntityCluster(
                 canonical_id=str(uuid.uuid4()),
-                canonical_name=candidate.name,
-                member_entities=cluster_members,
+                canonical_name=table.names[first],
+                members=np.asarray(group),
                 similarity_scores=similarity_scores,
-                merge_confidence=np.mean(similarity_scores),
-                entity_type=candidate.type,
-                occurrence_count=len(cluster_members)
+                merge_confidence=float(np.mean(similarity_scores)),
+                entity_type=table.types[first],
+                occurrence_count=len(group)
             )
             clusters.append(cluster)
         
         return clusters
 
-    def choose_canonical_name(self, entities: List[EntityCandidate]) -> str:
-        """Choose the best canonical name from a cluster of entities."""
-        if len(entities) == 1:
-            return entities[0].name
-        
-        # Score each name based on various factors
-        name_scores = {}
-        
-        for entity in entities:
-            score = 0.0
-            
-            # Prefer names with higher confidence
-            score += entity.confidence * 0.4
-            
-            # Prefer longer names (more descriptive)
-            score += len(entity.name) / 100.0 * 0.2
-            
-            # Prefer names that appear more frequently
-            name_count = sum(1 for e in entities if e.name == entity.name)
-            score += name_count / len(entities) * 0.4
-            
-            name_scores[entity.name] = score
+    def choose_canonical_name(self, table: CandidateTable, members: np.ndarray) -> str:
+        """Choose the best canonical name from a cluster of entities.
+        
+        Each member is scored on its confidence, name length and how often its name
+        occurs in the cluster; the best-scoring member's name wins.
+        """
+        if len(members) == 1:
+            return table.names[members[0]]
+        
+        names = [table.names[k] for k in members]
+        _, name_ids, name_counts = np.unique(names, return_inverse=True, return_counts=True)
+        
+        scores = (
+            table.confidences[members] * 0.4 +  # Prefer names with higher confidence
+            table.name_lengths[members] / 100.0 * 0.2 +  # Prefer longer names (more descriptive)
+            name_counts[name_ids] / len(members) * 0.4  # Prefer names that appear more frequently
+        )
         
-        # Return name with highest score
-        return max(name_scores.items(), key=lambda x: x[1])[0]
+        return names[int(np.argmax(scores))]
 
-    def merge_attributes(self, entities: List[EntityCandidate]) -> Dict[str, Any]:
-        """Merge attributes from multiple entities."""
-        merged_attrs = {}
+    def merge_attributes(self, table: CandidateTable, members: np.ndarray) -> Dict[str, Any]:
+        """Merge attributes from multiple entities.
+        
+        A key keeps a single value when all entities agree; otherwise, or when any
+        value was a list, it becomes a list of the distinct values in first-seen order.
+        """
+        # Insertion-ordered sets per key, plus lists for values that can't be hashed
+        values: Dict[str, Dict[Any, None]] = defaultdict(dict)
+        unhashable: Dict[str, List[Any]] = defaultdict(list)
+        list_valued: Set[str] = set()
+        
+        for index in members:
+            for key, value in table.attributes[index].items():
+                if isinstance(value, list):
+                    list_valued.add(key)
+                    items = value
+                else:
+                    items = (value,)
+                bucket = values[key]
+                for item in items:
+                    try:
+                        bucket[item] = None
+                    except TypeError:
+                        if item not in unhashable[key]:
+                            unhashable[key].append(item)
         
-        for entity in entities:
-            for key, value in entity.attributes.items():
-                if key not in merged_attrs:
-                    merged_attrs[key] = value
-                elif isinstance(value, list):
-                    if isinstance(merged_attrs[key], list):
-                        merged_attrs[key].extend(value)
-                    else:
-                        merged_attrs[key] = [merged_attrs[key]] + value
-                elif value != merged_attrs[key]:
-                    # Handle conflicting values
-                    if not isinstance(merged_attrs[key], list):
-                        merged_attrs[key] = [merged_attrs[key]]
-                    if value not in merged_attrs[key]:
-                        merged_attrs[key].append(value)
+        merged_attrs = {}
+        for key, bucket in values.items():
+            distinct = list(bucket) + unhashable.get(key, [])
+            merged_attrs[key] = distinct if key in list_valued or len(distinct) > 1 else distinct[0]
         
         return merged_attrs
 
     async def resolve_entities_batch(self, 
                                    entity_batches: List[List[Dict[str, Any]]],
-                                   batch_size: int = 100) -> Dict[str, Any]:
-        """Process entities in batches for large datasets."""
+                                   batch_size: int = 100,
+                                   concurrency: int = 8) -> Dict[str, Any]:
+        """Process entities in batches for large datasets.
+        
+        Names from all batches are encoded up front in one model call, so each
+        batch only slices its rows instead of running inference of its own. Up to
+        ``concurrency`` batches are resolved at the same time; results are combined
+        in the order the batches were given.
+        """
         
         logger.info(f"Processing {len(entity_batches)} batches of entities")
         
+        all_embeddings = await asyncio.to_thread(self._encode_all, entity_batches)
+        offsets = np.cumsum([0] + [len(batch) for batch in entity_batches])
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(i: int, batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"Processing batch {i+1}/{len(entity_batches)}")
+                embeddings = None
+                if all_embeddings is not None:
+                    embeddings = all_embeddings[offsets[i]:offsets[i + 1]]
+                return await self.detect_duplicates(batch, embeddings=embeddings)
+        
+        batch_results = await asyncio.gather(
+            *(run(i, batch) for i, batch in enumerate(entity_batches))
+        )
+        
         all_canonical_entities = []
         all_duplicates_table = []
         total_metrics = {
@@ -388,11 +748,7 @@ class EnhancedEntityResolution:
             "clusters_found": 0
         }
         
-        for i, batch in enumerate(entity_batches):
-            logger.info(f"Processing batch {i+1}/{len(entity_batches)}")
-            
-            batch_result = await self.detect_duplicates(batch)
-            
+        for batch_result in batch_results:
             all_canonical_entities.extend(batch_result["canonical_entities"])
             all_duplicates_table.extend(batch_result["duplicates_table"])
             
@@ -417,39 +773,50 @@ class EnhancedEntityResolution:
             "metrics": total_metrics
         }
 
+    def _encode_all(self, entity_batches: List[List[Dict[str, Any]]]) -> Optional[np.ndarray]:
+        """Embeddings for the names of every batch, concatenated in batch order.
+        
+        Each distinct name across all batches is encoded once (see ``encode_names``).
+        """
+        if not self.use_embeddings:
+            return None
+        return self.encode_names([ent.get("name", "") for batch in entity_batches for ent in batch])
+
     def get_resolution_statistics(self, resolution_result: Dict[str, Any]) -> Dict[str, Any]:
         """Get detailed statistics about the entity resolution process."""
         
         metrics = resolution_result.get("metrics", {})
         canonical_entities = resolution_result.get("canonical_entities", [])
         
+        # Confidences, cluster sizes and entity types in a single pass
+        count = len(canonical_entities)
+        confidence_scores = np.empty(count, dtype=np.float64)
+        cluster_sizes = np.empty(count, dtype=np.int64)
+        type_distribution = Counter()
+        for index, entity in enumerate(canonical_entities):
+            confidence_scores[index] = entity["merge_confidence"]
+            cluster_sizes[index] = entity["occurrence_count"]
+            type_distribution[entity["entity_type"]] += 1
+        
         # Confidence distribution
-        confidence_scores = [ent["merge_confidence"] for ent in canonical_entities]
         confidence_stats = {
-            "mean": np.mean(confidence_scores) if confidence_scores else 0.0,
-            "std": np.std(confidence_scores) if confidence_scores else 0.0,
-            "min": np.min(confidence_scores) if confidence_scores else 0.0,
-            "max": np.max(confidence_scores) if confidence_scores else 0.0
+            "mean": float(confidence_scores.mean()) if count else 0.0,
+            "std": float(confidence_scores.std()) if count else 0.0,
+            "min": float(confidence_scores.min()) if count else 0.0,
+            "max": float(confidence_scores.max()) if count else 0.0
         }
         
-        # Entity type distribution
-        type_distribution = {}
-        for entity in canonical_entities:
-            entity_type = entity["entity_type"]
-            type_distribution[entity_type] = type_distribution.get(entity_type, 0) + 1
-        
         # Cluster size distribution
-        cluster_sizes = [ent["occurrence_count"] for ent in canonical_entities]
         cluster_stats = {
-            "mean_cluster_size": np.mean(cluster_sizes) if cluster_sizes else 0.0,
-            "max_cluster_size": np.max(cluster_sizes) if cluster_sizes else 0.0,
-            "single_entity_clusters": sum(1 for size in cluster_sizes if size == 1)
+            "mean_cluster_size": float(cluster_sizes.mean()) if count else 0.0,
+            "max_cluster_size": int(cluster_sizes.max()) if count else 0,
+            "single_entity_clusters": int(np.count_nonzero(cluster_sizes == 1))
         }
         
         return {
             "basic_metrics": metrics,
             "confidence_statistics": confidence_stats,
-            "type_distribution": type_distribution,
+            "type_distribution": dict(type_distribution),
             "cluster_statistics": cluster_stats,
             "quality_score": self._calculate_quality_score(resolution_result)
         }
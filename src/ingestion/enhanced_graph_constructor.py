@@ -4,20 +4,194 @@ Supports node-link JSON output, D3.js compatibility, and real-time updates
 """
 
 import uuid
-import json
-from typing import Dict, List, Any, Optional, Tuple
+import weakref
+from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import asyncio
+from functools import lru_cache
 import networkx as nx
 import numpy as np
+import orjson
+from scipy.optimize import minimize
 from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError, TransientError
 import structlog
 
 from src.utils.logger import get_logger
 
 logger = get_logger("enhanced_graph_constructor")
 
+# Read queries are module constants so every call sends the identical text and Neo4j
+# reuses its cached plan
+VISUALIZATION_NODES_QUERY = """
+MATCH (n:Entity)
+RETURN n.id as id, n.label as label, n.type as type,
+       n.color as color, n.size as size, n.x as x, n.y as y,
+       properties(n) as stored
+LIMIT $limit
+"""
+
+VISUALIZATION_EDGES_QUERY = """
+MATCH (source:Entity)-[r:RELATES]->(target:Entity)
+RETURN r.id as id, source.id as source, target.id as target,
+       r.type as type, r.weight as weight, r.color as color,
+       r.thickness as thickness, properties(r) as stored
+LIMIT $limit
+"""
+
+VISUALIZATION_STATS_QUERY = """
+MATCH (n:Entity)
+OPTIONAL MATCH (n)-[r:RELATES]-()
+RETURN count(DISTINCT n) as node_count,
+       count(r) as edge_count,
+       collect(DISTINCT n.type) as node_types
+"""
+
+# Cypher doesn't accept a parameter as a variable-length bound, so the depth is
+# written into the text; there is one query (and one cached plan) per depth
+SUBGRAPH_QUERY_TEMPLATE = """
+MATCH path = (center:Entity {{id: $entity_id}})-[*1..{depth}]-(connected:Entity)
+WITH center, connected, relationships(path) as rels
+RETURN center, connected, rels
+"""
+
+
+@lru_cache(maxsize=16)
+def _subgraph_query(depth: int) -> str:
+    return SUBGRAPH_QUERY_TEMPLATE.format(depth=int(depth))
+
+
+# Rows per transaction when writing to Neo4j
+NEO4J_WRITE_BATCH_SIZE = 1000
+
+# With APOC installed, Neo4j batches the rows itself: nodes on several threads, edges
+# on one, since parallel edge batches would contend for locks on shared endpoints
+APOC_NODE_QUERY = """
+CALL apoc.periodic.iterate(
+    'UNWIND $rows AS row RETURN row',
+    'MERGE (n:Entity {id: row.id}) SET n += row.props, n.updated_at = datetime() REMOVE n.properties',
+    {batchSize: $batch_size, parallel: true, params: {rows: $rows}}
+)
+YIELD failedOperations, errorMessages, updateStatistics
+RETURN failedOperations, errorMessages, updateStatistics
+"""
+
+APOC_EDGE_QUERY = """
+CALL apoc.periodic.iterate(
+    'UNWIND $rows AS row RETURN row',
+    'MATCH (source:Entity {id: row.source}) MATCH (target:Entity {id: row.target})
+     MERGE (source)-[r:RELATES {id: row.id}]->(target)
+     SET r += row.props, r.updated_at = datetime() REMOVE r.properties',
+    {batchSize: $batch_size, parallel: false, params: {rows: $rows}}
+)
+YIELD failedOperations, errorMessages, updateStatistics
+RETURN failedOperations, errorMessages, updateStatistics
+"""
+
+# Without APOC, sessions writing shards of the rows at the same time; each shard is
+# one query that Neo4j commits every NEO4J_WRITE_BATCH_SIZE rows
+NEO4J_WRITE_CONCURRENCY = 8
+# Attempts per shard when a write fails with a transient error such as a deadlock
+NEO4J_WRITE_ATTEMPTS = 3
+
+NODE_BATCH_QUERY = f"""
+UNWIND $rows AS row
+CALL {{
+    WITH row
+    MERGE (n:Entity {{id: row.id}})
+    SET n += row.props,
+        n.updated_at = datetime()
+    REMOVE n.properties
+}} IN TRANSACTIONS OF {NEO4J_WRITE_BATCH_SIZE} ROWS
+"""
+
+EDGE_BATCH_QUERY = f"""
+UNWIND $rows AS row
+CALL {{
+    WITH row
+    MATCH (source:Entity {{id: row.source}})
+    MATCH (target:Entity {{id: row.target}})
+    MERGE (source)-[r:RELATES {{id: row.id}}]->(target)
+    SET r += row.props,
+        r.updated_at = datetime()
+    REMOVE r.properties
+}} IN TRANSACTIONS OF {NEO4J_WRITE_BATCH_SIZE} ROWS
+"""
+
+# Graphs with more nodes than this are laid out by minimizing the Fruchterman-Reingold
+# energy with L-BFGS instead of running nx.spring_layout
+ENERGY_LAYOUT_MIN_NODES = 500
+LAYOUT_ITERATIONS = 50
+# Rows of the pairwise repulsion computed at a time, bounding its memory
+REPULSION_BLOCK_SIZE = 256
+# Source nodes sampled when estimating betweenness centrality
+BETWEENNESS_SAMPLES = 50
+
+# Relationship types whose edge weight is scaled up or down
+BOOSTED_RELATION_TYPES = ("WORKS_FOR", "PART_OF", "LOCATED_IN")
+DAMPED_RELATION_TYPES = ("RELATED_TO", "SIMILAR_TO")
+
+# Edge colors by weight: below the first threshold, between the two, and above
+EDGE_COLOR_THRESHOLDS = (0.6, 0.8)
+EDGE_COLORS = ("#95A5A6", "#F39C12", "#2ECC71")  # Weak - Gray, Medium - Orange, Strong - Green
+
+# Run once before the first write: MERGE on :Entity(id) is an index seek instead of a
+# label scan, and subgraph queries can filter on type
+ENTITY_INDEX_QUERIES = (
+    "CREATE INDEX entity_id_idx IF NOT EXISTS FOR (n:Entity) ON (n.id)",
+    "CREATE INDEX entity_type_idx IF NOT EXISTS FOR (n:Entity) ON (n.type)",
+)
+
+# Databases whose indexes exist, per driver. Kept here rather than on the constructor,
+# which the API builds per request, so the DDL is sent once per driver and database
+_indexed_databases: "weakref.WeakKeyDictionary[Any, Set[str]]" = weakref.WeakKeyDictionary()
+
+# Drivers whose server turned out not to have APOC, so later constructors skip the probe
+_drivers_without_apoc: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+# Node and edge ``properties`` are stored as top-level Neo4j properties with this
+# prefix, so Cypher can filter and index on them
+PROPERTY_PREFIX = "prop_"
+_NATIVE_PROPERTY_TYPES = (str, int, float, bool)
+
+
+def _flatten_properties(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """``properties`` as prefixed top-level keys, keeping the values Neo4j can store.
+    
+    Those are strings, numbers, booleans and non-empty lists of one such type;
+    anything else (nested maps, mixed lists, None) is left out.
+    """
+    flat = {}
+    for key, value in properties.items():
+        if isinstance(value, list):
+            storable = bool(value) and isinstance(value[0], _NATIVE_PROPERTY_TYPES) and \
+                all(type(item) is type(value[0]) for item in value)
+        else:
+            storable = isinstance(value, _NATIVE_PROPERTY_TYPES)
+        if storable:
+            flat[f"{PROPERTY_PREFIX}{key}"] = value
+    return flat
+
+
+def _unflatten_properties(stored: Any) -> Dict[str, Any]:
+    """The prefixed keys of a stored node or relationship (or property map), unprefixed.
+    
+    Nodes and edges written before properties were flattened keep them as a JSON
+    string under ``properties``; that is decoded when no prefixed keys exist.
+    """
+    if not stored:
+        return {}
+    offset = len(PROPERTY_PREFIX)
+    properties = {key[offset:]: value for key, value in stored.items() if key.startswith(PROPERTY_PREFIX)}
+    legacy = stored.get("properties")
+    if not properties and isinstance(legacy, str):
+        try:
+            properties = orjson.loads(legacy)
+        except orjson.JSONDecodeError:
+            logger.warning("Ignoring undecodable legacy properties")
+    return properties
+
 
 @dataclass
 class GraphNode:
@@ -67,6 +241,8 @@ class EnhancedGraphConstructor:
         
         # NetworkX graph for local operations
         self.nx_graph = nx.Graph()
+        # Layout of the last built graph, one (x, y) row per node
+        self.positions = np.zeros((0, 2), dtype=np.float32)
         
         logger.info("Enhanced graph constructor initialized")
 
@@ -101,93 +277,39 @@ class EnhancedGraphConstructor:
         
         # Boost weight for certain relationship types
         rel_type = relationship.get("relation_type", "").upper()
-        if rel_type in ["WORKS_FOR", "PART_OF", "LOCATED_IN"]:
+        if rel_type in BOOSTED_RELATION_TYPES:
             weight *= 1.2
-        elif rel_type in ["RELATED_TO", "SIMILAR_TO"]:
+        elif rel_type in DAMPED_RELATION_TYPES:
             weight *= 0.8
         
         return min(weight, 1.0)
 
+    def calculate_node_sizes(self, entities: List[Dict[str, Any]]) -> np.ndarray:
+        """``calculate_node_size`` for many entities at once, as an int array."""
+        count = len(entities)
+        confidence = np.fromiter((e.get("confidence", 0.5) for e in entities), dtype=np.float64, count=count)
+        occurrence = np.fromiter((e.get("occurrence_count", 1) for e in entities), dtype=np.float64, count=count)
+        return 10 + (confidence * 10).astype(np.int64) + np.minimum(occurrence * 2, 20).astype(np.int64)
+
+    def calculate_edge_weights(self, relationships: List[Dict[str, Any]]) -> np.ndarray:
+        """``calculate_edge_weight`` for many relationships at once."""
+        count = len(relationships)
+        confidence = np.fromiter((r.get("confidence", 0.5) for r in relationships), dtype=np.float64, count=count)
+        strength = np.fromiter((r.get("strength", 0.5) for r in relationships), dtype=np.float64, count=count)
+        rel_types = np.array([r.get("relation_type", "").upper() for r in relationships], dtype=str)
+        
+        factor = np.where(np.isin(rel_types, BOOSTED_RELATION_TYPES), 1.2,
+                          np.where(np.isin(rel_types, DAMPED_RELATION_TYPES), 0.8, 1.0))
+        return np.minimum(np.maximum(confidence, strength) * factor, 1.0)
+
     async def build_graph_from_ontology(self, ontology: Dict[str, Any]) -> Dict[str, Any]:
         """Build knowledge graph from ontology data."""
         
         logger.info("Building graph from ontology")
         
         try:
-            nodes = []
-            edges = []
-            
-            # Process entities into nodes
-            entities_data = ontology.get("entities", {})
-            entity_id_map = {}  # Map entity names to IDs
-            
-            for entity_type, type_data in entities_data.items():
-                for entity in type_data.get("items", []):
-                    node_id = entity.get("id", str(uuid.uuid4()))
-                    entity_name = entity.get("name", "")
-                    
-                    # Store mapping for relationship processing
-                    entity_id_map[entity_name] = node_id
-                    entity_id_map[entity.get("normalized", entity_name)] = node_id
-                    
-                    node = GraphNode(
-                        id=node_id,
-                        label=entity_name,
-                        type=entity_type,
-                        properties=entity.get("attributes", {}),
-                        color=self.get_node_color(entity_type),
-                        size=self.calculate_node_size(entity)
-                    )
-                    nodes.append(node)
-            
-            # Process relationships into edges
-            relationships = ontology.get("relationships", [])
-            for relationship in relationships:
-                source_id = relationship.get("source_entity_id")
-                target_id = relationship.get("target_entity_id")
-                
-                # Skip if we can't find both entities
-                if not source_id or not target_id:
-                    continue
-                
-                edge_id = relationship.get("id", str(uuid.uuid4()))
-                weight = self.calculate_edge_weight(relationship)
-                
-                edge = GraphEdge(
-                    id=edge_id,
-                    source=source_id,
-                    target=target_id,
-                    type=relationship.get("relation_type", "RELATED_TO"),
-                    properties={
-                        "sentence_context": relationship.get("sentence_context", ""),
-                        "confidence": relationship.get("confidence", 0.8),
-                        "source_doc_id": relationship.get("source_doc_id", "")
-                    },
-                    weight=weight,
-                    color=self.get_edge_color(weight),
-                    thickness=self.calculate_edge_thickness(weight)
-                )
-                edges.append(edge)
-            
-            # Create NetworkX graph for layout calculation
-            self.nx_graph.clear()
-            
-            # Add nodes to NetworkX
-            for node in nodes:
-                self.nx_graph.add_node(node.id, **asdict(node))
-            
-            # Add edges to NetworkX
-            for edge in edges:
-                self.nx_graph.add_edge(edge.source, edge.target, **asdict(edge))
-            
-            # Calculate layout positions
-            if len(nodes) > 0:
-                positions = self.calculate_layout_positions(nodes, edges)
-                
-                # Update node positions
-                for node in nodes:
-                    if node.id in positions:
-                        node.x, node.y = positions[node.id]
+            # Building the nodes, edges and layout is CPU-bound; run it off the event loop
+            nodes, edges, node_types, edge_types = await asyncio.to_thread(self._construct_graph, ontology)
             
             # Store in Neo4j if driver is available
             neo4j_stats = {}
@@ -201,8 +323,8 @@ class EnhancedGraphConstructor:
                 "statistics": {
                     "total_nodes": len(nodes),
                     "total_edges": len(edges),
-                    "node_types": list(set(node.type for node in nodes)),
-                    "edge_types": list(set(edge.type for edge in edges)),
+                    "node_types": list(node_types),
+                    "edge_types": list(edge_types),
                     "density": self.calculate_graph_density(len(nodes), len(edges)),
                     "created_at": datetime.now().isoformat()
                 },
@@ -217,6 +339,88 @@ class EnhancedGraphConstructor:
             logger.error(f"Failed to build graph from ontology: {e}")
             raise
 
+    def _construct_graph(self, ontology: Dict[str, Any]) -> Tuple[List[GraphNode], List[GraphEdge], Set[str], Set[str]]:
+        """Nodes and edges of an ontology, laid out, with the node and edge types seen."""
+        nodes = []
+        edges = []
+        # Types seen, gathered while building nodes and edges
+        node_types = set()
+        edge_types = set()
+        
+        # Process entities into nodes
+        entities_data = ontology.get("entities", {})
+        
+        typed_entities = []
+        for entity_type, type_data in entities_data.items():
+            items = type_data.get("items", [])
+            if items:
+                node_types.add(entity_type)
+            typed_entities.extend((entity_type, entity) for entity in items)
+        
+        # Sizes for all entities at once
+        sizes = self.calculate_node_sizes([entity for _, entity in typed_entities])
+        
+        for (entity_type, entity), size in zip(typed_entities, sizes.tolist()):
+            node_id = entity.get("id", str(uuid.uuid4()))
+            entity_name = entity.get("name", "")
+            
+            node = GraphNode(
+                id=node_id,
+                label=entity_name,
+                type=entity_type,
+                properties=entity.get("attributes", {}),
+                color=self.get_node_color(entity_type),
+                size=size
+            )
+            nodes.append(node)
+        
+        # Process relationships into edges, skipping those missing either entity
+        relationships = [
+            relationship for relationship in ontology.get("relationships", [])
+            if relationship.get("source_entity_id") and relationship.get("target_entity_id")
+        ]
+        weights = self.calculate_edge_weights(relationships)
+        colors = self.get_edge_colors(weights)
+        thicknesses = np.maximum(1, (weights * 5).astype(np.int64)).tolist()
+        
+        for relationship, weight, color, thickness in zip(relationships, weights.tolist(), colors, thicknesses):
+            source_id = relationship["source_entity_id"]
+            target_id = relationship["target_entity_id"]
+            edge_id = relationship.get("id", str(uuid.uuid4()))
+            
+            edge_type = relationship.get("relation_type", "RELATED_TO")
+            edge_types.add(edge_type)
+            edge = GraphEdge(
+                id=edge_id,
+                source=source_id,
+                target=target_id,
+                type=edge_type,
+                properties={
+                    "sentence_context": relationship.get("sentence_context", ""),
+                    "confidence": relationship.get("confidence", 0.8),
+                    "source_doc_id": relationship.get("source_doc_id", "")
+                },
+                weight=weight,
+                color=color,
+                thickness=thickness
+            )
+            edges.append(edge)
+        
+        # Create NetworkX graph for layout calculation; layout and statistics only
+        # read the structure and edge weights, so nothing else is copied in
+        self.nx_graph.clear()
+        self.nx_graph.add_nodes_from(node.id for node in nodes)
+        self.nx_graph.add_weighted_edges_from(
+            (edge.source, edge.target, edge.weight) for edge in edges
+        )
+        
+        # Calculate layout positions, kept as one array and copied to the nodes once
+        self.positions = self.calculate_layout_positions(nodes, edges)
+        for node, (x, y) in zip(nodes, self.positions.tolist()):
+            node.x, node.y = x, y
+        
+        return nodes, edges, node_types, edge_types
+
     def get_edge_color(self, weight: float) -> str:
         """Get edge color based on weight."""
         if weight >= 0.8:
@@ -226,69 +430,135 @@ class EnhancedGraphConstructor:
         else:
             return "#95A5A6"  # Weak - Gray
 
+    def get_edge_colors(self, weights: np.ndarray) -> List[str]:
+        """``get_edge_color`` for an array of weights, as one lookup per edge."""
+        steps = np.searchsorted(EDGE_COLOR_THRESHOLDS, weights, side="right")
+        return [EDGE_COLORS[step] for step in steps.tolist()]
+
     def calculate_edge_thickness(self, weight: float) -> int:
         """Calculate edge thickness based on weight."""
         return max(1, int(weight * 5))
 
     def calculate_layout_positions(self, 
                                  nodes: List[GraphNode], 
-                                 edges: List[GraphEdge]) -> Dict[str, Tuple[float, float]]:
-        """Calculate layout positions for nodes."""
+                                 edges: List[GraphEdge]) -> np.ndarray:
+        """Calculate layout positions for nodes.
         
-        if len(nodes) == 0:
-            return {}
+        Returns a float32 (n, 2) array with one row per node, in ``nodes`` order.
+        """
         
-        if len(nodes) == 1:
-            return {nodes[0].id: (0, 0)}
+        if len(nodes) <= 1:
+            return np.zeros((len(nodes), 2), dtype=np.float32)
         
         try:
-            # Use spring layout for better visualization
-            pos = nx.spring_layout(
-                self.nx_graph,
-                k=1/np.sqrt(len(nodes)),  # Optimal distance between nodes
-                iterations=50,
-                seed=42  # For reproducible layouts
-            )
+            k = 1/np.sqrt(len(nodes))  # Optimal distance between nodes
+            if len(nodes) > ENERGY_LAYOUT_MIN_NODES:
+                positions = self.energy_layout(nodes, edges, k)
+            else:
+                # Use spring layout for better visualization
+                pos = nx.spring_layout(
+                    self.nx_graph,
+                    k=k,
+                    iterations=LAYOUT_ITERATIONS,
+                    seed=42  # For reproducible layouts
+                )
+                positions = np.array([pos[node.id] for node in nodes], dtype=np.float32)
             
             # Scale positions to reasonable range
-            scale_factor = 300
-            scaled_pos = {
-                node_id: (x * scale_factor, y * scale_factor)
-                for node_id, (x, y) in pos.items()
-            }
+            positions *= 300
             
-            return scaled_pos
+            return positions
             
         except Exception as e:
             logger.warning(f"Failed to calculate layout: {e}")
             # Fallback to circular layout
             return self.circular_layout(nodes)
 
-    def circular_layout(self, nodes: List[GraphNode]) -> Dict[str, Tuple[float, float]]:
-        """Create circular layout as fallback."""
-        positions = {}
+    def energy_layout(self,
+                      nodes: List[GraphNode],
+                      edges: List[GraphEdge],
+                      k: float) -> np.ndarray:
+        """Fruchterman-Reingold layout found by minimizing its energy with L-BFGS-B.
+        
+        Edges attract with energy ``weight * d**3 / (3k)`` and every pair of nodes
+        repels with ``-k**2 * log(d)``, the potentials of spring_layout's forces.
+        The analytic gradient lets L-BFGS take far fewer, better steps than the
+        fixed-step force iterations. Returns a float32 (n, 2) array in ``nodes``
+        order, rescaled to [-1, 1] like spring_layout's positions.
+        """
         n = len(nodes)
+        index = {node.id: i for i, node in enumerate(nodes)}
+        pairs = [
+            (index[edge.source], index[edge.target], edge.weight)
+            for edge in edges
+            if edge.source in index and edge.target in index and edge.source != edge.target
+        ]
+        sources = np.array([i for i, _, _ in pairs], dtype=np.intp)
+        targets = np.array([j for _, j, _ in pairs], dtype=np.intp)
+        weights = np.array([w for _, _, w in pairs], dtype=np.float64)
+        k2 = k * k
         
-        for i, node in enumerate(nodes):
-            angle = 2 * np.pi * i / n
-            x = 200 * np.cos(angle)
-            y = 200 * np.sin(angle)
-            positions[node.id] = (x, y)
+        def energy(flat: np.ndarray) -> Tuple[float, np.ndarray]:
+            pos = flat.reshape(n, 2)
+            grad = np.zeros_like(pos)
+            
+            # Attraction along edges
+            delta = pos[sources] - pos[targets]
+            dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+            total = float(np.sum(weights * dist ** 3)) / (3 * k)
+            pull = (weights * dist / k)[:, None] * delta
+            np.add.at(grad, sources, pull)
+            np.add.at(grad, targets, -pull)
+            
+            # Repulsion between all pairs, a block of rows at a time; each pair is
+            # seen from both ends, hence the 1/4 on the summed log of squared distances
+            for start in range(0, n, REPULSION_BLOCK_SIZE):
+                stop = min(start + REPULSION_BLOCK_SIZE, n)
+                delta = pos[start:stop, None, :] - pos[None, :, :]
+                dist2 = np.einsum("ijk,ijk->ij", delta, delta)
+                rows = np.arange(stop - start)
+                dist2[rows, rows + start] = 1.0  # A node doesn't repel itself
+                np.maximum(dist2, 1e-12, out=dist2)
+                total -= k2 / 4 * float(np.log(dist2).sum())
+                grad[start:stop] -= k2 * np.einsum("ijk,ij->ik", delta, 1.0 / dist2)
+            
+            return total, grad.ravel()
+        
+        x0 = np.random.default_rng(42).random((n, 2))  # For reproducible layouts
+        result = minimize(energy, x0.ravel(), jac=True, method="L-BFGS-B",
+                          options={"maxiter": LAYOUT_ITERATIONS})
         
-        return positions
+        pos = result.x.reshape(n, 2)
+        pos -= pos.mean(axis=0)
+        extent = np.abs(pos).max()
+        if extent > 0:
+            pos /= extent
+        return pos.astype(np.float32)
+
+    def circular_layout(self, nodes: List[GraphNode]) -> np.ndarray:
+        """Create circular layout as fallback, as a float32 (n, 2) array."""
+        angles = np.linspace(0, 2 * np.pi, len(nodes), endpoint=False)
+        return (200 * np.column_stack((np.cos(angles), np.sin(angles)))).astype(np.float32)
 
     def calculate_graph_density(self, num_nodes: int, num_edges: int) -> float:
         """Calculate graph density."""
         if num_nodes <= 1:
             return 0.0
         
-        max_edges = num_nodes * (num_nodes - 1) / 2
-        return num_edges / max_edges if max_edges > 0 else 0.0
+        # Edges over the n(n - 1)/2 possible ones, divided once
+        return 2 * num_edges / (num_nodes * (num_nodes - 1))
 
     async def store_in_neo4j(self, 
                            nodes: List[GraphNode], 
                            edges: List[GraphEdge]) -> Dict[str, Any]:
-        """Store graph data in Neo4j."""
+        """Store graph data in Neo4j.
+        
+        Nodes and edges are written in batches of ``NEO4J_WRITE_BATCH_SIZE`` rows, one
+        transaction per batch, which Neo4j forms itself: with ``apoc.periodic.iterate``
+        when APOC is installed, otherwise with ``CALL { ... } IN TRANSACTIONS`` queries
+        from ``NEO4J_WRITE_CONCURRENCY`` concurrent sessions. The counts are what
+        Neo4j reports as newly created.
+        """
         
         if not self.neo4j_driver:
             return {"error": "Neo4j driver not available"}
@@ -300,71 +570,65 @@ class EnhancedGraphConstructor:
                 # Clear existing data (optional - be careful in production)
                 # await session.run("MATCH (n) DETACH DELETE n")
                 
-                # Create nodes
-                nodes_created = 0
-                for node in nodes:
-                    query = """
-                    MERGE (n:Entity {id: $id})
-                    SET n.label = $label,
-                        n.type = $type,
-                        n.color = $color,
-                        n.size = $size,
-                        n.x = $x,
-                        n.y = $y,
-                        n.properties = $properties,
-                        n.updated_at = datetime()
-                    RETURN n
-                    """
-                    
-                    result = await session.run(query, {
-                        "id": node.id,
+                await self._ensure_indexes(session)
+            
+            # Node and edge rows for the batched queries
+            node_rows = [
+                {
+                    "id": node.id,
+                    "props": {
                         "label": node.label,
                         "type": node.type,
                         "color": node.color,
                         "size": node.size,
                         "x": node.x,
                         "y": node.y,
-                        "properties": json.dumps(node.properties)
-                    })
-                    
-                    if await result.single():
-                        nodes_created += 1
-                
-                # Create relationships
-                edges_created = 0
-                for edge in edges:
-                    query = """
-                    MATCH (source:Entity {id: $source_id})
-                    MATCH (target:Entity {id: $target_id})
-                    MERGE (source)-[r:RELATES {id: $edge_id}]->(target)
-                    SET r.type = $edge_type,
-                        r.weight = $weight,
-                        r.color = $color,
-                        r.thickness = $thickness,
-                        r.properties = $properties,
-                        r.updated_at = datetime()
-                    RETURN r
-                    """
-                    
-                    result = await session.run(query, {
-                        "source_id": edge.source,
-                        "target_id": edge.target,
-                        "edge_id": edge.id,
-                        "edge_type": edge.type,
+                        **_flatten_properties(node.properties)
+                    }
+                }
+                for node in nodes
+            ]
+            edge_rows = [
+                {
+                    "id": edge.id,
+                    "source": edge.source,
+                    "target": edge.target,
+                    "props": {
+                        "type": edge.type,
                         "weight": edge.weight,
                         "color": edge.color,
                         "thickness": edge.thickness,
-                        "properties": json.dumps(edge.properties)
-                    })
-                    
-                    if await result.single():
-                        edges_created += 1
-                
-                return {
-                    "nodes_created": nodes_created,
-                    "edges_created": edges_created,
-                    "success": True
+                        **_flatten_properties(edge.properties)
+                    }
                 }
+                for edge in edges
+            ]
+            
+            # Nodes are written first, so every edge finds its endpoints
+            nodes_created = edges_created = None
+            if self.neo4j_driver not in _drivers_without_apoc:
+                try:
+                    nodes_created = await self._write_server_side(APOC_NODE_QUERY, node_rows, "nodesCreated")
+                    edges_created = await self._write_server_side(
+                        APOC_EDGE_QUERY, edge_rows, "relationshipsCreated"
+                    )
+                except ClientError as e:
+                    if e.code != "Neo.ClientError.Procedure.ProcedureNotFound":
+                        raise
+                    logger.warning("APOC not installed, writing graph batches from the client")
+                    _drivers_without_apoc.add(self.neo4j_driver)
+            
+            if nodes_created is None:
+                nodes_created = await self._write_sharded(NODE_BATCH_QUERY, node_rows, "id", "nodes_created")
+                edges_created = await self._write_sharded(
+                    EDGE_BATCH_QUERY, edge_rows, "source", "relationships_created"
+                )
+            
+            return {
+                "nodes_created": nodes_created,
+                "edges_created": edges_created,
+                "success": True
+            }
                 
         except Exception as e:
             logger.error(f"Failed to store graph in Neo4j: {e}")
@@ -373,6 +637,64 @@ class EnhancedGraphConstructor:
                 "success": False
             }
 
+    async def _write_server_side(self, query: str, rows: List[Dict[str, Any]], counter: str) -> int:
+        """Send all ``rows`` in one call to an ``apoc.periodic.iterate`` query.
+        
+        Neo4j splits them into batches and commits those itself. Returns the
+        ``counter`` entry of the reported update statistics.
+        """
+        if not rows:
+            return 0
+        async with self.neo4j_driver.session(database=self.database) as session:
+            result = await session.run(query, rows=rows, batch_size=NEO4J_WRITE_BATCH_SIZE)
+            record = await result.single()
+        if record["failedOperations"]:
+            raise RuntimeError(f"Batched graph write failed: {record['errorMessages']}")
+        return record["updateStatistics"][counter]
+
+    async def _write_sharded(self,
+                             query: str,
+                             rows: List[Dict[str, Any]],
+                             shard_key: str,
+                             counter: str) -> int:
+        """Write ``rows`` with one session per shard, all shards at once.
+        
+        Each shard is sent as one query, which commits every ``NEO4J_WRITE_BATCH_SIZE``
+        rows. Rows are sharded on ``shard_key`` so concurrent transactions don't MERGE
+        the same node (or, for edges, lock the same source node). A shard that still
+        hits a deadlock is sent again; MERGE makes that safe. Returns the sum of the
+        summaries' ``counter``.
+        """
+        shards: List[List[Dict[str, Any]]] = [[] for _ in range(NEO4J_WRITE_CONCURRENCY)]
+        for row in rows:
+            shards[hash(row[shard_key]) % NEO4J_WRITE_CONCURRENCY].append(row)
+        
+        async def write_shard(shard: List[Dict[str, Any]]) -> int:
+            for attempt in range(1, NEO4J_WRITE_ATTEMPTS + 1):
+                try:
+                    # CALL ... IN TRANSACTIONS needs an auto-commit query, so no execute_write
+                    async with self.neo4j_driver.session(database=self.database) as session:
+                        result = await session.run(query, rows=shard)
+                        summary = await result.consume()
+                    return getattr(summary.counters, counter)
+                except TransientError as e:
+                    if attempt == NEO4J_WRITE_ATTEMPTS:
+                        raise
+                    logger.warning("Retrying graph write shard", attempt=attempt, error=str(e))
+        
+        counts = await asyncio.gather(*(write_shard(shard) for shard in shards if shard))
+        return sum(counts)
+
+    async def _ensure_indexes(self, session):
+        """Create the :Entity indexes if they don't exist yet, once per driver and database."""
+        indexed = _indexed_databases.setdefault(self.neo4j_driver, set())
+        if self.database in indexed:
+            return
+        for query in ENTITY_INDEX_QUERIES:
+            result = await session.run(query)
+            await result.consume()
+        indexed.add(self.database)
+
     async def get_neo4j_visualization_data(self, 
                                          limit: int = 100) -> Dict[str, Any]:
         """Get graph data from Neo4j for visualization."""
@@ -381,104 +703,60 @@ class EnhancedGraphConstructor:
             return {"error": "Neo4j driver not available"}
         
         try:
-            async with self.neo4j_driver.session(database=self.database) as session:
-                # Get nodes
-                nodes_query = """
-                MATCH (n:Entity)
-                RETURN n.id as id, n.label as label, n.type as type,
-                       n.color as color, n.size as size, n.x as x, n.y as y,
-                       n.properties as properties
-                LIMIT $limit
-                """
-                
-                nodes_result = await session.run(nodes_query, {"limit": limit})
-                nodes = []
-                
-                async for record in nodes_result:
-                    node_data = {
-                        "id": record["id"],
-                        "label": record["label"],
-                        "type": record["type"],
-                        "color": record["color"],
-                        "size": record["size"],
-                        "x": record["x"],
-                        "y": record["y"]
-                    }
-                    
-                    # Parse properties JSON
-                    try:
-                        if record["properties"]:
-                            node_data["properties"] = json.loads(record["properties"])
-                        else:
-                            node_data["properties"] = {}
-                    except:
-                        node_data["properties"] = {}
-                    
-                    nodes.append(node_data)
-                
-                # Get edges
-                edges_query = """
-                MATCH (source:Entity)-[r:RELATES]->(target:Entity)
-                RETURN r.id as id, source.id as source, target.id as target,
-                       r.type as type, r.weight as weight, r.color as color,
-                       r.thickness as thickness, r.properties as properties
-                LIMIT $limit
-                """
-                
-                edges_result = await session.run(edges_query, {"limit": limit})
-                edges = []
-                
-                async for record in edges_result:
-                    edge_data = {
-                        "id": record["id"],
-                        "source": record["source"],
-                        "target": record["target"],
-                        "type": record["type"],
-                        "weight": record["weight"],
-                        "color": record["color"],
-                        "thickness": record["thickness"]
-                    }
-                    
-                    # Parse properties JSON
-                    try:
-                        if record["properties"]:
-                            edge_data["properties"] = json.loads(record["properties"])
-                        else:
-                            edge_data["properties"] = {}
-                    except:
-                        edge_data["properties"] = {}
-                    
-                    edges.append(edge_data)
-                
-                # Get statistics
-                stats_query = """
-                MATCH (n:Entity)
-                OPTIONAL MATCH (n)-[r:RELATES]-()
-                RETURN count(DISTINCT n) as node_count,
-                       count(r) as edge_count,
-                       collect(DISTINCT n.type) as node_types
-                """
-                
-                stats_result = await session.run(stats_query)
-                stats_record = await stats_result.single()
-                
-                statistics = {
-                    "total_nodes": stats_record["node_count"],
-                    "total_edges": stats_record["edge_count"],
-                    "node_types": stats_record["node_types"],
-                    "density": self.calculate_graph_density(
-                        stats_record["node_count"], 
-                        stats_record["edge_count"]
-                    ),
-                    "retrieved_at": datetime.now().isoformat()
+            # Nodes, edges and statistics are independent queries, so they run at
+            # once, each in its own session
+            node_records, edge_records, stats_records = await asyncio.gather(
+                self._fetch_all(VISUALIZATION_NODES_QUERY, {"limit": limit}),
+                self._fetch_all(VISUALIZATION_EDGES_QUERY, {"limit": limit}),
+                self._fetch_all(VISUALIZATION_STATS_QUERY, {})
+            )
+            
+            nodes = [
+                {
+                    "id": record["id"],
+                    "label": record["label"],
+                    "type": record["type"],
+                    "color": record["color"],
+                    "size": record["size"],
+                    "x": record["x"],
+                    "y": record["y"],
+                    "properties": _unflatten_properties(record["stored"])
                 }
-                
-                return {
-                    "nodes": nodes,
-                    "edges": edges,
-                    "statistics": statistics,
-                    "success": True
+                for record in node_records
+            ]
+            
+            edges = [
+                {
+                    "id": record["id"],
+                    "source": record["source"],
+                    "target": record["target"],
+                    "type": record["type"],
+                    "weight": record["weight"],
+                    "color": record["color"],
+                    "thickness": record["thickness"],
+                    "properties": _unflatten_properties(record["stored"])
                 }
+                for record in edge_records
+            ]
+            
+            stats_record = stats_records[0]
+            statistics = {
+                "total_nodes": stats_record["node_count"],
+                "total_edges": stats_record["edge_count"],
+                "node_types": stats_record["node_types"],
+                "density": self.calculate_graph_density(
+                    stats_record["node_count"], 
+                    stats_record["edge_count"]
+                ),
+                "retrieved_at": datetime.now().isoformat()
+            }
+            
+            return {
+                "nodes": nodes,
+                "edges": edges,
+                "statistics": statistics,
+                "success": True
+            }
                 
         except Exception as e:
             logger.error(f"Failed to get Neo4j visualization data: {e}")
@@ -487,6 +765,12 @@ class EnhancedGraphConstructor:
                 "success": False
             }
 
+    async def _fetch_all(self, query: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """All records of a read query as dicts, fetched in bulk on a session of its own."""
+        async with self.neo4j_driver.session(database=self.database) as session:
+            result = await session.run(query, parameters)
+            return await result.data()
+
     async def get_entity_subgraph(self, 
                                 entity_id: str, 
                                 depth: int = 2) -> Dict[str, Any]:
@@ -497,16 +781,7 @@ class EnhancedGraphConstructor:
         
         try:
             async with self.neo4j_driver.session(database=self.database) as session:
-                query = """
-                MATCH path = (center:Entity {id: $entity_id})-[*1..$depth]-(connected:Entity)
-                WITH center, connected, relationships(path) as rels
-                RETURN center, connected, rels
-                """
-                
-                result = await session.run(query, {
-                    "entity_id": entity_id,
-                    "depth": depth
-                })
+                result = await session.run(_subgraph_query(depth), {"entity_id": entity_id})
                 
                 nodes = {}
                 edges = []
@@ -522,7 +797,7 @@ class EnhancedGraphConstructor:
                         "size": center["size"],
                         "x": center.get("x"),
                         "y": center.get("y"),
-                        "properties": json.loads(center.get("properties", "{}"))
+                        "properties": _unflatten_properties(center)
                     }
                     
                     # Add connected node
@@ -535,7 +810,7 @@ class EnhancedGraphConstructor:
                         "size": connected["size"],
                         "x": connected.get("x"),
                         "y": connected.get("y"),
-                        "properties": json.loads(connected.get("properties", "{}"))
+                        "properties": _unflatten_properties(connected)
                     }
                     
                     # Add relationships
@@ -548,7 +823,7 @@ class EnhancedGraphConstructor:
                             "weight": rel["weight"],
                             "color": rel["color"],
                             "thickness": rel["thickness"],
-                            "properties": json.loads(rel.get("properties", "{}"))
+                            "properties": _unflatten_properties(rel)
                         }
                         edges.append(edge_data)
                 
@@ -569,6 +844,16 @@ class EnhancedGraphConstructor:
                 "success": False
             }
 
+    @staticmethod
+    def _top_items(node_ids: List[str], values: np.ndarray, count: int = 5) -> List[Tuple[str, float]]:
+        """The ``count`` highest values with their node ids, highest first."""
+        if len(values) > count:
+            top = np.argpartition(values, -count)[-count:]
+        else:
+            top = np.arange(len(values))
+        top = top[np.argsort(-values[top], kind="stable")]
+        return [(node_ids[i], float(values[i])) for i in top]
+
     def get_graph_statistics(self) -> Dict[str, Any]:
         """Get comprehensive graph statistics."""
         
@@ -577,7 +862,9 @@ class EnhancedGraphConstructor:
                 "networkx_stats": {
                     "nodes": self.nx_graph.number_of_nodes(),
                     "edges": self.nx_graph.number_of_edges(),
-                    "density": nx.density(self.nx_graph),
+                    "density": self.calculate_graph_density(
+                        self.nx_graph.number_of_nodes(), self.nx_graph.number_of_edges()
+                    ),
                     "is_connected": nx.is_connected(self.nx_graph) if self.nx_graph.number_of_nodes() > 0 else False
                 }
             }
@@ -585,14 +872,27 @@ class EnhancedGraphConstructor:
             if self.nx_graph.number_of_nodes() > 0:
                 # Calculate centrality measures
                 try:
-                    degree_centrality = nx.degree_centrality(self.nx_graph)
-                    betweenness_centrality = nx.betweenness_centrality(self.nx_graph)
+                    node_ids = list(self.nx_graph.nodes)
+                    node_count = len(node_ids)
+                    
+                    # Degree centrality is the adjacency's row sums over n - 1
+                    adjacency = nx.to_scipy_sparse_array(self.nx_graph, nodelist=node_ids, weight=None)
+                    degrees = np.asarray(adjacency.sum(axis=1), dtype=np.float64).ravel()
+                    degree_centrality = degrees / (node_count - 1) if node_count > 1 else np.ones(node_count)
+                    
+                    # Betweenness from shortest paths out of a sample of source nodes
+                    betweenness_centrality = nx.betweenness_centrality(
+                        self.nx_graph, k=min(BETWEENNESS_SAMPLES, node_count), seed=42
+                    )
                     
                     stats["centrality"] = {
-                        "top_degree": sorted(degree_centrality.items(), 
-                                           key=lambda x: x[1], reverse=True)[:5],
-                        "top_betweenness": sorted(betweenness_centrality.items(), 
-                                                key=lambda x: x[1], reverse=True)[:5]
+                        "top_degree": self._top_items(node_ids, degree_centrality),
+                        "top_betweenness": self._top_items(
+                            node_ids, np.fromiter(
+                                (betweenness_centrality[node_id] for node_id in node_ids),
+                                dtype=np.float64, count=node_count
+                            )
+                        )
                     }
                 except:
                     stats["centrality"] = {"error": "Failed to calculate centrality"}
@@ -600,10 +900,10 @@ class EnhancedGraphConstructor:
                 # Calculate clustering
                 try:
                     clustering = nx.clustering(self.nx_graph)
+                    coefficients = np.fromiter(clustering.values(), dtype=np.float64, count=len(clustering))
                     stats["clustering"] = {
-                        "average": np.mean(list(clustering.values())),
-                        "top_clustered": sorted(clustering.items(), 
-                                              key=lambda x: x[1], reverse=True)[:5]
+                        "average": float(coefficients.mean()),
+                        "top_clustered": self._top_items(list(clustering), coefficients)
                     }
                 except:
                     stats["clustering"] = {"error": "Failed to calculate clustering"}
@@ -3,13 +3,16 @@ Enhanced LLM-powered ontology generation with structured JSON output
 Supports OpenAI, Ollama, and local models for entity and relationship extraction
 """
 
-import json
+import os
 import re
 import uuid
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
 import asyncio
+import random
+import numpy as np
+import orjson
 import spacy
 import structlog
 from sentence_transformers import SentenceTransformer
@@ -47,6 +50,85 @@ class ExtractedRelationship:
     source_doc_id: str
 
 
+class SemanticExtractionCache:
+    """Reuses LLM extraction responses for chunks semantically close to earlier ones.
+    
+    Chunk embeddings are kept L2-normalized in a fixed-size ring buffer, so a
+    lookup is a single matrix-vector product against every cached chunk.
+    """
+    
+    def __init__(self, threshold: float = 0.9, max_entries: int = 2048):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._embeddings: Optional[np.ndarray] = None
+        self._responses: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._size = 0
+        self._next = 0
+    
+    def get(self, embedding: np.ndarray) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Return ``(response, similarity)`` for the closest cached chunk, or ``(None, best)``."""
+        if self._size == 0:
+            return None, 0.0
+        
+        scores = self._embeddings[:self._size] @ embedding
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        
+        if similarity >= self.threshold:
+            return self._responses[best], similarity
+        return None, similarity
+    
+    def put(self, embedding: np.ndarray, response: Dict[str, Any]):
+        if self._embeddings is None:
+            self._embeddings = np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32)
+        
+        self._embeddings[self._next] = embedding
+        self._responses[self._next] = response
+        self._next = (self._next + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+
+
+# Extraction caches are shared by all generator instances, one per LLM model
+_extraction_caches: Dict[str, SemanticExtractionCache] = {}
+
+# Chunk extraction requests in flight at once; a local Ollama server only runs
+# OLLAMA_NUM_PARALLEL requests at a time and queues the rest
+OPENAI_MAX_CONCURRENCY = 10
+OLLAMA_MAX_CONCURRENCY = 4
+
+# Attempts per LLM request when it is rate limited (429) or the server fails (5xx),
+# waiting LLM_RETRY_BASE_DELAY * 2**attempt seconds plus jitter in between
+LLM_MAX_ATTEMPTS = 4
+LLM_RETRY_BASE_DELAY = 1.0
+
+
+# Only sentence boundaries and named entities are read from spaCy docs. NER and the
+# statistical senter carry their own token embeddings in en_core_web_sm, so the
+# shared tok2vec and everything built on it can be switched off
+SPACY_DISABLED_PIPES = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+
+# Texts per nlp.pipe batch when preprocessing paragraphs
+SPACY_BATCH_SIZE = int(os.getenv("ONTOLOGY_SPACY_BATCH", "32"))
+
+
+def _load_spacy_pipeline(model_name: str = "en_core_web_sm"):
+    """Load a spaCy pipeline that only does sentence segmentation and NER."""
+    nlp = spacy.load(model_name, disable=SPACY_DISABLED_PIPES)
+    if "senter" in nlp.component_names:
+        nlp.enable_pipe("senter")
+    else:
+        # Without a trained senter, fall back to punctuation-based sentence splitting
+        nlp.add_pipe("sentencizer", first=True)
+    return nlp
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI or Ollama client error is a rate limit or server failure."""
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
 class EnhancedOntologyGenerator:
     """Enhanced ontology generator with multiple LLM backends and structured output."""
 
@@ -54,17 +136,28 @@ class EnhancedOntologyGenerator:
                  openai_client=None, 
                  ollama_client=None,
                  model_name: str = "gpt-3.5-turbo",
-                 use_spacy: bool = True):
-        """Initialize enhanced ontology generator."""
+                 use_spacy: bool = True,
+                 max_concurrency: Optional[int] = None):
+        """Initialize enhanced ontology generator.
+        
+        ``max_concurrency`` caps the chunk extraction requests sent at once and
+        defaults to ``OPENAI_MAX_CONCURRENCY`` or ``OLLAMA_MAX_CONCURRENCY``.
+        """
         self.openai_client = openai_client
         self.ollama_client = ollama_client
         self.model_name = model_name
         self.use_spacy = use_spacy
+        if max_concurrency is None:
+            max_concurrency = OPENAI_MAX_CONCURRENCY if openai_client else OLLAMA_MAX_CONCURRENCY
+        self.max_concurrency = max_concurrency
+        # Shared by every extraction on this generator; created on first use so it
+        # binds to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
         
         # Load spaCy model for NLP preprocessing
         if use_spacy:
             try:
-                self.nlp = spacy.load("en_core_web_sm")
+                self.nlp = _load_spacy_pipeline()
             except OSError:
                 logger.warning("spaCy model not found, using basic text processing")
                 self.nlp = None
@@ -77,6 +170,8 @@ class EnhancedOntologyGenerator:
         except Exception as e:
             logger.warning(f"Failed to load sentence transformer: {e}")
             self.sentence_model = None
+        
+        self.extraction_cache = _extraction_caches.setdefault(model_name, SemanticExtractionCache())
             
         logger.info("Enhanced ontology generator initialized", 
                    model=model_name, spacy_enabled=use_spacy)
@@ -92,15 +187,15 @@ class EnhancedOntologyGenerator:
             response_text = response_text.strip()
             
             # Try to parse JSON
-            return json.loads(response_text)
-        except json.JSONDecodeError as e:
+            return orjson.loads(response_text)
+        except orjson.JSONDecodeError as e:
             logger.warning(f"Failed to parse JSON response: {e}")
             # Try to extract JSON from text
             json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
             if json_match:
                 try:
-                    return json.loads(json_match.group())
-                except json.JSONDecodeError:
+                    return orjson.loads(json_match.group())
+                except orjson.JSONDecodeError:
                     pass
             
             # Return empty structure if parsing fails
@@ -108,73 +203,138 @@ class EnhancedOntologyGenerator:
 
     def preprocess_text(self, text: str) -> List[Dict[str, Any]]:
         """Preprocess text using spaCy for better entity extraction."""
+        return self.preprocess_texts([text])[0]
+
+    def preprocess_texts(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Split several texts into sentences, one list of sentence dicts per text.
+        
+        Texts are cut into paragraphs and every paragraph goes through a single
+        ``nlp.pipe`` call; character offsets are relative to the original text.
+        """
         if not self.nlp:
             # Basic sentence splitting
-            sentences = [s.strip() for s in text.split('.') if s.strip()]
-            return [{"text": s, "start": 0, "end": len(s)} for s in sentences]
+            results = []
+            for text in texts:
+                sentences = [s.strip() for s in text.split('.') if s.strip()]
+                results.append([{"text": s, "start": 0, "end": len(s)} for s in sentences])
+            return results
         
-        doc = self.nlp(text)
-        sentences = []
-        
-        for sent in doc.sents:
-            sentences.append({
-                "text": sent.text.strip(),
-                "start": sent.start_char,
-                "end": sent.end_char,
-                "entities": [(ent.text, ent.label_, ent.start_char, ent.end_char) 
-                           for ent in sent.ents]
-            })
+        paragraphs = []
+        owners = []
+        offsets = []
+        for i, text in enumerate(texts):
+            offset = 0
+            for paragraph in text.split("\n\n"):
+                if paragraph.strip():
+                    paragraphs.append(paragraph)
+                    owners.append(i)
+                    offsets.append(offset)
+                offset += len(paragraph) + 2
+        
+        results: List[List[Dict[str, Any]]] = [[] for _ in texts]
+        docs = self.nlp.pipe(paragraphs, batch_size=SPACY_BATCH_SIZE)
+        
+        for doc, owner, offset in zip(docs, owners, offsets):
+            for sent in doc.sents:
+                results[owner].append({
+                    "text": sent.text.strip(),
+                    "start": sent.start_char + offset,
+                    "end": sent.end_char + offset,
+                    "entities": [(ent.text, ent.label_, ent.start_char + offset, ent.end_char + offset) 
+                               for ent in sent.ents]
+                })
         
-        return sentences
+        return results
 
     async def extract_entities_and_relations(self, 
                                            text: str, 
-                                           doc_id: str) -> Tuple[List[ExtractedEntity], List[ExtractedRelationship]]:
-        """Extract entities and relationships from text using LLM."""
+                                           doc_id: str,
+                                           sentences: Optional[List[Dict[str, Any]]] = None) -> Tuple[List[ExtractedEntity], List[ExtractedRelationship]]:
+        """Extract entities and relationships from text using LLM.
         
-        # Preprocess text
-        sentences = self.preprocess_text(text)
+        Chunks are independent, so up to ``max_concurrency`` of them (across all
+        extractions on this generator) are sent to the LLM at the same time;
+        results are combined in document order. ``sentences`` skips preprocessing
+        when the caller already split the text.
+        """
         
-        entities = []
-        relationships = []
+        # Preprocess text
+        if sentences is None:
+            sentences = self.preprocess_text(text)
         
         # Process in chunks to avoid token limits
         chunk_size = 3  # Process 3 sentences at a time
         
+        chunks = []
         for i in range(0, len(sentences), chunk_size):
             chunk_sentences = sentences[i:i+chunk_size]
             chunk_text = " ".join([s["text"] for s in chunk_sentences])
             
             if len(chunk_text.strip()) < 10:  # Skip very short chunks
                 continue
-                
+            chunks.append((chunk_sentences, chunk_text))
+        
+        if chunks and not (self.openai_client or self.ollama_client):
+            logger.warning("No LLM client available, using fallback extraction")
+        
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def process_chunk(chunk_sentences: List[Dict[str, Any]], 
+                                chunk_text: str) -> Tuple[List[ExtractedEntity], List[ExtractedRelationship]]:
             # Create extraction prompt
             prompt = self._create_extraction_prompt(chunk_text)
             
             try:
                 # Call LLM for extraction
-                if self.openai_client:
-                    response = await self._call_openai(prompt)
-                elif self.ollama_client:
-                    response = await self._call_ollama(prompt)
+                if self.openai_client or self.ollama_client:
+                    async with self._semaphore:
+                        response = await self._call_llm_cached(prompt, chunk_text)
                 else:
-                    logger.warning("No LLM client available, using fallback extraction")
                     response = self._fallback_extraction(chunk_text)
                 
                 # Parse response and create entities/relationships
-                chunk_entities, chunk_relations = self._parse_extraction_response(
-                    response, chunk_sentences, doc_id
-                )
-                
-                entities.extend(chunk_entities)
-                relationships.extend(chunk_relations)
+                return self._parse_extraction_response(response, chunk_sentences, doc_id)
                 
             except Exception as e:
                 logger.error(f"Failed to extract from chunk: {e}")
-                continue
+                return [], []
+        
+        results = await asyncio.gather(*(process_chunk(*chunk) for chunk in chunks))
+        
+        entities = []
+        relationships = []
+        for chunk_entities, chunk_relations in results:
+            entities.extend(chunk_entities)
+            relationships.extend(chunk_relations)
         
         return entities, relationships
 
+    async def _call_llm_cached(self, prompt: str, chunk_text: str) -> Dict[str, Any]:
+        """Call the configured LLM, reusing the response for near-duplicate chunks."""
+        
+        chunk_embedding = None
+        if self.sentence_model:
+            # A model forward pass; run it off the event loop so concurrent chunks keep going
+            chunk_embedding = (await asyncio.to_thread(
+                self.sentence_model.encode,
+                chunk_text, normalize_embeddings=True, show_progress_bar=False
+            )).astype(np.float32)
+            
+            cached_response, similarity = self.extraction_cache.get(chunk_embedding)
+            if cached_response is not None:
+                logger.debug("Extraction cache hit", similarity=round(similarity, 3))
+                return cached_response
+        
+        call = self._call_openai if self.openai_client else self._call_ollama
+        response = await call(prompt)
+        
+        # Empty responses are what the callers return on API errors; don't cache those
+        if chunk_embedding is not None and (response.get("entities") or response.get("relationships")):
+            self.extraction_cache.put(chunk_embedding, response)
+        
+        return response
+
     def _create_extraction_prompt(self, text: str) -> str:
         """Create a structured prompt for entity and relationship extraction."""
         return f"""
@@ -208,14 +368,16 @@ Important: Return only valid JSON. Focus on the most important entities and clea
     async def _call_openai(self, prompt: str) -> Dict[str, Any]:
         """Call OpenAI API for extraction."""
         try:
-            response = await self.openai_client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": "You are an expert knowledge extraction system. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000
+            response = await self._with_backoff(
+                lambda: self.openai_client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "system", "content": "You are an expert knowledge extraction system. Return only valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,
+                    max_tokens=1000
+                )
             )
             
             content = response.choices[0].message.content
@@ -228,12 +390,14 @@ Important: Return only valid JSON. Focus on the most important entities and clea
     async def _call_ollama(self, prompt: str) -> Dict[str, Any]:
         """Call Ollama API for extraction."""
         try:
-            response = await self.ollama_client.chat(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": "You are an expert knowledge extraction system. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ]
+            response = await self._with_backoff(
+                lambda: self.ollama_client.chat(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "system", "content": "You are an expert knowledge extraction system. Return only valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ]
+                )
             )
             
             content = response['message']['content']
@@ -243,6 +407,18 @@ Important: Return only valid JSON. Focus on the most important entities and clea
             logger.error(f"Ollama API call failed: {e}")
             return {"entities": [], "relationships": []}
 
+    async def _with_backoff(self, request):
+        """Await ``request()``, retrying rate-limited and server-failed calls with exponential backoff."""
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            try:
+                return await request()
+            except Exception as e:
+                if attempt == LLM_MAX_ATTEMPTS - 1 or not _is_retryable(e):
+                    raise
+                delay = LLM_RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, LLM_RETRY_BASE_DELAY)
+                logger.warning("Retrying LLM request", attempt=attempt + 1, delay=round(delay, 2), error=str(e))
+                await asyncio.sleep(delay)
+
     def _fallback_extraction(self, text: str) -> Dict[str, Any]:
         """Fallback extraction using spaCy when LLM is not available."""
         if not self.nlp:
@@ -334,16 +510,20 @@ Important: Return only valid JSON. Focus on the most important entities and clea
 
     async def generate_hierarchical_ontology(self, 
                                            text: str, 
-                                           doc_id: str) -> Dict[str, Any]:
+                                           doc_id: str,
+                                           sentences: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Generate hierarchical ontology with entities grouped by type."""
         
         logger.info(f"Generating ontology for document {doc_id}")
         
         try:
             # Extract entities and relationships
-            entities, relationships = await self.extract_entities_and_relations(text, doc_id)
+            entities, relationships = await self.extract_entities_and_relations(
+                text, doc_id, sentences=sentences
+            )
             
-            # Group entities by type
+            # Group entities by type. The dataclasses hold only flat fields plus the
+            # attributes dict they own, so a shallow copy stands in for asdict's deep walk
             entities_by_type = {}
             for entity in entities:
                 entity_type = entity.type
@@ -354,7 +534,7 @@ Important: Return only valid JSON. Focus on the most important entities and clea
                     }
                 
                 entities_by_type[entity_type]["count"] += 1
-                entities_by_type[entity_type]["items"].append(asdict(entity))
+                entities_by_type[entity_type]["items"].append(dict(vars(entity)))
             
             # Create summary statistics
             total_entities = len(entities)
@@ -367,7 +547,7 @@ Important: Return only valid JSON. Focus on the most important entities and clea
             # Structure final ontology
             ontology = {
                 "entities": entities_by_type,
-                "relationships": [asdict(rel) for rel in relationships],
+                "relationships": [dict(vars(rel)) for rel in relationships],
                 "summary": {
                     "total_entities": total_entities,
                     "unique_entities": unique_entities,
@@ -386,6 +566,21 @@ Important: Return only valid JSON. Focus on the most important entities and clea
             logger.error(f"Failed to generate ontology: {e}")
             raise
 
+    async def generate_hierarchical_ontologies(self, 
+                                             docs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Generate ontologies for several ``(text, doc_id)`` pairs.
+        
+        All texts are preprocessed in one batched spaCy pass, then the documents are
+        extracted concurrently. Ontologies are returned in the order of ``docs``.
+        """
+        
+        sentences_per_doc = self.preprocess_texts([text for text, _ in docs])
+        
+        return await asyncio.gather(*(
+            self.generate_hierarchical_ontology(text, doc_id, sentences=sentences)
+            for (text, doc_id), sentences in zip(docs, sentences_per_doc)
+        ))
+
     def get_entity_statistics(self, ontology: Dict[str, Any]) -> Dict[str, Any]:
         """Get detailed statistics about the generated ontology."""
         
@@ -8,6 +8,8 @@ import structlog
 from dataclasses import dataclass
 from difflib import SequenceMatcher
 
+import numpy as np
+
 from src.utils.logger import get_logger
 
 logger = get_logger("entity_resolution")
@@ -59,17 +61,33 @@ class EntityResolver:
         )
 
         try:
-            resolved_entities = []
+            embeddings, has_embedding = self._embedding_matrix(entities)
+            labels = [entity.label.lower() for entity in entities]
+            types = np.array([entity.type for entity in entities], dtype=object)
+            # Cosine similarity of every pair of new entities in one product
+            similarities = embeddings @ embeddings.T
+
+            resolved_indexes: List[int] = []
+            resolved_labels: List[str] = []
             id_mapping = {}
 
             # First pass: deduplicate within new entities
-            for entity in entities:
+            for i, entity in enumerate(entities):
                 # Check for duplicates in resolved entities
-                duplicate = self._find_duplicate(entity, resolved_entities)
+                candidates = np.asarray(resolved_indexes, dtype=np.intp)
+                match = self._find_duplicate(
+                    labels[i],
+                    entity.type,
+                    has_embedding[i],
+                    resolved_labels,
+                    types[candidates],
+                    has_embedding[candidates],
+                    similarities[i, candidates]
+                )
 
-                if duplicate:
+                if match is not None:
                     # Merge with duplicate
-                    merged = self._merge_entities(duplicate, entity)
+                    merged = self._merge_entities(entities[resolved_indexes[match]], entity)
                     id_mapping[entity.id] = merged.id
                     logger.debug(
                         "Merged duplicate entity",
@@ -77,17 +95,37 @@ class EntityResolver:
                         merged_id=merged.id
                     )
                 else:
-                    resolved_entities.append(entity)
+                    resolved_indexes.append(i)
+                    resolved_labels.append(labels[i])
                     id_mapping[entity.id] = entity.id
 
             # Second pass: match with existing entities if provided
             if existing_entities:
-                final_entities = []
-                for entity in resolved_entities:
-                    existing_match = self._find_duplicate(entity, existing_entities)
+                existing_embeddings, existing_has_embedding = self._embedding_matrix(
+                    existing_entities, dimension=embeddings.shape[1]
+                )
+                existing_labels = [entity.label.lower() for entity in existing_entities]
+                existing_types = np.array([entity.type for entity in existing_entities], dtype=object)
+                existing_similarities = (
+                    embeddings[np.asarray(resolved_indexes, dtype=np.intp)] @ existing_embeddings.T
+                )
 
-                    if existing_match:
+                final_indexes = []
+                for row, i in enumerate(resolved_indexes):
+                    entity = entities[i]
+                    match = self._find_duplicate(
+                        labels[i],
+                        entity.type,
+                        has_embedding[i],
+                        existing_labels,
+                        existing_types,
+                        existing_has_embedding,
+                        existing_similarities[row]
+                    )
+
+                    if match is not None:
                         # Update mapping to point to existing entity
+                        existing_match = existing_entities[match]
                         id_mapping[entity.id] = existing_match.id
                         logger.debug(
                             "Matched to existing entity",
@@ -95,9 +133,11 @@ class EntityResolver:
                             existing_id=existing_match.id
                         )
                     else:
-                        final_entities.append(entity)
+                        final_indexes.append(i)
+
+                resolved_indexes = final_indexes
 
-                resolved_entities = final_entities
+            resolved_entities = [entities[i] for i in resolved_indexes]
 
             logger.info(
                 "Entity resolution completed",
@@ -111,36 +151,66 @@ class EntityResolver:
             logger.error("Entity resolution failed", error=str(e))
             raise
 
-    def _find_duplicate(
-        self,
-        entity: Entity,
-        entity_list: List[Entity]
-    ) -> Optional[Entity]:
-        """Find duplicate entity in list based on similarity."""
+    @staticmethod
+    def _embedding_matrix(
+        entities: List[Entity],
+        dimension: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stack entity embeddings into L2-normalized float32 rows.
+
+        Args:
+            entities: Entities whose embeddings to stack
+            dimension: Row length; defaults to the first embedding's length
 
-        for candidate in entity_list:
-            # Type must match
-            if entity.type != candidate.type:
-                continue
+        Returns:
+            Tuple of (matrix with a zero row for entities without an embedding,
+            boolean mask of entities with one)
+        """
+
+        has_embedding = np.array([bool(entity.embedding) for entity in entities], dtype=bool)
+        if dimension is None:
+            dimension = next((len(entity.embedding) for entity in entities if entity.embedding), 0)
+
+        matrix = np.zeros((len(entities), dimension), dtype=np.float32)
+        for i, entity in enumerate(entities):
+            # Embeddings of another length are left as zeros and so score 0
+            if entity.embedding and len(entity.embedding) == dimension:
+                matrix[i] = entity.embedding
 
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix, has_embedding
+
+    def _find_duplicate(
+        self,
+        label: str,
+        entity_type: str,
+        has_embedding: bool,
+        candidate_labels: List[str],
+        candidate_types: np.ndarray,
+        candidate_has_embedding: np.ndarray,
+        embedding_similarities: np.ndarray
+    ) -> Optional[int]:
+        """Find the index of the first similar candidate, given lowercased labels and
+        the entity's embedding similarity to each candidate."""
+
+        with_embeddings = candidate_has_embedding & has_embedding
+        # Averaged with a label similarity of at most 1, embeddings further apart
+        # than this can't reach the threshold, so their labels aren't compared
+        reachable = ~with_embeddings | (embedding_similarities >= 2 * self.similarity_threshold - 1)
+
+        # Type must match
+        for j in np.flatnonzero(reachable & (candidate_types == entity_type)):
             # Calculate label similarity
-            label_similarity = self._calculate_similarity(
-                entity.label.lower(),
-                candidate.label.lower()
-            )
+            similarity = self._calculate_similarity(label, candidate_labels[j])
 
             # Use embedding similarity if available
-            if entity.embedding and candidate.embedding:
-                embedding_similarity = self._cosine_similarity(
-                    entity.embedding,
-                    candidate.embedding
-                )
-                similarity = (label_similarity + embedding_similarity) / 2
-            else:
-                similarity = label_similarity
+            if with_embeddings[j]:
+                similarity = (similarity + float(embedding_similarities[j])) / 2
 
             if similarity >= self.similarity_threshold:
-                return candidate
+                return int(j)
 
         return None
 
@@ -171,18 +241,3 @@ class EntityResolver:
     def _calculate_similarity(str1: str, str2: str) -> float:
         """Calculate string similarity using SequenceMatcher."""
         return SequenceMatcher(None, str1, str2).ratio()
-
-    @staticmethod
-    def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        if len(vec1) != len(vec2):
-            return 0.0
-
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        magnitude1 = sum(a * a for a in vec1) ** 0.5
-        magnitude2 = sum(b * b for b in vec2) ** 0.5
-
-        if magnitude1 == 0 or magnitude2 == 0:
-            return 0.0
-
-        return dot_product / (magnitude1 * magnitude2)
@@ -0,0 +1,59 @@
+"""
+Embedding quantization helpers
+Compact encodings for float32 embedding matrices: int8 codes with a per-vector
+scale, or bfloat16 bit patterns
+"""
+
+from typing import Tuple
+import numpy as np
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 quantization.
+
+    Returns ``(codes, scales)`` where ``codes * scales[:, None]`` approximates
+    ``vectors``. Cosine similarity is scale-invariant, so the codes can be
+    indexed and compared directly in a cosine-space collection.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    peak = np.max(np.abs(vectors), axis=1)
+    peak = np.where(peak == 0, 1.0, peak)
+    codes = np.clip(np.round(vectors * (127.0 / peak[:, None])), -127, 127).astype(np.int8)
+    scales = (peak / 127.0).astype(np.float16)
+    return codes, scales
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Inverse of :func:`quantize_int8`."""
+    return codes.astype(np.float32) * scales.astype(np.float32)[:, None]
+
+
+def int8_record_dtype(dimension: int) -> np.dtype:
+    """Structured dtype holding one vector's int8 codes and its float16 scale."""
+    return np.dtype([("codes", np.int8, (dimension,)), ("scale", np.float16)])
+
+
+def pack_int8(vectors: np.ndarray) -> np.ndarray:
+    """Quantize ``vectors`` into a structured array of ``(codes, scale)`` records."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    codes, scales = quantize_int8(vectors)
+    packed = np.empty(len(vectors), dtype=int8_record_dtype(vectors.shape[1]))
+    packed["codes"] = codes
+    packed["scale"] = scales
+    return packed
+
+
+def unpack_int8(packed: np.ndarray) -> np.ndarray:
+    """Inverse of :func:`pack_int8`."""
+    return dequantize_int8(packed["codes"], packed["scale"])
+
+
+def to_bfloat16(vectors: np.ndarray) -> np.ndarray:
+    """Truncate float32 values to bfloat16, returned as ``uint16`` bit patterns."""
+    bits = np.ascontiguousarray(vectors, dtype=np.float32).view(np.uint32)
+    return (bits >> 16).astype(np.uint16)
+
+
+def from_bfloat16(bits: np.ndarray) -> np.ndarray:
+    """Expand bfloat16 bit patterns from :func:`to_bfloat16` back to float32."""
+    return (np.asarray(bits, dtype=np.uint16).astype(np.uint32) << 16).view(np.float32)
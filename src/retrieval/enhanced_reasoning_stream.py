@@ -58,27 +58,47 @@ class RAGResponse:
 class ConversationMemory:
     """Manages conversation context and memory."""
     
-    def __init__(self, max_messages: int = 20, context_window: int = 6):
+    def __init__(self, max_messages: int = 20, context_window: int = 6,
+                 max_conversations: int = 1000, idle_ttl_seconds: int = 3600):
         """Initialize conversation memory."""
         self.max_messages = max_messages
         self.context_window = context_window
+        self.max_conversations = max_conversations
+        self.idle_ttl = timedelta(seconds=idle_ttl_seconds)
+        # Both dicts are kept ordered from least to most recently updated so idle
+        # conversations can be evicted from the front
         self.conversations: Dict[str, deque] = {}
         self.conversation_metadata: Dict[str, Dict[str, Any]] = {}
     
     def add_message(self, conversation_id: str, message: ConversationMessage):
         """Add a message to the conversation history."""
         if conversation_id not in self.conversations:
+            self._evict_stale()
             self.conversations[conversation_id] = deque(maxlen=self.max_messages)
             self.conversation_metadata[conversation_id] = {
                 "created_at": datetime.now(),
                 "last_updated": datetime.now(),
                 "message_count": 0
             }
+        else:
+            # Move to the back of the eviction order
+            self.conversations[conversation_id] = self.conversations.pop(conversation_id)
+            self.conversation_metadata[conversation_id] = self.conversation_metadata.pop(conversation_id)
         
         self.conversations[conversation_id].append(message)
         self.conversation_metadata[conversation_id]["last_updated"] = datetime.now()
         self.conversation_metadata[conversation_id]["message_count"] += 1
     
+    def _evict_stale(self):
+        """Drop idle conversations, then the least recently updated past max_conversations."""
+        cutoff = datetime.now() - self.idle_ttl
+        for conversation_id in list(self.conversation_metadata):
+            last_updated = self.conversation_metadata[conversation_id]["last_updated"]
+            if last_updated >= cutoff and len(self.conversations) < self.max_conversations:
+                break
+            del self.conversations[conversation_id]
+            del self.conversation_metadata[conversation_id]
+    
     def get_context(self, conversation_id: str) -> List[ConversationMessage]:
         """Get recent conversation context."""
         if conversation_id not in self.conversations:
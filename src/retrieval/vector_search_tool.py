@@ -80,7 +80,8 @@ class VectorSearchTool:
 
             # Generate query embedding
             if self.embedding_generator:
-                query_embedding = await self.embedding_generator.generate_embedding(query)
+                # ChromaDB expects plain lists, the generator returns float32 arrays
+                query_embedding = (await self.embedding_generator.generate_embedding(query)).tolist()
             else:
                 logger.warning("No embedding generator available")
                 return []
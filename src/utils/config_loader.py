@@ -17,6 +17,7 @@ class ConfigLoader:
     api_port: int = 8000
     debug: bool = True
     log_level: str = "info"
+    api_workers: int = 1
     
     # Database Configuration
     neo4j_uri: str = "bolt://localhost:7687"
@@ -25,6 +26,11 @@ class ConfigLoader:
     
     chroma_host: str = "localhost"
     chroma_port: int = 8000
+    # Store int8 embedding codes; only honoured for cosine-space collections
+    chroma_quantize_embeddings: bool = False
+    
+    redis_url: Optional[str] = None
+    celery_enabled: bool = False
     
     # LLM Configuration
     openai_api_key: Optional[str] = None
@@ -48,6 +54,7 @@ class ConfigLoader:
         self.api_port = int(os.getenv("API_PORT", str(self.api_port)))
         self.debug = os.getenv("DEBUG", "true").lower() == "true"
         self.log_level = os.getenv("LOG_LEVEL", self.log_level)
+        self.api_workers = int(os.getenv("API_WORKERS", str(self.api_workers)))
         
         # Database Configuration
         self.neo4j_uri = os.getenv("NEO4J_URI", self.neo4j_uri)
@@ -56,6 +63,10 @@ class ConfigLoader:
         
         self.chroma_host = os.getenv("CHROMA_HOST", self.chroma_host)
         self.chroma_port = int(os.getenv("CHROMA_PORT", str(self.chroma_port)))
+        self.chroma_quantize_embeddings = os.getenv("CHROMA_QUANTIZE_EMBEDDINGS", "false").lower() == "true"
+        
+        self.redis_url = os.getenv("REDIS_URL", self.redis_url)
+        self.celery_enabled = os.getenv("CELERY_ENABLED", "false").lower() == "true"
         
         # LLM Configuration
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -0,0 +1,95 @@
+"""
+Tests for duplicate detection in the enhanced entity resolution
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("rapidfuzz")
+pytest.importorskip("scipy")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("structlog")
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingestion.enhanced_entity_resolution import EnhancedEntityResolution
+
+ENTITIES = [
+    {"id": "e1", "name": "Apple Inc", "type": "ORGANIZATION", "confidence": 0.9,
+     "attributes": {"industry": "tech", "hq": "Cupertino"}},
+    {"id": "e2", "name": "Microsoft", "type": "ORGANIZATION", "confidence": 0.9,
+     "attributes": {"industry": "tech"}},
+    {"id": "e3", "name": "Apple", "type": "ORGANIZATION", "confidence": 0.7,
+     "attributes": {"industry": "tech", "founded": 1976}},
+    {"id": "e4", "name": "Tim Cook", "type": "PERSON", "confidence": 0.8,
+     "attributes": {"role": ["CEO"]}},
+    {"id": "e5", "name": "The Apple Inc.", "type": "ORGANIZATION", "confidence": 0.8,
+     "attributes": {"hq": "Cupertino, CA"}},
+    {"id": "e6", "name": "Tim Cook", "type": "PERSON", "confidence": 0.6,
+     "attributes": {"role": ["Chairman", "CEO"]}},
+]
+
+
+def _detect(entities, **kwargs):
+    resolver = EnhancedEntityResolution(use_embeddings=False, **kwargs.pop("resolver", {}))
+    return asyncio.run(resolver.detect_duplicates(entities, **kwargs))
+
+
+def _clusters(result):
+    return [
+        (entity["canonical_name"], entity["member_names"], entity["attributes"])
+        for entity in result["canonical_entities"]
+    ]
+
+
+def test_detect_duplicates_clusters_and_merges():
+    result = _detect(ENTITIES)
+
+    # Clusters come out in order of their first member, members in input order
+    assert _clusters(result) == [
+        ("Apple Inc", ["Apple Inc", "Apple"], {"industry": "tech", "hq": "Cupertino", "founded": 1976}),
+        ("Microsoft", ["Microsoft"], {"industry": "tech"}),
+        ("Tim Cook", ["Tim Cook", "Tim Cook"], {"role": ["CEO", "Chairman"]}),
+        ("The Apple Inc.", ["The Apple Inc."], {"hq": "Cupertino, CA"}),
+    ]
+    tim_cook = result["canonical_entities"][2]
+    assert tim_cook["similarity_scores"] == pytest.approx([1.0, 0.9])
+    assert tim_cook["merge_confidence"] == pytest.approx(0.95)
+
+    metrics = result["metrics"]
+    assert (metrics["total_entities"], metrics["total_duplicates"], metrics["unique_entities"]) == (6, 2, 4)
+    assert [row["duplicates"] for row in result["duplicates_table"]] == ["Apple", "Tim Cook"]
+
+
+def test_detect_duplicates_threshold_override_joins_component():
+    result = _detect(ENTITIES, threshold=0.75)
+
+    apple = result["canonical_entities"][0]
+    assert apple["canonical_name"] == "Apple Inc"
+    assert apple["member_names"] == ["Apple Inc", "Apple", "The Apple Inc."]
+    assert apple["attributes"] == {"industry": "tech", "hq": ["Cupertino", "Cupertino, CA"], "founded": 1976}
+    assert result["metrics"]["unique_entities"] == 3
+
+
+def test_detect_duplicates_ignores_input_order():
+    forward = _detect(ENTITIES)
+    backward = _detect(ENTITIES[::-1])
+
+    def groups(result):
+        return {frozenset(entity["member_names"]) for entity in result["canonical_entities"]}
+
+    assert groups(forward) == groups(backward)
+    assert {entity["canonical_name"] for entity in forward["canonical_entities"]} == \
+        {entity["canonical_name"] for entity in backward["canonical_entities"]}
+
+
+def test_blocking_matches_all_pairs():
+    all_pairs = _detect(ENTITIES, threshold=0.75)
+    blocked = _detect(ENTITIES, threshold=0.75, resolver={"blocking_min_candidates": 0})
+
+    assert _clusters(blocked) == _clusters(all_pairs)
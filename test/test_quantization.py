@@ -0,0 +1,93 @@
+"""
+Round-trip tests for the embedding quantization helpers
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingestion.quantization import (
+    from_bfloat16,
+    pack_int8,
+    quantize_int8,
+    to_bfloat16,
+    unpack_int8,
+)
+
+
+def _embeddings(rows: int = 16, dimension: int = 384) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((rows, dimension)).astype(np.float32)
+
+
+def test_int8_round_trip_within_tolerance():
+    vectors = _embeddings()
+
+    restored = unpack_int8(pack_int8(vectors))
+
+    assert restored.dtype == np.float32
+    assert restored.shape == vectors.shape
+    # Rounding costs at most half a step of peak / 127, plus float16 error in the scale
+    peak = np.abs(vectors).max(axis=1, keepdims=True)
+    assert np.all(np.abs(restored - vectors) <= peak / 127)
+
+
+def test_int8_preserves_cosine_similarity():
+    vectors = _embeddings()
+
+    restored = unpack_int8(pack_int8(vectors))
+
+    def normalized(m):
+        return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+    cosine = np.sum(normalized(vectors) * normalized(restored), axis=1)
+    assert np.all(cosine > 0.999)
+
+
+def test_int8_all_zero_row():
+    vectors = _embeddings(rows=3)
+    vectors[1] = 0.0
+
+    codes, scales = quantize_int8(vectors)
+    restored = unpack_int8(pack_int8(vectors))
+
+    assert np.all(np.isfinite(scales))
+    assert not codes[1].any()
+    assert not restored[1].any()
+    assert np.all(np.isfinite(restored))
+
+
+def test_bfloat16_round_trip_within_tolerance():
+    vectors = _embeddings()
+
+    bits = to_bfloat16(vectors)
+    restored = from_bfloat16(bits)
+
+    assert bits.dtype == np.uint16
+    assert restored.dtype == np.float32
+    assert restored.shape == vectors.shape
+    # Truncation keeps 8 significant bits, so the relative error is below 2**-7
+    assert np.all(np.abs(restored - vectors) <= np.abs(vectors) * 2.0 ** -7)
+
+
+def test_bfloat16_exact_for_representable_values():
+    vectors = np.array([[0.0, 1.0, -2.0, 0.5, 3.0, -0.25]], dtype=np.float32)
+
+    restored = from_bfloat16(to_bfloat16(vectors))
+
+    np.testing.assert_array_equal(restored, vectors)
+
+
+def test_bfloat16_all_zero_row():
+    vectors = np.zeros((2, 8), dtype=np.float32)
+
+    bits = to_bfloat16(vectors)
+
+    assert not bits.any()
+    np.testing.assert_array_equal(from_bfloat16(bits), vectors)
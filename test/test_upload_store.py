@@ -0,0 +1,132 @@
+"""
+Tests for the SQLite-backed upload store
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("structlog")
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api.upload_store import UploadStore
+
+
+def _upload_data(doc_id: str, sha256: str) -> dict:
+    return {
+        "doc_id": doc_id,
+        "filename": "report.txt",
+        "file_size": 1234,
+        "file_path": f"uploads/{doc_id}_report.txt",
+        "sha256": sha256,
+        "upload_timestamp": 1700000000.5
+    }
+
+
+def _run(store: UploadStore, coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            await store.close()
+    return asyncio.run(run())
+
+
+def test_add_document_round_trip(tmp_path):
+    store = UploadStore(tmp_path / "uploads.db")
+
+    async def scenario():
+        await store.add_document(_upload_data("doc-1", "abc"))
+        return await store.find_by_sha256("abc"), await store.find_by_sha256("missing")
+
+    found, missing = _run(store, scenario())
+
+    assert found == {**_upload_data("doc-1", "abc"), "status": "processing"}
+    assert missing is None
+
+
+def test_find_by_sha256_reports_status(tmp_path):
+    store = UploadStore(tmp_path / "uploads.db")
+
+    async def scenario():
+        await store.add_document(_upload_data("doc-1", "abc"))
+        await store.set_status("doc-1", "completed")
+        completed = await store.find_by_sha256("abc")
+        await store.set_status("doc-1", "error")
+        failed = await store.find_by_sha256("abc")
+        return completed["status"], failed["status"]
+
+    assert _run(store, scenario()) == ("completed", "error")
+
+
+def test_get_status(tmp_path):
+    store = UploadStore(tmp_path / "uploads.db")
+
+    async def scenario():
+        await store.add_document(_upload_data("doc-1", "abc"))
+        processing = await store.get_status("doc-1")
+        await store.set_status("doc-1", "completed")
+        return processing, await store.get_status("doc-1"), await store.get_status("unknown")
+
+    assert _run(store, scenario()) == ("processing", "completed", None)
+
+
+def test_add_document_replaces_same_content(tmp_path):
+    store = UploadStore(tmp_path / "uploads.db")
+
+    async def scenario():
+        await store.add_document(_upload_data("doc-1", "abc"), status="error")
+        await store.add_document(_upload_data("doc-2", "abc"))
+        return await store.find_by_sha256("abc")
+
+    found = _run(store, scenario())
+
+    assert found["doc_id"] == "doc-2"
+    assert found["status"] == "processing"
+
+
+def test_logs_round_trip_in_order(tmp_path):
+    store = UploadStore(tmp_path / "uploads.db")
+    entries = [
+        {"timestamp": 1.0, "message": "first", "step": 0, "total_steps": 6, "doc_id": "doc-1"},
+        {"timestamp": 2.0, "message": "second", "step": None, "total_steps": 6, "doc_id": "doc-1"},
+        {"timestamp": 3.0, "message": "other", "step": 1, "total_steps": 6, "doc_id": "doc-2"}
+    ]
+
+    async def scenario():
+        for entry in entries:
+            await store.add_log(entry)
+        return await store.get_logs("doc-1"), await store.get_logs("unknown")
+
+    logs, unknown = _run(store, scenario())
+
+    assert logs == entries[:2]
+    assert unknown == []
+
+
+def test_store_survives_reopen(tmp_path):
+    path = tmp_path / "uploads.db"
+    entry = {"timestamp": 1.0, "message": "done", "step": 6, "total_steps": 6, "doc_id": "doc-1"}
+
+    first = UploadStore(path)
+
+    async def write():
+        await first.add_document(_upload_data("doc-1", "abc"), status="completed")
+        await first.add_log(entry)
+
+    _run(first, write())
+
+    second = UploadStore(path)
+
+    async def read():
+        return await second.find_by_sha256("abc"), await second.get_logs("doc-1")
+
+    found, logs = _run(second, read())
+
+    assert found["status"] == "completed"
+    assert logs == [entry]